@@ -1,21 +1,241 @@
 import sys
 import os
-from typing import Any, Dict, List
-from pydantic import BaseModel
-from fastapi import FastAPI, HTTPException
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import BaseModel, Field, ValidationError
+from fastapi import FastAPI, HTTPException, Header, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'modules'))
 
-from modules.jobModuleMain import jobModuleProposalKeyWords, keywordsJobDescription
-from modules.topicModuleMain import createEmbeddingsForTopics, recommendModulesFromTopics, recommendModulesFromEmbeddings
+from models.embeddingIndex import indexStore, IndexVersionError
+from models.embeddingStore import loadStoreDirectory
+from models.modelRegistry import registry, bertModelId, KEYBERT_MODEL_NAME, MODEL_PRELOAD
+from utils.embeddingCache import embeddingCache, keywordEmbeddingCache
+from utils.executor import runBlocking, shutdownExecutors
+from utils.metrics import metrics, recordCache, stage, MetricsMiddleware, PROMETHEUS_CONTENT_TYPE, QUEUE_DEPTH
+from utils.resultCache import resultCache, moduleSetFingerprint
+from utils.profiling import PROFILE_TOKEN, ProfilingMiddleware, isAuthorized, listProfiles, profilePath
+from utils.startup import lazyImport, startBackgroundStartup, startupState
+from utils.vectorCodec import VECTOR_MEDIA_TYPE, encodeVectors, decodeVectors, parseVectorMediaType, resolveRequestDtype
+
+# Module mit torch, sklearn und pandas werden erst im Hintergrund bzw. beim ersten Aufruf importiert,
+# damit der Server sofort Verbindungen annimmt (siehe utils/startup.py)
+jobModuleProposalKeyWords = lazyImport("modules.jobModuleMain", "jobModuleProposalKeyWords")
+keywordsJobDescription = lazyImport("modules.jobModuleMain", "keywordsJobDescription")
+jobsModuleProposalKeyWords = lazyImport("modules.jobModuleMain", "jobsModuleProposalKeyWords")
+createEmbeddingsForTopics = lazyImport("modules.topicModuleMain", "createEmbeddingsForTopics")
+createEmbeddingMatrixForTopics = lazyImport("modules.topicModuleMain", "createEmbeddingMatrixForTopics")
+recommendModulesFromTopics = lazyImport("modules.topicModuleMain", "recommendModulesFromTopics")
+recommendModulesFromVectors = lazyImport("modules.topicModuleMain", "recommendModulesFromVectors")
+recommendModulesFromIndex = lazyImport("modules.topicModuleMain", "recommendModulesFromIndex")
+embedTopicBatch = lazyImport("modules.topicModuleMain", "embedTopicBatch")
+
+# Anzahl der Topics, die /topic-embeddings/stream gemeinsam berechnet, bevor die Ergebnisse gesendet werden
+TOPIC_STREAM_BATCH_SIZE = int(os.getenv("TOPIC_STREAM_BATCH_SIZE", "32"))
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startet das Laden der Modelle im Hintergrund, sofern MODEL_PRELOAD gesetzt ist, sodass der Server sofort
+    Verbindungen annimmt. Andernfalls werden sie beim ersten Zugriff geladen. Den Fortschritt liefert /readyz.
+    Embedding-Stores aus EMBEDDING_STORE_DIR werden als schreibgeschützte Indizes eingebunden.
+    """
+    loadStoreDirectory()
+    startBackgroundStartup(MODEL_PRELOAD)
+    yield
+    shutdownExecutors()
+
+
+class MeasuredJSONResponse(JSONResponse):
+    # Die Serialisierung der Antworten wird als eigener Verarbeitungsschritt erfasst
+    def render(self, content: Any) -> bytes:
+        with stage("serialization"):
+            return super().render(content)
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=MeasuredJSONResponse)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilingMiddleware)
+
+
+def collectRuntimeMetrics() -> None:
+    """
+    Übernimmt vor jeder Ausgabe von /metrics die Kennzahlen, die an anderer Stelle geführt werden:
+    Treffer der Caches sowie die Warteschlangen der Micro-Batcher und des Inferenz-Thread-Pools.
+
+    :return: None
+    """
+    for name, cache in (("embedding", embeddingCache), ("keyword_embedding", keywordEmbeddingCache)):
+        stats = cache.stats()
+        recordCache(name, stats["hits"] + stats["diskHits"], stats["misses"])
+    stats = resultCache.stats()
+    recordCache("result", stats["hits"], stats["misses"])
+
+    # Module mit schweren Abhängigkeiten werden hier nicht importiert (siehe utils/startup.py)
+    textPrepare = sys.modules.get("utils.textPrepare")
+    if textPrepare:
+        for name, function in (("language", textPrepare.detectLanguagePrefix), ("lemma", textPrepare.lemmatize)):
+            if hasattr(function, "cache_info"):
+                info = function.cache_info()
+                recordCache(name, info.hits, info.misses)
+    bertEncoder = sys.modules.get("models.bertEncoder")
+    if bertEncoder:
+        for batcher in bertEncoder.batcherStats():
+            QUEUE_DEPTH.set(batcher["queueDepth"], queue=f"micro-batcher:{batcher['name']}")
+
+
+metrics.addCollector(collectRuntimeMetrics)
+
+
+# Liveness: der Prozess läuft und die Event-Loop antwortet
+@app.get("/healthz")
+async def healthz():
+    """
+    API-Endpunkt für die Liveness-Prüfung des Orchestrators.
+
+    :return: Status 'ok'.
+    """
+    return {"status": "ok"}
+
+
+# Readiness: Modelle sind geladen und aufgewärmt
+@app.get("/readyz")
+async def readyz():
+    """
+    API-Endpunkt für die Readiness-Prüfung. Erst wenn die Modelle geladen und aufgewärmt sind, antwortet er mit 200,
+    vorher bzw. nach einem Fehler beim Start mit 503.
+
+    :return: Aktuelle Startphase und Dauer der abgeschlossenen Phasen.
+    """
+    return JSONResponse(startupState.status(), status_code=200 if startupState.ready else 503)
+
+
+# Endpunkt für den Status der geladenen Modelle
+@app.get("/models")
+async def apiModels():
+    """
+    API-Endpunkt, der die geladenen Modelle und deren Speicherbedarf sowie die Kennzahlen der Micro-Batcher zurückgibt.
+
+    :return: Liste der geladenen Modelle und der Micro-Batcher.
+    """
+    # Ohne geladenes bertEncoder-Modul gibt es noch keine Micro-Batcher
+    bertEncoder = sys.modules.get("models.bertEncoder")
+    return {"models": registry.status(), "batchers": bertEncoder.batcherStats() if bertEncoder else []}
+
+
+# Endpunkt für die Kennzahlen des Embedding-Caches
+@app.get("/embedding-cache")
+async def apiEmbeddingCache():
+    """
+    API-Endpunkt, der Treffer, Fehlzugriffe und Speicherbelegung des Embedding-Caches zurückgibt.
+
+    :return: Kennzahlen des Embedding-Caches.
+    """
+    return embeddingCache.stats()
+
+
+# Endpunkt für die Kennzahlen des Wort-Caches der Schlüsselwortextraktion
+@app.get("/keyword-embedding-cache")
+async def apiKeywordEmbeddingCache():
+    """
+    API-Endpunkt, der die Kennzahlen des Caches für Kandidatenwörter der Schlüsselwortextraktion zurückgibt.
+
+    :return: Kennzahlen des Wort-Caches.
+    """
+    return keywordEmbeddingCache.stats()
+
+
+# Endpunkt für die Kennzahlen des Ergebnis-Caches
+@app.get("/result-cache")
+async def apiResultCache():
+    """
+    API-Endpunkt, der Treffer, Fehlzugriffe und Einträge des Caches für fertige Ergebnisse von
+    /recommend-modules-for-job und /job-keywords zurückgibt.
+
+    :return: Kennzahlen des Ergebnis-Caches.
+    """
+    return resultCache.stats()
+
+
+@app.delete("/result-cache")
+async def apiInvalidateResultCache(modules: Optional[List[Dict[str, Any]]] = None):
+    """
+    API-Endpunkt, der den Ergebnis-Cache leert, z.B. nach einer Änderung des Modulhandbuchs.
+    Mit einer Modulliste im Rumpf werden nur die Ergebnisse zu genau dieser Modulliste entfernt.
+
+    :param modules: Optionale Modulliste, deren Ergebnisse entfernt werden.
+    :return: Anzahl der entfernten Einträge.
+    """
+    removed = resultCache.invalidate(moduleSetFingerprint(modules) if modules is not None else None)
+    return {"removed": removed}
+
+
+# Endpunkt für Prometheus
+@app.get("/metrics")
+async def apiMetrics():
+    """
+    API-Endpunkt, der Latenz-Histogramme je Endpunkt und Verarbeitungsschritt, Batchgrößen, Cache-Trefferquoten
+    und Warteschlangenlängen im Prometheus-Textformat ausgibt. Die Werte gelten je Worker-Prozess.
+
+    :return: Die Metriken als Text.
+    """
+    return Response(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def checkProfileToken(token: Optional[str]) -> None:
+    # Ist PROFILE_TOKEN gesetzt, sind die Profile nur mit diesem Token abrufbar
+    if PROFILE_TOKEN and not isAuthorized(token):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Profile-Token")
+
+
+# Endpunkt für die gespeicherten Profile einzelner Anfragen
+@app.get("/profiles")
+async def apiProfiles(x_profile_token: Optional[str] = Header(None)):
+    """
+    API-Endpunkt, der die gespeicherten Profile (siehe utils/profiling.py) mit Endpunkt, Dauer und Dateien auflistet.
+
+    :param x_profile_token: Token aus PROFILE_TOKEN.
+    :return: Liste der Profile, neueste zuerst.
+    """
+    checkProfileToken(x_profile_token)
+    return {"profiles": listProfiles()}
+
+
+@app.get("/profiles/{profileId}/{fileName}")
+async def apiProfileFile(profileId: str, fileName: str, x_profile_token: Optional[str] = Header(None)):
+    """
+    API-Endpunkt, der eine Datei eines Profils liefert: profile.pstats (für pstats oder snakeviz),
+    stacks.folded (für flamegraph.pl oder speedscope), profile.txt, torch.txt oder meta.json.
+
+    :param profileId: Id des Profils.
+    :param fileName: Name der Datei.
+    :param x_profile_token: Token aus PROFILE_TOKEN.
+    :return: Die Datei.
+    """
+    checkProfileToken(x_profile_token)
+    try:
+        path = profilePath(profileId, fileName)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    mediaType = "application/octet-stream" if fileName.endswith(".pstats") else None
+    return FileResponse(path, media_type=mediaType, filename=fileName)
 
-app = FastAPI()
 
 # Model für die Anforderung von Schlüsselwörtern zu Jobmodulvorschlägen
 class JobModuleProposalKeywordsRequest(BaseModel):
     title: str
     keywords: str
     modules: list
+    # 'hybrid': TF-IDF-Vorauswahl von candidateCount Modulen, die anschließend mit BERT bewertet werden
+    modelType: Literal['bert', 'sklearn', 'hybrid'] = 'bert'
+    candidateCount: Optional[int] = Field(None, gt=0)
+    evaluateRecall: bool = False
 
 
 # Endpunkt für Jobmodulvorschläge mit Keywords
@@ -27,7 +247,48 @@ async def apiJobModuleProposalKeywords(request: JobModuleProposalKeywordsRequest
     :param request: Enthält die erforderlichen Felder für den Jobmodulvorschlag.
     :return: Antwort für Jobmodulvorschläge mit Schlüsselwörtern.
     """
-    return jobModuleProposalKeyWords(request.title, request.keywords, request.modules)
+    # Der Schlüssel wird vor dem Aufruf gebildet, da die Vorverarbeitung die Module verändert
+    fingerprint = moduleSetFingerprint(request.modules)
+    modelVersion = "tfidf" if request.modelType == 'sklearn' else bertModelId()
+    cacheKey = resultCache.makeKey("recommend-modules-for-job", request.title, request.keywords, request.modelType,
+                                   request.candidateCount, request.evaluateRecall, fingerprint, modelVersion)
+    result = resultCache.get(cacheKey)
+    if result is None:
+        result = await runBlocking("recommend-modules-for-job", jobModuleProposalKeyWords,
+                                   request.title, request.keywords, request.modules,
+                                   modelType=request.modelType, candidateCount=request.candidateCount,
+                                   evaluateRecall=request.evaluateRecall)
+        resultCache.put(cacheKey, result, tag=fingerprint)
+    # Titel und Keywords so zurückgeben, wie sie in dieser Anfrage stehen (der Schlüssel ist normalisiert)
+    return {**result, "title": request.title, "keywords": request.keywords}
+
+
+class JobKeywords(BaseModel):
+    title: str
+    keywords: str
+
+
+# Model für Modulvorschläge zu vielen Jobs mit derselben Modulliste
+class JobsModuleProposalRequest(BaseModel):
+    jobs: List[JobKeywords]
+    modules: list
+    modelType: Literal['bert', 'sklearn'] = 'bert'
+    resultLimit: int = Field(5, gt=0)
+
+
+# Endpunkt für Jobmodulvorschläge zu vielen Jobs auf einmal
+@app.post("/recommend-modules-for-jobs")
+async def apiJobsModuleProposalKeywords(request: JobsModuleProposalRequest):
+    """
+    API-Endpunkt wie /recommend-modules-for-job für viele Jobs: die Module werden nur einmal vorverarbeitet
+    und eingebettet, die Ähnlichkeiten aller Jobs zu allen Modulen als Matrix berechnet.
+
+    :param request: Die Jobs (Titel und Keywords), die Module, der Modelltyp und die Anzahl der Vorschläge je Job.
+    :return: Die Vorschläge je Job in der Reihenfolge der Anfrage.
+    """
+    jobs = [{"title": job.title, "keywords": job.keywords} for job in request.jobs]
+    return await runBlocking("recommend-modules-for-jobs", jobsModuleProposalKeyWords, jobs, request.modules,
+                             resultLimit=request.resultLimit, modelType=request.modelType)
 
 
 # Model für die Anforderung von Jobkeywords
@@ -46,7 +307,15 @@ async def apiKeywords(request: JobKeywordsRequest):
     :param request: Enthält die erforderlichen Felder für die Jobkeywords.
     :return: Liste von Schlüsselwörtern.
     """
-    return keywordsJobDescription(request.title, request.description, request.keywordNumber)
+    # Der Titel geht nicht in die Schlüsselwörter ein und daher auch nicht in den Schlüssel
+    cacheKey = resultCache.makeKey("job-keywords", request.description, request.keywordNumber,
+                                   f"keybert:{KEYBERT_MODEL_NAME}")
+    result = resultCache.get(cacheKey)
+    if result is None:
+        result = await runBlocking("job-keywords", keywordsJobDescription,
+                                   request.title, request.description, request.keywordNumber)
+        resultCache.put(cacheKey, result)
+    return {**result, "title": request.title, "description": request.description}
 
 # Model for a single topic
 class Topic(BaseModel):
@@ -59,15 +328,83 @@ class TopicEmbeddingsBatchRequest(BaseModel):
 
 # end point for the creation of topics
 @app.post('/topic-embeddings')
-async def createTopicEmbeddingsBatch(request: TopicEmbeddingsBatchRequest):
+async def createTopicEmbeddingsBatch(request: TopicEmbeddingsBatchRequest, accept: Optional[str] = Header(None)):
     """
     API-Endpunkt zur Erstellung von Embeddings für eine Liste von Topics.
+    Mit 'Accept: application/vnd.baula.vectors+json; dtype=float32|float16' werden die Embeddings
+    als ein Base64-Block statt als JSON-Listen zurückgegeben.
 
     :param request: Ein Batch-Request mit mehreren Topics
+    :param accept: Accept-Header der Anfrage
     :return: Liste von Embeddings für die Topics
     """
-    results = createEmbeddingsForTopics([{"name": topic.name, "description": topic.description} for topic in request.topics])
-    return {"topics": results}
+    try:
+        dtype = parseVectorMediaType(accept)
+    except ValueError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+    topics = [{"name": topic.name, "description": topic.description} for topic in request.topics]
+    if dtype is None:
+        return {"topics": await runBlocking("topic-embeddings", createEmbeddingsForTopics, topics)}
+
+    names, embeddings = await runBlocking("topic-embeddings", createEmbeddingMatrixForTopics, topics)
+    with stage("serialization"):
+        return JSONResponse({
+            "names": names,
+            "dtype": dtype,
+            "dimension": int(embeddings.shape[1]),
+            "embeddings": encodeVectors(embeddings, dtype)
+        }, media_type=f"{VECTOR_MEDIA_TYPE}; dtype={dtype}")
+
+
+def ndjsonLine(record: dict) -> bytes:
+    return (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+async def streamTopicEmbeddings(topics: List[Dict[str, str]], batchSize: int):
+    """
+    Berechnet die Embeddings Batch für Batch und gibt je Topic eine NDJSON-Zeile aus, nach jedem Batch
+    eine Fortschrittszeile und am Ende eine Abschlusszeile. Der nächste Batch wird erst berechnet, wenn
+    der vorige an den Client übergeben wurde; liest der Client langsam, wartet die Berechnung (Backpressure)
+    und es liegt höchstens ein Batch im Speicher. Bricht der Client ab, wird der Generator beendet.
+
+    :param topics: Die Topics mit 'name' und 'description'.
+    :param batchSize: Anzahl der Topics je Batch.
+    :return: Asynchroner Generator der Zeilen.
+    """
+    start = time.perf_counter()
+    total, done, errors = len(topics), 0, 0
+    for offset in range(0, total, batchSize):
+        batch = topics[offset:offset + batchSize]
+        try:
+            records = await runBlocking("topic-embeddings", embedTopicBatch, batch, offset)
+        except Exception as e:
+            print(f"ERROR: {e}")
+            records = [{"type": "error", "index": offset + position, "name": topic["name"], "detail": str(e)}
+                       for position, topic in enumerate(batch)]
+        done += len(batch)
+        errors += sum(record["type"] == "error" for record in records)
+        yield b"".join(ndjsonLine(record) for record in records)
+        yield ndjsonLine({"type": "progress", "done": done, "total": total, "errors": errors})
+    yield ndjsonLine({"type": "done", "total": total, "errors": errors,
+                      "durationMs": round((time.perf_counter() - start) * 1000, 3)})
+
+
+@app.post('/topic-embeddings/stream')
+async def streamTopicEmbeddingsBatch(request: TopicEmbeddingsBatchRequest,
+                                     batchSize: int = Query(TOPIC_STREAM_BATCH_SIZE, ge=1, le=1024)):
+    """
+    API-Endpunkt wie /topic-embeddings, der die Embeddings als NDJSON (eine JSON-Zeile je Eintrag) streamt,
+    sobald ein Batch berechnet ist. Zeilen:
+    {'type': 'embedding', 'index', 'name', 'embedding'}, {'type': 'error', 'index', 'name', 'detail'},
+    {'type': 'progress', 'done', 'total', 'errors'} und zuletzt {'type': 'done', 'total', 'errors', 'durationMs'}.
+
+    :param request: Ein Batch-Request mit mehreren Topics
+    :param batchSize: Anzahl der Topics je Batch (default: TOPIC_STREAM_BATCH_SIZE)
+    :return: Die Zeilen als application/x-ndjson
+    """
+    topics = [{"name": topic.name, "description": topic.description} for topic in request.topics]
+    return StreamingResponse(streamTopicEmbeddings(topics, batchSize), media_type=NDJSON_MEDIA_TYPE)
 
 
 # Models
@@ -101,7 +438,7 @@ async def recommendModules(data: RecommendationRequest):
             {"acronym": module.acronym, "name": module.name, "content": module.content, "skills": module.skills}
             for module in data.modules
         ]
-        recommendations = recommendModulesFromTopics(topics, modules)
+        recommendations = await runBlocking("topic-module-recommendations", recommendModulesFromTopics, topics, modules)
         return {"recModules": recommendations}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
@@ -122,38 +459,187 @@ class EmbeddingRecommendationRequest(BaseModel):
     topicEmbeddings: List[TopicEmbedding]
     moduleEmbeddings: List[ModuleEmbedding]
 
-@app.post("/topic-module-recommendations-pre-generated", response_model=RecommendationResponse)
-async def recommendModulesPreGenerated(data: EmbeddingRecommendationRequest):
-    
-    print(f"Python API received - Topics: {len(data.topicEmbeddings)}, Modules: {len(data.moduleEmbeddings)}")
-    
+# Vektoren als Base64-Blöcke (Content-Type: application/vnd.baula.vectors+json)
+class BinaryEmbeddingRecommendationRequest(BaseModel):
+    # None = Datentyp aus dem Content-Type-Header bzw. float32
+    dtype: Optional[str] = None
+    dimension: int
+    topicIds: List[str]
+    topicVectors: str
+    moduleAcronyms: List[str]
+    moduleVectors: str
+
+@app.post(
+    "/topic-module-recommendations-pre-generated",
+    response_model=RecommendationResponse,
+    openapi_extra={"requestBody": {"required": True, "content": {
+        "application/json": {"schema": EmbeddingRecommendationRequest.model_json_schema()},
+        VECTOR_MEDIA_TYPE: {"schema": BinaryEmbeddingRecommendationRequest.model_json_schema()},
+    }}}
+)
+async def recommendModulesPreGenerated(request: Request):
+    """
+    API-Endpunkt für Modulempfehlungen aus vorab berechneten Embeddings.
+    Die Vektoren werden je nach Content-Type als JSON-Listen oder als Base64-Blöcke übergeben.
+
+    :param request: Die Anfrage mit EmbeddingRecommendationRequest bzw. BinaryEmbeddingRecommendationRequest als Body.
+    :return: Empfohlene Module.
+    """
+    body = await request.body()
+    try:
+        contentType = request.headers.get("content-type")
+        if parseVectorMediaType(contentType) is not None:
+            data = BinaryEmbeddingRecommendationRequest.model_validate_json(body)
+            dtype = resolveRequestDtype(contentType, data.dtype)
+            topic_ids = data.topicIds
+            topic_vectors = decodeVectors(data.topicVectors, dtype, data.dimension, len(data.topicIds))
+            acronyms = data.moduleAcronyms
+            module_vectors = decodeVectors(data.moduleVectors, dtype, data.dimension, len(data.moduleAcronyms))
+        else:
+            data = EmbeddingRecommendationRequest.model_validate_json(body)
+            topic_ids = [topic.tId for topic in data.topicEmbeddings]
+            topic_vectors = [topic.vector for topic in data.topicEmbeddings]
+            acronyms = [module.acronym for module in data.moduleEmbeddings]
+            module_vectors = [module.vector for module in data.moduleEmbeddings]
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
-        topics = [
-            {
-                "tId": topic.tId,
-                "vector": topic.vector
-            } 
-            for topic in data.topicEmbeddings
-        ]
-        
-        modules = [
-            {
-                "acronym": module.acronym,
-                "vector": module.vector
-            }
-            for module in data.moduleEmbeddings
-        ]
-        
-        result  = recommendModulesFromEmbeddings(topics, modules)
-        
-        if not isinstance(result, dict) or "recModules" not in result:
-            if isinstance(result, list):
-                result = {"recModules": result}
-        
-        print(f"Python API returning {len(result.get('recModules', []))} recommendations")
-        
-        return result
+        return await runBlocking("topic-module-recommendations-pre-generated", recommendModulesFromVectors,
+                                 topic_ids, topic_vectors, acronyms, module_vectors)
     except Exception as e:
-        print(f"Error in API endpoint: {str(e)}")
         print(f"Python API ERROR: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+#=============================================================================
+#                             EMBEDDING INDEXES
+#=============================================================================
+
+class IndexEntry(BaseModel):
+    id: str
+    vector: List[float]
+
+class IndexLoadRequest(BaseModel):
+    version: str
+    entries: List[IndexEntry]
+    # Art des Suchindex, None = VECTOR_INDEX_TYPE
+    indexType: Optional[Literal['exact', 'ivf']] = None
+
+class IndexUpdateRequest(BaseModel):
+    version: Optional[str] = None
+    upsert: List[IndexEntry] = []
+    delete: List[str] = []
+
+class IndexedRecommendationRequest(BaseModel):
+    moduleIndex: str
+    moduleIndexVersion: Optional[str] = None
+    topicEmbeddings: List[TopicEmbedding] = []
+    topicIndex: Optional[str] = None
+    topicIds: List[str] = []
+    topK: int = 3
+
+class IndexedRecommendationResponse(BaseModel):
+    recModules: List[Dict[str, Any]]
+    indexVersion: str
+    indexRevision: int
+
+
+def indexErrorToHttp(e: Exception) -> HTTPException:
+    """
+    Übersetzt Fehler beim Zugriff auf einen Index in passende HTTP-Fehler.
+
+    :param e: Der aufgetretene Fehler.
+    :return: HTTPException mit Statuscode 404, 409, 400 oder 500.
+    """
+    if isinstance(e, IndexVersionError):
+        return HTTPException(status_code=409, detail=str(e))
+    if isinstance(e, KeyError):
+        return HTTPException(status_code=404, detail=str(e.args[0]) if e.args else str(e))
+    if isinstance(e, ValueError):
+        return HTTPException(status_code=400, detail=str(e))
+    return HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+
+@app.get("/embedding-indexes")
+async def listEmbeddingIndexes():
+    """
+    API-Endpunkt, der alle auf dem Server gehaltenen Embedding-Indizes auflistet.
+
+    :return: Liste mit Name, Version, Revision und Größe der Indizes.
+    """
+    return {"indexes": indexStore.list()}
+
+
+@app.put("/embedding-indexes/{name}")
+async def loadEmbeddingIndex(name: str, data: IndexLoadRequest):
+    """
+    API-Endpunkt, der einen Index (z.B. alle Modul-Embeddings eines Modulhandbuchs) vollständig lädt bzw. ersetzt.
+
+    :param name: Name des Index.
+    :param data: Version und Einträge des Index.
+    :return: Metadaten des geladenen Index.
+    """
+    try:
+        index = await runBlocking("embedding-indexes", indexStore.load, name, data.version,
+                                  [entry.id for entry in data.entries], [entry.vector for entry in data.entries],
+                                  indexType=data.indexType)
+        return index.info()
+    except Exception as e:
+        raise indexErrorToHttp(e)
+
+
+@app.patch("/embedding-indexes/{name}")
+async def updateEmbeddingIndex(name: str, data: IndexUpdateRequest):
+    """
+    API-Endpunkt, der einzelne Einträge eines Index hinzufügt, ersetzt oder entfernt.
+
+    :param name: Name des Index.
+    :param data: Neue Version sowie hinzuzufügende und zu entfernende Einträge.
+    :return: Metadaten des geänderten Index.
+    """
+    try:
+        index = indexStore.get(name)
+        await runBlocking("embedding-indexes", index.apply, [entry.id for entry in data.upsert],
+                          [entry.vector for entry in data.upsert], data.delete, version=data.version)
+        return index.info()
+    except Exception as e:
+        raise indexErrorToHttp(e)
+
+
+@app.delete("/embedding-indexes/{name}")
+async def deleteEmbeddingIndex(name: str):
+    """
+    API-Endpunkt, der einen Index entfernt.
+
+    :param name: Name des Index.
+    :return: Name des entfernten Index.
+    """
+    if not indexStore.remove(name):
+        raise HTTPException(status_code=404, detail=f"Unknown index: {name}")
+    return {"removed": name}
+
+
+@app.post("/topic-module-recommendations-indexed", response_model=IndexedRecommendationResponse)
+async def recommendModulesIndexed(data: IndexedRecommendationRequest):
+    """
+    API-Endpunkt für Modulempfehlungen gegen einen auf dem Server gehaltenen Modul-Index.
+    Die Topics werden entweder als Vektoren oder als Ids eines Topic-Index übergeben.
+
+    :param data: Name (und optional Version) des Modul-Index sowie die Topics.
+    :return: Empfohlene Module sowie Version und Revision des Modul-Index.
+    """
+    try:
+        return await runBlocking(
+            "topic-module-recommendations-indexed",
+            recommendModulesFromIndex,
+            data.moduleIndex,
+            topics=[{"tId": topic.tId, "vector": topic.vector} for topic in data.topicEmbeddings],
+            topic_ids=data.topicIds,
+            topic_index_name=data.topicIndex,
+            module_index_version=data.moduleIndexVersion,
+            top_k=data.topK
+        )
+    except Exception as e:
+        raise indexErrorToHttp(e)
@@ -0,0 +1,211 @@
+import asyncio
+import json
+import time
+
+from benchmarks.timing import summarize
+
+
+async def callAsgi(app, method: str, path: str, body: bytes = b"", headers: dict = None) -> tuple[int, bytes]:
+    """
+    Ruft eine ASGI-Anwendung im selben Prozess auf, ohne Netzwerk und ohne zusätzliche Abhängigkeiten.
+    Gemessen wird damit die Anwendung samt Validierung und Serialisierung, nicht aber der HTTP-Server.
+
+    :param app: Die ASGI-Anwendung.
+    :param method: HTTP-Methode.
+    :param path: Pfad des Endpunkts.
+    :param body: Rumpf der Anfrage.
+    :param headers: Header der Anfrage.
+    :return: Tuple aus Statuscode und Rumpf der Antwort.
+    """
+    headers = {"content-type": "application/json", **(headers or {})} if body else dict(headers or {})
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(key.lower().encode(), value.encode()) for key, value in headers.items()]
+                   + [(b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("benchmark", 80),
+    }
+    finished = asyncio.Event()
+    requestSent = False
+    status, chunks = None, []
+
+    async def receive():
+        nonlocal requestSent
+        if not requestSent:
+            requestSent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                finished.set()
+
+    await app(scope, receive, send)
+    finished.set()
+    return status, b"".join(chunks)
+
+
+def endpointScenarios(data: dict, modelTypes: tuple = ('bert', 'sklearn', 'hybrid')) -> dict:
+    """
+    Erzeugt die Anfragen für alle Endpunkte aus dem synthetischen Datensatz. Die Rümpfe werden vorab serialisiert,
+    damit die Kosten des Clients nicht in die Messung eingehen.
+
+    :param data: Datensatz aus benchmarks.syntheticData.generateDataset.
+    :param modelTypes: Modelltypen, mit denen /recommend-modules-for-job gemessen wird.
+    :return: Dictionary Name -> (Methode, Pfad, Liste von Rümpfen, Header[, vorbereitende Anfrage]).
+    """
+    from utils.vectorCodec import VECTOR_MEDIA_TYPE, encodeVectors
+
+    modules, topics, jobs = data["modules"], data["topics"], data["jobs"]
+    moduleVectors, topicVectors = data["moduleVectors"], data["topicVectors"]
+    acronyms = [module["acronym"] for module in modules]
+    topicIds = [topic["tId"] for topic in topics]
+    topicNames = [topic["name"] for topic in topics]
+    dimension = int(moduleVectors.shape[1])
+
+    def encode(payload) -> bytes:
+        return json.dumps(payload).encode("utf-8")
+
+    def keywords(i: int) -> str:
+        return ", ".join(topicNames[(i + offset) % len(topicNames)] for offset in range(8))
+
+    moduleSubset = [{key: module[key] for key in ("acronym", "name", "content", "skills")} for module in modules]
+    topicEmbeddings = [{"tId": tId, "vector": vector.tolist()} for tId, vector in zip(topicIds, topicVectors)]
+    binaryRecommendation = {
+        "dtype": "float16",
+        "dimension": dimension,
+        "topicIds": topicIds,
+        "topicVectors": encodeVectors(topicVectors, "float16"),
+        "moduleAcronyms": acronyms,
+        "moduleVectors": encodeVectors(moduleVectors, "float16"),
+    }
+
+    scenarios = {
+        "GET /healthz": ("GET", "/healthz", [b""], {}),
+        "GET /models": ("GET", "/models", [b""], {}),
+        "GET /metrics": ("GET", "/metrics", [b""], {}),
+    }
+    for modelType in modelTypes:
+        scenarios[f"POST /recommend-modules-for-job [{modelType}]"] = (
+            "POST", "/recommend-modules-for-job",
+            [encode({"title": job["title"], "keywords": keywords(i), "modules": modules, "modelType": modelType})
+             for i, job in enumerate(jobs)], {})
+    scenarios["POST /recommend-modules-for-jobs [bert]"] = (
+        "POST", "/recommend-modules-for-jobs",
+        [encode({"jobs": [{"title": job["title"], "keywords": keywords(i)} for i, job in enumerate(jobs)],
+                 "modules": modules})], {})
+    scenarios["POST /job-keywords"] = (
+        "POST", "/job-keywords",
+        [encode({"title": job["title"], "description": job["description"], "keywordNumber": 10}) for job in jobs], {})
+    topicBody = [encode({"topics": [{"name": topic["name"], "description": topic["description"]} for topic in topics]})]
+    scenarios["POST /topic-embeddings [json]"] = ("POST", "/topic-embeddings", topicBody, {})
+    scenarios["POST /topic-embeddings [float16]"] = (
+        "POST", "/topic-embeddings", topicBody, {"accept": f"{VECTOR_MEDIA_TYPE}; dtype=float16"})
+    scenarios["POST /topic-embeddings/stream"] = ("POST", "/topic-embeddings/stream", topicBody, {})
+    scenarios["POST /topic-module-recommendations"] = (
+        "POST", "/topic-module-recommendations", [encode({"topics": topics, "modules": moduleSubset})], {})
+    scenarios["POST /topic-module-recommendations-pre-generated [json]"] = (
+        "POST", "/topic-module-recommendations-pre-generated",
+        [encode({"topicEmbeddings": topicEmbeddings,
+                 "moduleEmbeddings": [{"acronym": acronym, "vector": vector.tolist()}
+                                      for acronym, vector in zip(acronyms, moduleVectors)]})], {})
+    scenarios["POST /topic-module-recommendations-pre-generated [float16]"] = (
+        "POST", "/topic-module-recommendations-pre-generated", [encode(binaryRecommendation)],
+        {"content-type": f"{VECTOR_MEDIA_TYPE}; dtype=float16"})
+    for indexType in ('exact', 'ivf'):
+        loadIndex = ("PUT", f"/embedding-indexes/benchmark-{indexType}",
+                     [encode({"version": "benchmark", "indexType": indexType,
+                              "entries": [{"id": acronym, "vector": vector.tolist()}
+                                          for acronym, vector in zip(acronyms, moduleVectors)]})], {})
+        scenarios[f"PUT /embedding-indexes [{indexType}]"] = loadIndex
+        # Lädt den Index vor der Messung, damit das Szenario auch allein (siehe --filter) lauffähig ist
+        scenarios[f"POST /topic-module-recommendations-indexed [{indexType}]"] = (
+            "POST", "/topic-module-recommendations-indexed",
+            [encode({"moduleIndex": f"benchmark-{indexType}", "topicEmbeddings": topicEmbeddings, "topK": 3})], {},
+            loadIndex)
+    return scenarios
+
+
+async def runScenario(app, method: str, path: str, bodies: list[bytes], headers: dict,
+                      requests: int, concurrency: int = 1) -> dict:
+    """
+    Schickt eine Anzahl an Anfragen mit der gegebenen Parallelität an einen Endpunkt. Die erste Anfrage läuft
+    allein und wird getrennt ausgewiesen (firstMs), da sie Modelle, Caches und Indizes füllt.
+
+    :param app: Die ASGI-Anwendung.
+    :param method: HTTP-Methode.
+    :param path: Pfad des Endpunkts.
+    :param bodies: Rümpfe der Anfragen, die reihum verwendet werden.
+    :param headers: Header der Anfragen.
+    :param requests: Anzahl der gemessenen Anfragen.
+    :param concurrency: Anzahl gleichzeitig offener Anfragen.
+    :return: Zusammenfassung (siehe benchmarks.timing.summarize) samt Anzahl fehlgeschlagener Anfragen.
+    """
+    start = time.perf_counter()
+    status, body = await callAsgi(app, method, path, bodies[0], headers)
+    firstSeconds = time.perf_counter() - start
+    if status >= 400:
+        raise RuntimeError(f"{method} {path} returned {status}: {body[:500].decode('utf-8', 'replace')}")
+
+    pending = iter(range(requests))
+    latencies, errors = [], 0
+
+    async def worker():
+        nonlocal errors
+        for index in pending:
+            begin = time.perf_counter()
+            status, _ = await callAsgi(app, method, path, bodies[index % len(bodies)], headers)
+            latencies.append(time.perf_counter() - begin)
+            if status >= 400:
+                errors += 1
+
+    wallStart = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    summary = summarize(latencies, wallSeconds=time.perf_counter() - wallStart)
+    return {**summary, "firstMs": round(firstSeconds * 1000, 3), "concurrency": concurrency, "errors": errors}
+
+
+async def endpointBenchmarks(data: dict, requests: int = 20, concurrency: int = 4, only: list[str] = None) -> dict:
+    """
+    Startet die API im selben Prozess (inklusive Lifespan, also Start im Hintergrund bis /readyz bereit meldet)
+    und misst alle Endpunkte nacheinander.
+
+    :param data: Datensatz aus benchmarks.syntheticData.generateDataset.
+    :param requests: Anzahl der gemessenen Anfragen je Endpunkt.
+    :param concurrency: Anzahl gleichzeitig offener Anfragen.
+    :param only: Optional nur die Szenarien, deren Name einen dieser Texte enthält.
+    :return: Dictionary mit einer Zusammenfassung je Endpunkt sowie der Startdauer bis zur Bereitschaft.
+    """
+    from api.api import app
+    from utils.startup import startupState
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        start = time.perf_counter()
+        while not startupState.ready:
+            if startupState.phase == "failed":
+                raise RuntimeError(f"Startup failed: {startupState.error}")
+            await asyncio.sleep(0.05)
+        results["startup"] = {"readyMs": round((time.perf_counter() - start) * 1000, 3), **startupState.status()}
+
+        for name, (method, path, bodies, headers, *prepare) in endpointScenarios(data).items():
+            if only and not any(part in name for part in only):
+                continue
+            for prepareMethod, preparePath, prepareBodies, prepareHeaders in prepare:
+                await callAsgi(app, prepareMethod, preparePath, prepareBodies[0], prepareHeaders)
+            results[name] = await runScenario(app, method, path, bodies, headers, requests, concurrency)
+    return results
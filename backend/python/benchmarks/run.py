@@ -0,0 +1,164 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+
+from benchmarks.timing import peakRssMb
+
+# Kennzahlen, die mit einer Baseline verglichen werden; höher ist bei allen schlechter
+COMPARED_METRICS = ("p50Ms", "p95Ms")
+
+SIZES = {
+    "quick": {"modules": 60, "topics": 8, "jobs": 3, "repeat": 3, "requests": 6},
+    "full": {"modules": 400, "topics": 40, "jobs": 10, "repeat": 10, "requests": 30},
+}
+
+
+def compareResults(current: dict, baseline: dict, threshold: float = 0.2) -> list[dict]:
+    """
+    Vergleicht die Laufzeiten eines Laufs mit einem früheren Lauf (Baseline).
+
+    :param current: Ergebnis des aktuellen Laufs.
+    :param baseline: Ergebnis des früheren Laufs.
+    :param threshold: Relative Verschlechterung, ab der ein Wert als Regression gilt (0.2 = 20 % langsamer).
+    :return: Liste mit einem Eintrag je Messung und Kennzahl (alter und neuer Wert, Verhältnis, Regression).
+    """
+    rows = []
+    for section in ("stages", "endpoints"):
+        for name, stats in current.get(section, {}).items():
+            previous = baseline.get(section, {}).get(name)
+            if not previous:
+                continue
+            for metric in COMPARED_METRICS:
+                if metric not in stats or not previous.get(metric):
+                    continue
+                ratio = stats[metric] / previous[metric]
+                rows.append({
+                    "name": f"{section}/{name}",
+                    "metric": metric,
+                    "baseline": previous[metric],
+                    "current": stats[metric],
+                    "ratio": round(ratio, 3),
+                    "regression": ratio > 1 + threshold,
+                })
+    return rows
+
+
+def formatTable(results: dict) -> str:
+    lines = [f"{'benchmark':<72} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'per s':>10} {'RSS MB':>8}"]
+    for section in ("stages", "endpoints"):
+        for name, stats in results.get(section, {}).items():
+            if "p50Ms" not in stats:
+                continue
+            lines.append(f"{section + '/' + name:<72} {stats['p50Ms']:>10.2f} {stats['p95Ms']:>10.2f} "
+                         f"{stats['p99Ms']:>10.2f} {stats['throughput'] or 0:>10.1f} {stats['peakRssMb']:>8.1f}")
+    return "\n".join(lines)
+
+
+def environmentInfo(args) -> dict:
+    import numpy
+    import torch
+
+    from models.inferenceBackend import INFERENCE_BACKEND
+    from models.modelRegistry import BERT_MODEL_NAME
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpuCount": os.cpu_count(),
+        "torch": torch.__version__,
+        "torchThreads": torch.get_num_threads(),
+        "numpy": numpy.__version__,
+        "model": "stand-in" if args.stand_in else BERT_MODEL_NAME,
+        "inferenceBackend": INFERENCE_BACKEND,
+        "size": args.size,
+        "seed": args.seed,
+        "concurrency": args.concurrency,
+        "resultCache": args.result_cache,
+    }
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Misst die Verarbeitungsschritte und Endpunkte der API mit synthetischen Daten.")
+    parser.add_argument("--stand-in", action="store_true",
+                        help="kleines Ersatzmodell statt der echten Modelle verwenden (offline, schnell)")
+    parser.add_argument("--stand-in-dir", default=None, help="Verzeichnis, in dem das Ersatzmodell abgelegt wird")
+    parser.add_argument("--size", choices=SIZES, default="quick")
+    parser.add_argument("--modules", type=int, help="Anzahl der Module (überschreibt --size)")
+    parser.add_argument("--topics", type=int)
+    parser.add_argument("--jobs", type=int)
+    parser.add_argument("--repeat", type=int, help="gemessene Aufrufe je Verarbeitungsschritt")
+    parser.add_argument("--requests", type=int, help="gemessene Anfragen je Endpunkt")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--dimension", type=int, default=768, help="Dimension der vorab berechneten Vektoren")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", choices=["stages", "endpoints"], default=None)
+    parser.add_argument("--filter", action="append", default=None,
+                        help="nur Endpunkte messen, deren Name diesen Text enthält (mehrfach möglich)")
+    parser.add_argument("--output", default=None, help="Ergebnis als JSON speichern (z.B. als neue Baseline)")
+    parser.add_argument("--baseline", default=None, help="JSON eines früheren Laufs zum Vergleich")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--result-cache", action="store_true",
+                        help="Ergebnis-Cache eingeschaltet lassen (sonst werden wiederholte Anfragen neu berechnet)")
+    parser.add_argument("--verbose", action="store_true", help="Ausgaben der API während der Messung anzeigen")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    if not args.result_cache:
+        os.environ["RESULT_CACHE_TTL_SECONDS"] = "0"
+    if args.stand_in:
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        from benchmarks.standInModels import registerStandInModels
+        registerStandInModels(args.stand_in_dir)
+
+    from benchmarks.endpoints import endpointBenchmarks
+    from benchmarks.stages import stageBenchmarks
+    from benchmarks.syntheticData import generateDataset
+    from utils.textPrepare import ensureNltkResources
+
+    size = dict(SIZES[args.size])
+    for key in size:
+        if getattr(args, key) is not None:
+            size[key] = getattr(args, key)
+    data = generateDataset(size["modules"], size["topics"], size["jobs"], dimension=args.dimension, seed=args.seed)
+    ensureNltkResources()
+
+    results = {"meta": {**environmentInfo(args), **size, "dimension": args.dimension}}
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+        if args.only in (None, "stages"):
+            results["stages"] = stageBenchmarks(data, repeat=size["repeat"])
+        if args.only in (None, "endpoints"):
+            results["endpoints"] = asyncio.run(
+                endpointBenchmarks(data, size["requests"], args.concurrency, only=args.filter))
+    results["peakRssMb"] = peakRssMb()
+
+    print(formatTable(results))
+    print(f"Peak RSS: {results['peakRssMb']} MB")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+        print(f"Results written to {args.output}")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            comparison = compareResults(results, json.load(file), args.threshold)
+        for row in comparison:
+            marker = "REGRESSION" if row["regression"] else ""
+            print(f"{row['name']:<72} {row['metric']:<6} {row['baseline']:>10.2f} -> {row['current']:>10.2f} "
+                  f"x{row['ratio']:<6} {marker}")
+        regressions = [row for row in comparison if row["regression"]]
+        print(f"{len(regressions)} of {len(comparison)} values slower than baseline by more than "
+              f"{args.threshold:.0%}")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+import json
+import os
+import tempfile
+
+from benchmarks.timing import measure
+
+
+def stageBenchmarks(data: dict, repeat: int = 5) -> dict:
+    """
+    Misst die einzelnen Verarbeitungsschritte der Endpunkte getrennt voneinander (Microbenchmarks).
+
+    :param data: Datensatz aus benchmarks.syntheticData.generateDataset.
+    :param repeat: Anzahl der gemessenen Aufrufe je Schritt.
+    :return: Dictionary mit einer Zusammenfassung (siehe benchmarks.timing.summarize) je Schritt.
+    """
+    from models.bertEncoder import embedTexts
+    from models.embeddingStore import EmbeddingStore, writeEmbeddingStore
+    from models.similaritySklearn import TfidfModuleIndex, corpusFingerprint
+    from models.vectorIndex import createVectorIndex
+    from modules.topicModuleMain import aggregateTopModules
+    from utils.embeddingCache import EmbeddingCache, keywordEmbeddingCache
+    from utils.evaluateSectionRelevance import SectionEvaluator
+    from utils.keywordExtractionBert import keywordExtraction
+    from utils.similarityMatrix import cosineSimilarityMatrix
+    from utils.textPrepare import LANGUAGE_DETECTION_CHARS, detectLanguagePrefix, preprocessTexts
+    from utils.vectorCodec import decodeVectors, encodeVectors
+
+    modules, topics, jobs = data["modules"], data["topics"], data["jobs"]
+    moduleVectors, topicVectors = data["moduleVectors"], data["topicVectors"]
+    moduleTexts = [module["content"] for module in modules]
+    jobTexts = [job["description"] for job in jobs]
+    topicTexts = [f"{topic['name']} {topic['description']}" for topic in topics]
+    acronyms = [module["acronym"] for module in modules]
+    topicIds = [topic["tId"] for topic in topics]
+    results = {}
+
+    results["preprocess.modules"] = measure(lambda: preprocessTexts(moduleTexts), repeat, items=len(moduleTexts))
+    # Ohne den lru_cache der Spracherkennung, sonst würde nur der Cache gemessen
+    results["preprocess.detectLanguage"] = measure(
+        lambda: [detectLanguagePrefix.__wrapped__(text[:LANGUAGE_DETECTION_CHARS]) for text in jobTexts], repeat,
+        items=len(jobTexts))
+
+    evaluator = SectionEvaluator()
+    results["sections.evaluate"] = measure(
+        lambda: [evaluator.evaluateSection(text, relevance='important') for text in jobTexts], repeat, items=len(jobTexts))
+
+    results["bert.encode.pooler"] = measure(
+        lambda: embedTexts(topicTexts, pooling='pooler', cache=None), repeat, items=len(topicTexts))
+    results["bert.encode.mean"] = measure(
+        lambda: embedTexts(moduleTexts, pooling='mean', cache=None), repeat, items=len(moduleTexts))
+    # Eigener Cache, damit der Cache der API nicht verändert wird; der Aufwärmaufruf füllt ihn
+    warmCache = EmbeddingCache(256 * 1024 * 1024)
+    results["bert.embed.cached"] = measure(
+        lambda: embedTexts(moduleTexts, pooling='mean', cache=warmCache), repeat, items=len(moduleTexts))
+
+    results["keywords.extract.cold"] = measure(
+        lambda: keywordExtraction(jobTexts[0], preprocess=False, top_n=10), repeat, setup=keywordEmbeddingCache.clear)
+    results["keywords.extract.warm"] = measure(
+        lambda: keywordExtraction(jobTexts[0], preprocess=False, top_n=10), repeat)
+
+    results["tfidf.build"] = measure(lambda: TfidfModuleIndex(modules), repeat, items=len(modules))
+    tfidfIndex = TfidfModuleIndex(modules)
+    jobQueries = [f"{job['title']} {job['description']}" for job in jobs]
+    results["tfidf.search"] = measure(
+        lambda: [tfidfIndex.search(query) for query in jobQueries], repeat, items=len(jobQueries))
+    # Fällt bei jeder Anfrage für die Suche des passenden Index an
+    results["tfidf.fingerprint"] = measure(lambda: corpusFingerprint(modules), repeat, items=len(modules))
+
+    results["similarity.matrix+aggregate"] = measure(
+        lambda: aggregateTopModules(topicIds, acronyms, cosineSimilarityMatrix(topicVectors, moduleVectors)),
+        repeat, items=len(topicIds))
+
+    for kind in ('exact', 'ivf'):
+        results[f"vectorIndex.{kind}.build"] = measure(
+            lambda: createVectorIndex(kind).build(acronyms, moduleVectors), max(1, repeat // 2), items=len(acronyms))
+        index = createVectorIndex(kind).build(acronyms, moduleVectors)
+        results[f"vectorIndex.{kind}.search"] = measure(
+            lambda: index.search(topicVectors, 10), repeat, items=len(topicIds))
+
+    with tempfile.TemporaryDirectory() as directory:
+        for dtype in ('float16', 'int8'):
+            path = os.path.join(directory, f"modules-{dtype}.emb")
+            writeEmbeddingStore(path, acronyms, moduleVectors, "benchmark", dtype)
+            store = EmbeddingStore(path)
+            results[f"embeddingStore.{dtype}.search"] = measure(
+                lambda: store.search(topicVectors, 10), repeat, items=len(topicIds))
+            del store
+
+    for dtype in ('float32', 'float16'):
+        encoded = encodeVectors(moduleVectors, dtype)
+        results[f"vectorCodec.{dtype}.encode"] = measure(
+            lambda: encodeVectors(moduleVectors, dtype), repeat, items=len(moduleVectors))
+        results[f"vectorCodec.{dtype}.decode"] = measure(
+            lambda: decodeVectors(encoded, dtype, moduleVectors.shape[1], len(moduleVectors)), repeat,
+            items=len(moduleVectors))
+        results[f"vectorCodec.json.{dtype}.size"] = {"bytes": len(encoded)}
+    results["vectorCodec.json.lists.size"] = {"bytes": len(json.dumps(moduleVectors.tolist()))}
+
+    return results
@@ -0,0 +1,81 @@
+import os
+import string
+import tempfile
+
+from benchmarks.syntheticData import vocabulary
+
+SPECIAL_TOKENS = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+
+
+def writeStandInBert(directory: str, hiddenSize: int = 128, layers: int = 2, heads: int = 4, seed: int = 0) -> str:
+    """
+    Schreibt ein kleines, zufällig initialisiertes BERT-Modell samt Tokenizer, dessen Vokabular die Wörter der
+    synthetischen Daten enthält. Es ersetzt bert-base-german-cased und all-MiniLM-L6-v2, damit die Benchmarks
+    offline und auf einer CPU in kurzer Zeit laufen. Die Scores sind bedeutungslos, Tokenisierung, Batching,
+    Pooling und die übrige Verarbeitung entsprechen aber dem echten Modell.
+
+    :param directory: Zielverzeichnis.
+    :param hiddenSize: Dimension der Embeddings.
+    :param layers: Anzahl der Transformer-Schichten.
+    :param heads: Anzahl der Attention-Heads.
+    :param seed: Startwert für die Initialisierung der Gewichte.
+    :return: Das Verzeichnis.
+    """
+    import torch
+    from transformers import BertConfig, BertModel, BertTokenizer
+
+    tokens = list(SPECIAL_TOKENS)
+    seen = set(tokens)
+    characters = sorted(set(string.ascii_letters + string.digits + string.punctuation + "äöüÄÖÜß"))
+    for token in vocabulary() + [word.lower() for word in vocabulary()] + characters + [f"##{c}" for c in characters]:
+        if token not in seen:
+            seen.add(token)
+            tokens.append(token)
+
+    os.makedirs(directory, exist_ok=True)
+    vocabPath = os.path.join(directory, "vocab.txt")
+    with open(vocabPath, "w", encoding="utf-8") as file:
+        file.write("\n".join(tokens) + "\n")
+
+    torch.manual_seed(seed)
+    config = BertConfig(vocab_size=len(tokens), hidden_size=hiddenSize, num_hidden_layers=layers,
+                        num_attention_heads=heads, intermediate_size=hiddenSize * 4, max_position_embeddings=512)
+    BertModel(config).eval().save_pretrained(directory)
+    BertTokenizer(vocabPath, do_lower_case=False).save_pretrained(directory)
+    return directory
+
+
+def registerStandInModels(directory: str = None, backend: str = None) -> str:
+    """
+    Legt das Ersatzmodell in der ModelRegistry unter den Schlüsseln der Standardmodelle ab (BERT_MODEL_NAME mit dem
+    gewählten Inferenz-Backend sowie KEYBERT_MODEL_NAME), sodass kein Modell heruntergeladen wird.
+
+    :param directory: Verzeichnis für das Ersatzmodell (default: ein temporäres Verzeichnis).
+    :param backend: Inferenz-Backend ('torch', 'int8' oder 'onnx', default: INFERENCE_BACKEND).
+    :return: Das Verzeichnis des Ersatzmodells.
+    """
+    from transformers import BertModel, BertTokenizer
+    from sentence_transformers import SentenceTransformer, models
+    from keybert import KeyBERT
+
+    from models.inferenceBackend import INFERENCE_BACKEND, OnnxBertModel, exportOnnx, quantizeDynamic
+    from models.modelRegistry import registry, bertModelId, BERT_MODEL_NAME, KEYBERT_MODEL_NAME
+
+    directory = directory or tempfile.mkdtemp(prefix="baula-stand-in-")
+    if not os.path.exists(os.path.join(directory, "config.json")):
+        writeStandInBert(directory)
+
+    backend = backend or INFERENCE_BACKEND
+    tokenizer = BertTokenizer.from_pretrained(directory)
+    model = BertModel.from_pretrained(directory).eval()
+    if backend == 'int8':
+        model = quantizeDynamic(model)
+    elif backend == 'onnx':
+        model = OnnxBertModel(exportOnnx(model, tokenizer, os.path.join(directory, "model.onnx")), model.config)
+    registry.register(f"bert:{bertModelId(BERT_MODEL_NAME, backend)}", (tokenizer, model))
+
+    transformer = models.Transformer(directory)
+    pooling = models.Pooling(transformer.get_word_embedding_dimension(), pooling_mode='mean')
+    registry.register(f"keybert:{KEYBERT_MODEL_NAME}",
+                      KeyBERT(model=SentenceTransformer(modules=[transformer, pooling], device='cpu')))
+    return directory
@@ -0,0 +1,210 @@
+import json
+import os
+import random
+
+import numpy as np
+
+HEADINGS_FILE = os.path.join(os.path.dirname(__file__), '..', 'staticdata', 'section-headings.json')
+
+# Fachvokabular, aus dem Modulhandbücher und Stellenanzeigen zusammengesetzt werden
+SUBJECTS = [
+    "Datenbanken", "Softwaretechnik", "Rechnernetze", "Betriebssysteme", "Wirtschaftsinformatik",
+    "Maschinelles Lernen", "Data Science", "IT-Sicherheit", "Cloud Computing", "Projektmanagement",
+    "Geschäftsprozessmanagement", "Informationsmanagement", "Verteilte Systeme", "Webentwicklung",
+    "Algorithmen", "Statistik", "Controlling", "Logistik", "Unternehmensführung", "Mensch-Computer-Interaktion",
+]
+TOPICS = [
+    "SQL", "Datenmodellierung", "Normalformen", "Transaktionen", "Anforderungsanalyse", "UML", "Testautomatisierung",
+    "Continuous Integration", "TCP/IP", "Routing", "Virtualisierung", "Containerisierung", "Kubernetes", "Docker",
+    "Python", "Java", "JavaScript", "TypeScript", "React", "REST-Schnittstellen", "Microservices", "Kryptographie",
+    "Penetrationstests", "Netzwerksicherheit", "neuronale Netze", "Regression", "Klassifikation", "Clustering",
+    "Datenvisualisierung", "ETL-Prozesse", "Data Warehouse", "ERP-Systeme", "SAP", "Prozessmodellierung", "BPMN",
+    "Scrum", "Kanban", "agile Methoden", "Kostenrechnung", "Kennzahlensysteme", "Supply Chain Management",
+    "Usability", "Prototyping", "Linux", "Shell-Skripte", "Compilerbau", "Graphalgorithmen", "Komplexitätstheorie",
+]
+VERBS = [
+    "kennen", "verstehen", "analysieren", "bewerten", "entwerfen", "implementieren", "modellieren", "testen",
+    "dokumentieren", "optimieren", "anwenden", "vergleichen", "präsentieren", "planen", "betreiben",
+]
+PHRASES = [
+    "Die Studierenden {verb} grundlegende Konzepte der {topic}.",
+    "Im Modul werden {topic} und {topic2} behandelt.",
+    "Die Teilnehmenden lernen, {topic} in praktischen Projekten zu {verb}.",
+    "Ein Schwerpunkt liegt auf {topic} im Kontext von {subject}.",
+    "Anhand von Fallstudien werden Methoden der {topic} vermittelt.",
+    "Nach Abschluss des Moduls können die Studierenden {topic} selbstständig {verb}.",
+    "Übungen vertiefen den Umgang mit {topic} und {topic2}.",
+]
+JOB_TITLES = [
+    "Softwareentwickler", "Data Scientist", "IT-Administrator", "Systemadministrator", "Datenbankentwickler",
+    "Cloud Engineer", "IT-Sicherheitsberater", "Projektmanager IT", "SAP-Berater", "Frontend-Entwickler",
+    "Backend-Entwickler", "Business Analyst", "DevOps Engineer", "Wirtschaftsinformatiker",
+]
+JOB_TASKS = [
+    "Du {verb} {topic} in unseren Kundenprojekten.",
+    "Sie sind verantwortlich für {topic} und {topic2}.",
+    "Mitarbeit bei der Einführung von {topic}.",
+    "Weiterentwicklung unserer Plattform mit {topic}.",
+    "Abgeschlossenes Studium der {subject} oder eine vergleichbare Qualifikation.",
+    "Sehr gute Kenntnisse in {topic} sowie Erfahrung mit {topic2}.",
+    "Idealerweise erste Erfahrungen im Bereich {subject}.",
+]
+JOB_BENEFITS = [
+    "Flexible Arbeitszeiten und die Möglichkeit zum mobilen Arbeiten.",
+    "30 Tage Urlaub und eine betriebliche Altersvorsorge.",
+    "Ein modernes Büro in zentraler Lage mit guter Anbindung.",
+    "Regelmäßige Weiterbildungen und ein kollegiales Team.",
+    "Eine unbefristete Festanstellung in einem wachsenden Unternehmen.",
+]
+CHAIRS = ["Wirtschaftsinformatik", "Informatik", "Betriebswirtschaftslehre", "Data Science", "Softwaretechnik"]
+MODULE_TYPES = ["Pflichtmodul", "Wahlpflichtmodul", "Wahlmodul"]
+TERMS = ["Wintersemester", "Sommersemester", "jedes Semester"]
+
+
+def loadHeadings(path: str = HEADINGS_FILE) -> tuple[list[str], list[str]]:
+    """
+    :param path: JSON-Datei mit den Abschnittsüberschriften (staticdata/section-headings.json).
+    :return: Tuple aus den wichtigen und den weniger wichtigen Überschriften.
+    """
+    with open(path, encoding='utf-8') as file:
+        headings = json.load(file)
+    return headings.get('important', []), headings.get('unimportant', [])
+
+
+def _sentence(rng: random.Random, templates: list[str]) -> str:
+    topic, topic2 = rng.sample(TOPICS, 2)
+    return rng.choice(templates).format(topic=topic, topic2=topic2, verb=rng.choice(VERBS),
+                                        subject=rng.choice(SUBJECTS))
+
+
+def _paragraph(rng: random.Random, templates: list[str], sentences: int) -> str:
+    return " ".join(_sentence(rng, templates) for _ in range(sentences))
+
+
+def generateModules(count: int, seed: int = 0, sentences: int = 8) -> list[dict]:
+    """
+    Erzeugt Module in der Form des Module-Modells des Backends (mId, version, acronym, name, content, skills, ...).
+
+    :param count: Anzahl der Module.
+    :param seed: Startwert des Zufallsgenerators; derselbe Startwert liefert dieselben Module.
+    :param sentences: Anzahl der Sätze im Inhalt eines Moduls.
+    :return: Liste von Modul-Dictionarys.
+    """
+    rng = random.Random(seed)
+    modules = []
+    for i in range(count):
+        subject = rng.choice(SUBJECTS)
+        modules.append({
+            "mId": i + 1,
+            "version": 1,
+            "acronym": f"BM-{i + 1:05d}",
+            "mgId": i // 10 + 1,
+            "name": f"{subject}: {rng.choice(TOPICS)}",
+            "content": _paragraph(rng, PHRASES, sentences),
+            "skills": _paragraph(rng, PHRASES, max(1, sentences // 3)),
+            "addInfo": "",
+            "priorKnowledge": f"Grundlagen der {rng.choice(SUBJECTS)}",
+            "ects": rng.choice([5, 6, 10]),
+            "type": rng.choice(MODULE_TYPES),
+            "term": rng.choice(TERMS),
+            "recTerm": rng.randint(1, 6),
+            "duration": 1,
+            "chair": f"Lehrstuhl für {rng.choice(CHAIRS)}",
+        })
+    return modules
+
+
+def generateTopics(count: int, seed: int = 1) -> list[dict]:
+    """
+    Erzeugt Themen (z.B. Interessen von Studierenden) mit tId, name und description.
+
+    :param count: Anzahl der Themen.
+    :param seed: Startwert des Zufallsgenerators.
+    :return: Liste von Topic-Dictionarys.
+    """
+    rng = random.Random(seed)
+    return [{
+        "tId": f"T{i + 1:05d}",
+        "name": rng.choice(TOPICS),
+        "description": _paragraph(rng, PHRASES, 2),
+    } for i in range(count)]
+
+
+def generateJobPostings(count: int, seed: int = 2, sections: int = 5, linesPerSection: int = 6,
+                        headingsFile: str = HEADINGS_FILE) -> list[dict]:
+    """
+    Erzeugt lange Stellenanzeigen mit Abschnitten unter realistischen Überschriften aus staticdata/section-headings.json,
+    sodass die Abschnittsbewertung sowohl wichtige als auch weniger wichtige Abschnitte findet.
+
+    :param count: Anzahl der Stellenanzeigen.
+    :param seed: Startwert des Zufallsgenerators.
+    :param sections: Anzahl der Abschnitte je Anzeige.
+    :param linesPerSection: Anzahl der Zeilen (Aufzählungspunkte) je Abschnitt.
+    :param headingsFile: JSON-Datei mit den Überschriften.
+    :return: Liste von Dictionaries mit title und description.
+    """
+    rng = random.Random(seed)
+    important, unimportant = loadHeadings(headingsFile)
+    postings = []
+    for _ in range(count):
+        lines = [f"Wir suchen zum nächstmöglichen Zeitpunkt Verstärkung im Bereich {rng.choice(SUBJECTS)}."]
+        for section in range(sections):
+            # Abwechselnd Aufgaben/Anforderungen und Angebote, wie in echten Anzeigen
+            if section % 2 == 0 or not unimportant:
+                lines.append(rng.choice(important))
+                lines.extend(f"- {_sentence(rng, JOB_TASKS)}" for _ in range(linesPerSection))
+            else:
+                lines.append(rng.choice(unimportant))
+                lines.extend(f"- {rng.choice(JOB_BENEFITS)}" for _ in range(linesPerSection))
+        postings.append({"title": f"{rng.choice(JOB_TITLES)} (m/w/d)", "description": "\n".join(lines)})
+    return postings
+
+
+def generateVectors(count: int, dimension: int = 768, seed: int = 3, clusters: int = 16) -> np.ndarray:
+    """
+    Erzeugt normalisierte Vektoren, die wie Embeddings um einige Schwerpunkte gruppiert sind
+    (bei gleichverteilten Zufallsvektoren wären alle Ähnlichkeiten nahe 0).
+
+    :param count: Anzahl der Vektoren.
+    :param dimension: Dimension der Vektoren (768 wie bert-base-german-cased).
+    :param seed: Startwert des Zufallsgenerators.
+    :param clusters: Anzahl der Schwerpunkte.
+    :return: Matrix der Form (count, dimension) mit dtype float32.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, count)] + 0.5 * rng.standard_normal((count, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def generateDataset(modules: int = 200, topics: int = 20, jobs: int = 10, dimension: int = 768, seed: int = 0) -> dict:
+    """
+    Erzeugt einen vollständigen, reproduzierbaren Datensatz für die Benchmarks.
+
+    :param modules: Anzahl der Module.
+    :param topics: Anzahl der Themen.
+    :param jobs: Anzahl der Stellenanzeigen.
+    :param dimension: Dimension der vorab berechneten Vektoren.
+    :param seed: Startwert, aus dem die Startwerte der einzelnen Generatoren abgeleitet werden.
+    :return: Dictionary mit modules, topics, jobs, moduleVectors und topicVectors.
+    """
+    return {
+        "modules": generateModules(modules, seed=seed),
+        "topics": generateTopics(topics, seed=seed + 1),
+        "jobs": generateJobPostings(jobs, seed=seed + 2),
+        "moduleVectors": generateVectors(modules, dimension, seed=seed + 3),
+        "topicVectors": generateVectors(topics, dimension, seed=seed + 4),
+    }
+
+
+def vocabulary() -> list[str]:
+    """
+    :return: Alle Wörter, aus denen die synthetischen Texte bestehen (z.B. für das Vokabular des Ersatzmodells).
+    """
+    texts = SUBJECTS + TOPICS + VERBS + PHRASES + JOB_TITLES + JOB_TASKS + JOB_BENEFITS + CHAIRS + MODULE_TYPES + TERMS
+    important, unimportant = loadHeadings()
+    words = set()
+    for text in texts + important + unimportant:
+        for word in text.replace('{', ' ').replace('}', ' ').split():
+            words.add(word.strip('.,:;()!?-'))
+    return sorted(word for word in words if word)
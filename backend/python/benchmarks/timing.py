@@ -0,0 +1,64 @@
+import resource
+import sys
+import time
+
+import numpy as np
+
+
+def peakRssMb() -> float:
+    """
+    :return: Höchster Speicherverbrauch (Resident Set Size) des Prozesses seit dem Start in MB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux liefert Kilobyte, macOS Byte
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def summarize(seconds: list[float], items: int = 1, wallSeconds: float = None) -> dict:
+    """
+    Fasst gemessene Laufzeiten zusammen.
+
+    :param seconds: Laufzeit je Aufruf in Sekunden.
+    :param items: Anzahl der Elemente (z.B. Texte) je Aufruf, für den Durchsatz.
+    :param wallSeconds: Gesamtdauer bei parallelen Aufrufen; default: Summe der Laufzeiten.
+    :return: Dictionary mit Anzahl, Mittelwert, p50/p95/p99 und Maximum in Millisekunden sowie dem Durchsatz
+             (Elemente je Sekunde) und dem bisherigen Spitzenwert des Speicherverbrauchs.
+    """
+    samples = np.asarray(seconds, dtype=np.float64) * 1000
+    wallSeconds = wallSeconds if wallSeconds is not None else float(np.sum(seconds))
+    return {
+        "count": len(samples),
+        "meanMs": round(float(samples.mean()), 3),
+        "p50Ms": round(float(np.percentile(samples, 50)), 3),
+        "p95Ms": round(float(np.percentile(samples, 95)), 3),
+        "p99Ms": round(float(np.percentile(samples, 99)), 3),
+        "maxMs": round(float(samples.max()), 3),
+        "throughput": round(len(samples) * items / wallSeconds, 2) if wallSeconds > 0 else None,
+        "peakRssMb": peakRssMb(),
+    }
+
+
+def measure(fn, repeat: int = 10, warmup: int = 1, items: int = 1, setup=None) -> dict:
+    """
+    Misst die Laufzeit einer Funktion ohne Argumente.
+
+    :param fn: Die zu messende Funktion.
+    :param repeat: Anzahl der gemessenen Aufrufe.
+    :param warmup: Anzahl der Aufrufe vor der Messung (z.B. für Caches und Thread-Pools).
+    :param items: Anzahl der Elemente je Aufruf, für den Durchsatz.
+    :param setup: Optionale Funktion, die vor jedem Aufruf außerhalb der Messung ausgeführt wird
+                  (z.B. um einen Cache zu leeren).
+    :return: Zusammenfassung, siehe summarize.
+    """
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        fn()
+    seconds = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        seconds.append(time.perf_counter() - start)
+    return summarize(seconds, items)
@@ -1,13 +1,18 @@
 import uvicorn
 
+from utils.preforkServer import PreforkServer, API_WORKERS
+
 apiPort = 8000
 apiIpAddress = "0.0.0.0"
 
 if __name__ == "__main__":
     """
-    Startet den Uvicorn-Server für die FastAPI-Anwendung.
+    Startet den Server für die FastAPI-Anwendung.
+
+    Ist API_WORKERS größer 0, läuft der Produktionsmodus (utils/preforkServer.py): der Socket wird gebunden und
+    die Modelle werden einmal geladen, danach werden API_WORKERS Worker-Prozesse gestartet, die die Gewichte teilen.
 
-    Der Uvicorn-Server wird mit den folgenden Optionen gestartet:
+    Andernfalls wird der Uvicorn-Server im Entwicklungsmodus mit den folgenden Optionen gestartet:
     - 'host': auf 0.0.0.0 gesetzt, um Verbindungen von allen IP-Adressen zuzulassen.
     - 'port': auf 8000 gesetzt, um den Server auf Port 8000 zu starten.
     - 'reload': auf True gesetzt, um den Server automatisch neu zu laden, wenn Änderungen am Code vorgenommen werden.
@@ -15,4 +20,7 @@ if __name__ == "__main__":
 
     :return: None
     """
-    uvicorn.run("api.api:app", host=apiIpAddress, port=apiPort, reload=True, timeout_keep_alive=11)
\ No newline at end of file
+    if API_WORKERS > 0:
+        PreforkServer("api.api:app", apiIpAddress, apiPort, workers=API_WORKERS, timeoutKeepAlive=11).run()
+    else:
+        uvicorn.run("api.api:app", host=apiIpAddress, port=apiPort, reload=True, timeout_keep_alive=11)
\ No newline at end of file
@@ -0,0 +1,164 @@
+import os
+import threading
+
+import numpy as np
+import torch
+
+from models.modelRegistry import registry, bertModelId, BERT_MODEL_NAME
+from models.microBatcher import MicroBatcher, MICRO_BATCH_ENABLED
+from utils.embeddingCache import embeddingCache, EmbeddingCache
+from utils.metrics import BATCH_SIZE, stage
+from utils.profiling import currentSession
+
+# Anzahl der Texte, die gemeinsam in einem Forward-Pass verarbeitet werden
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "16"))
+EMBEDDING_MAX_LENGTH = 512
+
+_batchers = {}
+_batchersLock = threading.Lock()
+
+
+def poolOutputs(outputs, attentionMask: torch.Tensor, pooling: str) -> torch.Tensor:
+    """
+    Verdichtet die Ausgabe eines BERT-Modells zu einem Vektor je Text.
+
+    :param outputs: Die Ausgabe des Modells (mit 'last_hidden_state' und 'pooler_output').
+    :param attentionMask: Die Attention-Maske des Batches, um Padding-Tokens beim Mitteln auszuschließen.
+    :param pooling: 'pooler' für den Pooler-Output des CLS-Tokens, 'mean' für den Mittelwert aller Token-Vektoren.
+    :return: Ein Tensor der Form (Batchgröße, Hidden Size).
+    """
+    if pooling == 'pooler':
+        return outputs.pooler_output
+    elif pooling == 'mean':
+        mask = attentionMask.unsqueeze(-1).to(outputs.last_hidden_state.dtype)
+        summed = (outputs.last_hidden_state * mask).sum(dim=1)
+        return summed / mask.sum(dim=1).clamp(min=1.0)
+    else:
+        raise ValueError(f"Unknown pooling mode: {pooling}")
+
+
+def encodeTexts(texts: list[str], model, tokenizer, pooling: str = 'pooler', batchSize: int = None,
+                maxLength: int = EMBEDDING_MAX_LENGTH) -> np.ndarray:
+    """
+    Berechnet die Embeddings für eine Liste von Texten in Batches.
+
+    Die Texte werden nach ihrer Tokenlänge sortiert, damit jeder Batch nur bis zur Länge seines längsten Textes
+    aufgefüllt werden muss. Die Berechnung läuft im Inference-Modus, es werden also keine Autograd-Graphen aufgebaut.
+
+    :param texts: Die Texte, für die Embeddings berechnet werden sollen.
+    :param model: Das BERT-Modell, das zur Berechnung der Embeddings verwendet wird.
+    :param tokenizer: Der zum Modell passende Tokenizer.
+    :param pooling: 'pooler' oder 'mean' (siehe poolOutputs).
+    :param batchSize: Anzahl der Texte pro Forward-Pass (default: EMBEDDING_BATCH_SIZE).
+    :param maxLength: Maximale Anzahl an Tokens pro Text, längere Texte werden abgeschnitten.
+    :return: Ein float32-Array der Form (Anzahl Texte, Hidden Size) in der Reihenfolge der Eingabe.
+    """
+    batchSize = batchSize or EMBEDDING_BATCH_SIZE
+    embeddings = np.empty((len(texts), model.config.hidden_size), dtype=np.float32)
+    if not texts:
+        return embeddings
+
+    with stage("tokenization"):
+        encoded = tokenizer(list(texts), truncation=True, max_length=maxLength, padding=False)
+    order = sorted(range(len(texts)), key=lambda index: len(encoded['input_ids'][index]))
+
+    with torch.inference_mode():
+        for start in range(0, len(order), batchSize):
+            batchIndices = order[start:start + batchSize]
+            with stage("tokenization"):
+                features = tokenizer.pad(
+                    {key: [values[index] for index in batchIndices] for key, values in encoded.items()},
+                    return_tensors='pt'
+                )
+            BATCH_SIZE.observe(len(batchIndices), model=getattr(model.config, 'name_or_path', '') or 'bert')
+            with stage("forward_pass"):
+                outputs = model(**features)
+                pooled = poolOutputs(outputs, features['attention_mask'], pooling)
+                embeddings[batchIndices] = pooled.float().cpu().numpy()
+
+    return embeddings
+
+
+def embedTexts(texts: list[str], pooling: str = 'pooler', modelName: str = BERT_MODEL_NAME,
+               cache: EmbeddingCache = embeddingCache) -> np.ndarray:
+    """
+    Berechnet die Embeddings für eine Liste von Texten mit dem gemeinsam genutzten Modell aus der Registry.
+    Bereits bekannte Texte werden aus dem Embedding-Cache geladen, nur neue Texte werden kodiert.
+
+    :param texts: Die (bereits vorverarbeiteten) Texte.
+    :param pooling: 'pooler' oder 'mean' (siehe poolOutputs).
+    :param modelName: Name des BERT-Modells.
+    :param cache: Der zu verwendende Cache oder None, um den Cache zu umgehen.
+    :return: Ein float32-Array der Form (Anzahl Texte, Hidden Size) in der Reihenfolge der Eingabe.
+    """
+    tokenizer, model = registry.getBert(modelName)
+    # Profilierte Anfragen kodieren im eigenen Thread, damit der Forward-Pass in ihrem Profil erscheint
+    useBatcher = MICRO_BATCH_ENABLED and currentSession.get() is None
+    if cache is None:
+        if useBatcher:
+            return getBatcher(modelName, pooling).encode(texts)
+        return encodeTexts(texts, model, tokenizer, pooling=pooling)
+
+    embeddings = np.empty((len(texts), model.config.hidden_size), dtype=np.float32)
+    # Das Backend gehört zum Schlüssel, da z.B. int8-Embeddings leicht von fp32 abweichen
+    modelId = bertModelId(modelName)
+    keys = [cache.makeKey(modelId, pooling, text) for text in texts]
+
+    # Fehlende Texte (Duplikate nur einmal) sammeln
+    missing = {}
+    for index, key in enumerate(keys):
+        if key in missing:
+            missing[key].append(index)
+            continue
+        vector = cache.get(key)
+        if vector is None:
+            missing[key] = [index]
+        else:
+            embeddings[index] = vector
+
+    if missing:
+        missingTexts = [texts[indices[0]] for indices in missing.values()]
+        if useBatcher:
+            encoded = getBatcher(modelName, pooling).encode(missingTexts)
+        else:
+            encoded = encodeTexts(missingTexts, model, tokenizer, pooling=pooling)
+        for (key, indices), vector in zip(missing.items(), encoded):
+            cache.put(key, vector)
+            embeddings[indices] = vector
+
+    return embeddings
+
+
+def getBatcher(modelName: str, pooling: str) -> MicroBatcher:
+    """
+    Gibt den Micro-Batcher für ein Modell und einen Pooling-Modus zurück. Aufträge gleichzeitiger Anfragen
+    werden darüber zu einem gemeinsamen Aufruf von encodeTexts zusammengefasst.
+
+    :param modelName: Name des BERT-Modells.
+    :param pooling: 'pooler' oder 'mean' (siehe poolOutputs).
+    :return: Der Micro-Batcher.
+    """
+    key = (modelName, pooling)
+    with _batchersLock:
+        batcher = _batchers.get(key)
+        if batcher is None:
+            def encode(texts: list[str]) -> np.ndarray:
+                tokenizer, model = registry.getBert(modelName)
+                return encodeTexts(texts, model, tokenizer, pooling=pooling)
+
+            batcher = _batchers[key] = MicroBatcher(encode, name=f"{modelName}-{pooling}")
+        return batcher
+
+
+def batcherStats() -> list[dict]:
+    """
+    Gibt Kennzahlen aller Micro-Batcher zurück.
+
+    :return: Liste mit Name, Anzahl verarbeiteter Batches und Aufträge sowie aktueller Warteschlangenlänge.
+    """
+    with _batchersLock:
+        batchers = list(_batchers.values())
+    return [
+        {"name": batcher.name, "batches": batcher.batches, "jobs": batcher.jobs, "queueDepth": batcher.queueDepth()}
+        for batcher in batchers
+    ]
@@ -0,0 +1,303 @@
+import copy
+import threading
+import time
+
+import numpy as np
+
+from models.vectorIndex import createVectorIndex, VECTOR_INDEX_TYPE
+from utils.similarityMatrix import normalizeRows
+
+
+class IndexVersionError(Exception):
+    """
+    Wird ausgelöst, wenn ein Index in einer anderen Version angefragt wird, als auf dem Server vorliegt.
+    """
+
+
+class EmbeddingIndex:
+    def __init__(self, name: str, version: str, dimension: int, indexType: str = None):
+        """
+        Initialisiert einen benannten, versionierten Index, der normalisierte Embeddings zusammenhängend
+        als float32-Matrix im Speicher hält.
+
+        :param name: Name des Index (z.B. Modulhandbuch und Semester).
+        :param version: Vom Aufrufer vergebene Version des Index.
+        :param dimension: Dimension der Vektoren.
+        :param indexType: Art des Suchindex ('exact' oder 'ivf', default: VECTOR_INDEX_TYPE).
+        :return: None
+        """
+        self.name = name
+        self.indexType = indexType or VECTOR_INDEX_TYPE
+        self.version = version
+        self.dimension = dimension
+        self.revision = 0
+        self.updatedAt = time.time()
+        self.ids = []
+        self._rowOf = {}
+        self._vectors = np.empty((0, dimension), dtype=np.float32)
+        self._searchIndex = None
+        self._lock = threading.RLock()
+
+    def load(self, ids: list[str], vectors, version: str) -> None:
+        """
+        Ersetzt den gesamten Inhalt des Index.
+
+        :param ids: Schlüssel der Vektoren (z.B. Modulkürzel).
+        :param vectors: Matrix der Form (Anzahl Schlüssel, Dimension).
+        :param version: Neue Version des Index.
+        :return: None
+        """
+        vectors = self._prepare(ids, vectors)
+        with self._lock:
+            self.ids = []
+            self._rowOf = {}
+            self._vectors = np.empty((0, vectors.shape[1]), dtype=np.float32)
+            self._searchIndex = None
+            self._upsert(ids, vectors)
+            self._touch(version)
+
+    def upsert(self, ids: list[str], vectors, version: str = None) -> None:
+        """
+        Fügt Vektoren hinzu oder ersetzt vorhandene Vektoren mit gleichem Schlüssel.
+
+        :param ids: Schlüssel der Vektoren.
+        :param vectors: Matrix der Form (Anzahl Schlüssel, Dimension).
+        :param version: Neue Version des Index oder None, um die Version beizubehalten.
+        :return: None
+        """
+        self.apply(ids, vectors, [], version)
+
+    def delete(self, ids: list[str], version: str = None) -> int:
+        """
+        Entfernt Vektoren aus dem Index. Die Reihenfolge der übrigen Vektoren bleibt erhalten.
+
+        :param ids: Schlüssel der zu entfernenden Vektoren.
+        :param version: Neue Version des Index oder None, um die Version beizubehalten.
+        :return: Anzahl der tatsächlich entfernten Vektoren.
+        """
+        return self.apply([], None, ids, version)
+
+    def apply(self, upsertIds: list[str], vectors, deleteIds: list[str], version: str = None) -> int:
+        """
+        Fügt Vektoren hinzu bzw. ersetzt sie und entfernt danach Vektoren in einem Schritt: Abfragen sehen
+        entweder den alten oder den vollständig geänderten Index, und die Revision steigt nur einmal.
+        Sind beide Listen leer, bleibt der Index einschließlich Version und Revision unverändert.
+
+        :param upsertIds: Schlüssel der hinzuzufügenden bzw. zu ersetzenden Vektoren.
+        :param vectors: Matrix der Form (Anzahl upsertIds, Dimension).
+        :param deleteIds: Schlüssel der zu entfernenden Vektoren (gewinnen gegenüber upsertIds).
+        :param version: Neue Version des Index oder None, um die Version beizubehalten.
+        :return: Anzahl der tatsächlich entfernten Vektoren.
+        """
+        if not upsertIds and not deleteIds:
+            return 0
+        vectors = self._prepare(upsertIds, vectors)
+        with self._lock:
+            if upsertIds:
+                self._upsert(upsertIds, vectors)
+            removed = self._delete(deleteIds)
+            self._touch(version)
+        return removed
+
+    def snapshot(self) -> tuple[list[str], np.ndarray]:
+        """
+        Gibt die aktuellen Schlüssel und die zugehörige normalisierte Matrix zurück.
+
+        :return: Tuple aus Schlüsseln und einer Matrix der Form (Anzahl Schlüssel, Dimension).
+        """
+        with self._lock:
+            return list(self.ids), self._vectors
+
+    def search(self, queries, k: int) -> tuple[list[str], np.ndarray, np.ndarray]:
+        """
+        Sucht für jede Anfrage die k ähnlichsten Vektoren über den Suchindex (siehe models/vectorIndex.py).
+        Der Suchindex wird bei der ersten Suche aufgebaut und bei reinen Einfügungen inkrementell erweitert.
+
+        :param queries: Matrix der Form (Anzahl Anfragen, Dimension).
+        :param k: Anzahl der gesuchten Treffer je Anfrage.
+        :return: Tuple aus den Schlüsseln des Suchindex sowie Zeilenindizes und Ähnlichkeiten (siehe VectorIndex.search).
+        """
+        with self._lock:
+            if self._searchIndex is None:
+                self._searchIndex = createVectorIndex(self.indexType).build(self.ids, self._vectors)
+            searchIndex = self._searchIndex
+        indices, scores = searchIndex.search(queries, k)
+        return searchIndex.ids, indices, scores
+
+    def vectors(self, ids: list[str]) -> np.ndarray:
+        """
+        Gibt die normalisierten Vektoren zu den angegebenen Schlüsseln zurück.
+
+        :param ids: Die gesuchten Schlüssel.
+        :return: Matrix der Form (Anzahl Schlüssel, Dimension).
+        :raises KeyError: Wenn ein Schlüssel nicht im Index enthalten ist.
+        """
+        with self._lock:
+            missing = [key for key in ids if key not in self._rowOf]
+            if missing:
+                raise KeyError(f"Unknown ids in index '{self.name}': {missing}")
+            return self._vectors[[self._rowOf[key] for key in ids]]
+
+    def info(self) -> dict:
+        """
+        Gibt Metadaten des Index zurück.
+
+        :return: Dictionary mit Name, Version, Revision, Größe und Speicherbedarf.
+        """
+        with self._lock:
+            return {
+                "name": self.name,
+                "version": self.version,
+                "revision": self.revision,
+                "size": len(self.ids),
+                "dimension": self.dimension,
+                "bytes": self._vectors.nbytes,
+                "indexType": self.indexType,
+                "updatedAt": self.updatedAt,
+            }
+
+    def _prepare(self, ids: list[str], vectors) -> np.ndarray:
+        if not ids:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        vectors = normalizeRows(np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1))
+        if not self.dimension:
+            self.dimension = vectors.shape[1]
+            self._vectors = self._vectors.reshape(0, self.dimension)
+        if vectors.shape[1] != self.dimension:
+            raise ValueError(f"Dimension mismatch: {vectors.shape[1]} vs {self.dimension}")
+        return vectors
+
+    def _upsert(self, ids: list[str], vectors: np.ndarray) -> None:
+        # Neue Matrix statt Änderung an Ort und Stelle, damit laufende Abfragen ihren Snapshot behalten
+        updated = self._vectors.copy()
+        newRows = []
+        newIds = []
+        replaced = False
+        for key, vector in zip(ids, vectors):
+            row = self._rowOf.get(key)
+            if row is None:
+                self._rowOf[key] = len(self.ids)
+                self.ids.append(key)
+                newIds.append(key)
+                newRows.append(vector)
+            elif row < len(updated):
+                updated[row] = vector
+                replaced = True
+            else:
+                newRows[row - len(updated)] = vector
+        if newRows:
+            updated = np.vstack([updated, np.stack(newRows)])
+        self._vectors = np.ascontiguousarray(updated)
+        self._updateSearchIndex(newIds, newRows, replaced)
+
+    def _delete(self, ids: list[str]) -> int:
+        rows = {self._rowOf[key] for key in ids if key in self._rowOf}
+        if rows:
+            keep = np.ones(len(self.ids), dtype=bool)
+            keep[list(rows)] = False
+            # Neue Matrix statt Änderung an Ort und Stelle, damit laufende Abfragen ihren Snapshot behalten
+            self._vectors = np.ascontiguousarray(self._vectors[keep])
+            self.ids = [key for key, kept in zip(self.ids, keep) if kept]
+            self._rowOf = {key: row for row, key in enumerate(self.ids)}
+            self._searchIndex = None
+        return len(rows)
+
+    def _updateSearchIndex(self, newIds: list[str], newRows: list[np.ndarray], replaced: bool) -> None:
+        if self._searchIndex is None:
+            return
+        if replaced:
+            # Geänderte Vektoren erfordern einen Neuaufbau bei der nächsten Suche
+            self._searchIndex = None
+        elif newIds:
+            # Kopie erweitern, damit laufende Suchen den bisherigen Suchindex unverändert weiterverwenden
+            searchIndex = copy.copy(self._searchIndex)
+            searchIndex.add(newIds, np.stack(newRows))
+            self._searchIndex = searchIndex
+
+    def _touch(self, version: str) -> None:
+        if version is not None:
+            self.version = version
+        self.revision += 1
+        self.updatedAt = time.time()
+
+
+class EmbeddingIndexStore:
+    def __init__(self):
+        """
+        Initialisiert die Ablage aller benannten Indizes eines Prozesses.
+
+        :return: None
+        """
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def load(self, name: str, version: str, ids: list[str], vectors, indexType: str = None) -> EmbeddingIndex:
+        """
+        Legt einen Index neu an bzw. ersetzt dessen Inhalt vollständig.
+
+        :param name: Name des Index.
+        :param version: Version des Index.
+        :param ids: Schlüssel der Vektoren.
+        :param vectors: Matrix der Form (Anzahl Schlüssel, Dimension).
+        :param indexType: Art des Suchindex ('exact' oder 'ivf', default: VECTOR_INDEX_TYPE).
+        :return: Der geladene Index.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        dimension = vectors.shape[1] if vectors.ndim == 2 else 0
+        index = EmbeddingIndex(name, version, dimension, indexType)
+        index.load(ids, vectors, version)
+        with self._lock:
+            self._indexes[name] = index
+        return index
+
+    def add(self, index: EmbeddingIndex) -> EmbeddingIndex:
+        """
+        Legt einen bereits aufgebauten Index (z.B. aus einem Embedding-Store) unter seinem Namen ab.
+
+        :param index: Der Index.
+        :return: Der Index.
+        """
+        with self._lock:
+            self._indexes[index.name] = index
+        return index
+
+    def get(self, name: str, version: str = None) -> EmbeddingIndex:
+        """
+        Gibt einen Index zurück.
+
+        :param name: Name des Index.
+        :param version: Erwartete Version oder None, um jede Version zu akzeptieren.
+        :return: Der Index.
+        :raises KeyError: Wenn kein Index mit diesem Namen existiert.
+        :raises IndexVersionError: Wenn die Version nicht übereinstimmt.
+        """
+        with self._lock:
+            index = self._indexes.get(name)
+        if index is None:
+            raise KeyError(f"Unknown index: {name}")
+        if version is not None and index.version != version:
+            raise IndexVersionError(f"Index '{name}' has version {index.version}, requested {version}")
+        return index
+
+    def remove(self, name: str) -> bool:
+        """
+        Entfernt einen Index.
+
+        :param name: Name des Index.
+        :return: True, wenn ein Index entfernt wurde.
+        """
+        with self._lock:
+            return self._indexes.pop(name, None) is not None
+
+    def list(self) -> list[dict]:
+        """
+        Gibt die Metadaten aller Indizes zurück.
+
+        :return: Liste von Dictionaries (siehe EmbeddingIndex.info).
+        """
+        with self._lock:
+            indexes = list(self._indexes.values())
+        return [index.info() for index in indexes]
+
+
+indexStore = EmbeddingIndexStore()
@@ -0,0 +1,294 @@
+import argparse
+import glob
+import json
+import os
+import struct
+
+import numpy as np
+
+from models.embeddingIndex import EmbeddingIndex, EmbeddingIndexStore, indexStore
+from utils.similarityMatrix import normalizeRows, topKIndices
+
+# Verzeichnis, dessen Embedding-Stores (*.baemb) beim Start als Indizes geladen werden (leer = keine)
+EMBEDDING_STORE_DIR = os.getenv("EMBEDDING_STORE_DIR", "")
+
+STORE_MAGIC = b"BAULAEMB"
+STORE_FORMAT_VERSION = 1
+STORE_SUFFIX = ".baemb"
+STORE_DTYPES = {"float16": np.dtype('<f2'), "int8": np.dtype('i1')}
+# Ausrichtung der Datenblöcke in Bytes
+STORE_ALIGNMENT = 64
+# Anzahl der Zeilen, die bei einer Suche gemeinsam in float32 umgewandelt werden
+STORE_CHUNK_ROWS = 8192
+
+
+def _align(offset: int) -> int:
+    return (offset + STORE_ALIGNMENT - 1) // STORE_ALIGNMENT * STORE_ALIGNMENT
+
+
+def writeEmbeddingStore(path: str, ids: list[str], vectors, version: str, dtype: str = 'float16') -> None:
+    """
+    Schreibt Embeddings normalisiert und quantisiert in eine Datei, die später per Memory-Mapping gelesen wird.
+
+    Aufbau: Magic, Länge und Inhalt eines JSON-Headers (Formatversion, Version, Datentyp, Dimension, Schlüssel),
+    danach ausgerichtet die Vektoren (Zeile je Schlüssel) und bei int8 ein float32-Skalierungsfaktor je Vektor.
+
+    :param path: Zieldatei.
+    :param ids: Schlüssel der Vektoren (z.B. Modulkürzel).
+    :param vectors: Matrix der Form (Anzahl Schlüssel, Dimension).
+    :param version: Version der Embeddings (z.B. Modell und Semester).
+    :param dtype: 'float16' oder 'int8'.
+    :return: None
+    """
+    if dtype not in STORE_DTYPES:
+        raise ValueError(f"Unsupported store dtype: {dtype}")
+    vectors = normalizeRows(np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1))
+    if len(set(ids)) != len(ids):
+        raise ValueError("Duplicate ids in embedding store")
+
+    scales = None
+    if dtype == 'int8':
+        scales = (np.abs(vectors).max(axis=1) / 127.0).astype(np.float32)
+        safeScales = np.where(scales > 0, scales, 1.0)
+        data = np.rint(vectors / safeScales[:, None]).clip(-127, 127).astype(STORE_DTYPES[dtype])
+    else:
+        data = vectors.astype(STORE_DTYPES[dtype])
+
+    header = {
+        "formatVersion": STORE_FORMAT_VERSION,
+        "version": version,
+        "dtype": dtype,
+        "dimension": int(vectors.shape[1]),
+        "count": len(ids),
+        "ids": list(ids),
+    }
+    headerBytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    dataOffset = _align(len(STORE_MAGIC) + 4 + len(headerBytes))
+    scalesOffset = _align(dataOffset + data.nbytes)
+
+    temporaryPath = f"{path}.{os.getpid()}.tmp"
+    with open(temporaryPath, 'wb') as file:
+        file.write(STORE_MAGIC)
+        file.write(struct.pack('<I', len(headerBytes)))
+        file.write(headerBytes)
+        file.seek(dataOffset)
+        file.write(data.tobytes())
+        if scales is not None:
+            file.seek(scalesOffset)
+            file.write(scales.astype('<f4').tobytes())
+    os.replace(temporaryPath, path)
+
+
+class EmbeddingStore:
+    def __init__(self, path: str):
+        """
+        Öffnet einen mit writeEmbeddingStore geschriebenen Store schreibgeschützt per Memory-Mapping.
+        Mehrere Prozesse teilen sich so eine Kopie im Page-Cache, die Vektoren werden erst bei Bedarf gelesen.
+
+        :param path: Die Datei.
+        :return: None
+        :raises ValueError: Wenn die Datei kein gültiger Embedding-Store ist.
+        """
+        self.path = path
+        with open(path, 'rb') as file:
+            if file.read(len(STORE_MAGIC)) != STORE_MAGIC:
+                raise ValueError(f"Not an embedding store: {path}")
+            try:
+                headerLength, = struct.unpack('<I', file.read(4))
+                header = json.loads(file.read(headerLength).decode('utf-8'))
+            except (struct.error, UnicodeDecodeError, json.JSONDecodeError) as e:
+                raise ValueError(f"Corrupt embedding store header in {path}: {e}")
+        if header.get("formatVersion") != STORE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported embedding store format: {header.get('formatVersion')}")
+
+        try:
+            self.version = header["version"]
+            self.dtype = header["dtype"]
+            self.dimension = header["dimension"]
+            self.ids = header["ids"]
+            itemSize = STORE_DTYPES[self.dtype].itemsize
+        except KeyError as e:
+            raise ValueError(f"Corrupt embedding store header in {path}: missing {e}")
+        self.rowOf = {key: row for row, key in enumerate(self.ids)}
+
+        count = len(self.ids)
+        dataOffset = _align(len(STORE_MAGIC) + 4 + headerLength)
+        dataEnd = dataOffset + count * self.dimension * itemSize
+        if self.dtype == 'int8':
+            dataEnd = _align(dataEnd) + count * 4
+        if count and os.path.getsize(path) < dataEnd:
+            raise ValueError(f"Truncated embedding store: {path} has {os.path.getsize(path)} of {dataEnd} bytes")
+        self._data = self._map(STORE_DTYPES[self.dtype], dataOffset, (count, self.dimension))
+        self._scales = None
+        if self.dtype == 'int8':
+            self._scales = self._map(np.dtype('<f4'), _align(dataOffset + count * self.dimension * itemSize), (count,))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def rows(self, rows) -> np.ndarray:
+        """
+        Liest Zeilen des Stores und wandelt sie in float32 um.
+
+        :param rows: Zeilenindizes oder ein slice.
+        :return: Normalisierte float32-Matrix.
+        """
+        vectors = np.asarray(self._data[rows], dtype=np.float32)
+        if self._scales is not None:
+            vectors *= np.asarray(self._scales[rows], dtype=np.float32)[:, None]
+        return vectors
+
+    def vectors(self, ids: list[str]) -> np.ndarray:
+        """
+        Gibt die normalisierten Vektoren zu den angegebenen Schlüsseln zurück.
+
+        :param ids: Die gesuchten Schlüssel.
+        :return: float32-Matrix der Form (Anzahl Schlüssel, Dimension).
+        :raises KeyError: Wenn ein Schlüssel nicht im Store enthalten ist.
+        """
+        missing = [key for key in ids if key not in self.rowOf]
+        if missing:
+            raise KeyError(f"Unknown ids in embedding store '{self.path}': {missing}")
+        return self.rows([self.rowOf[key] for key in ids])
+
+    def search(self, queries, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Sucht für jede Anfrage die k ähnlichsten Vektoren. Da die Vektoren normalisiert gespeichert sind,
+        ist die Kosinus-Ähnlichkeit ein Skalarprodukt; die Vektoren werden dafür blockweise in float32 umgewandelt.
+
+        :param queries: Matrix der Form (Anzahl Anfragen, Dimension).
+        :param k: Anzahl der gesuchten Treffer je Anfrage.
+        :return: Tuple aus Zeilenindizes und Ähnlichkeiten der Form (Anzahl Anfragen, min(k, Anzahl Vektoren)).
+        """
+        queries = normalizeRows(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        if queries.shape[1] != self.dimension:
+            raise ValueError(f"Dimension mismatch: {queries.shape[1]} vs {self.dimension}")
+        scores = np.empty((len(queries), len(self.ids)), dtype=np.float32)
+        for start in range(0, len(self.ids), STORE_CHUNK_ROWS):
+            stop = min(start + STORE_CHUNK_ROWS, len(self.ids))
+            chunk = np.asarray(self._data[start:stop], dtype=np.float32)
+            scores[:, start:stop] = queries @ chunk.T
+            if self._scales is not None:
+                scores[:, start:stop] *= self._scales[start:stop]
+        indices = topKIndices(scores, k)
+        return indices, np.take_along_axis(scores, indices, axis=1)
+
+    def nbytes(self) -> int:
+        """
+        :return: Größe der gemappten Vektoren (und Skalierungsfaktoren) in Bytes.
+        """
+        return self._data.nbytes + (self._scales.nbytes if self._scales is not None else 0)
+
+    def _map(self, dtype: np.dtype, offset: int, shape: tuple):
+        if not np.prod(shape):
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(self.path, dtype=dtype, mode='r', offset=offset, shape=shape)
+
+
+class MappedEmbeddingIndex(EmbeddingIndex):
+    def __init__(self, name: str, store: EmbeddingStore):
+        """
+        Schreibgeschützter Embedding-Index, dessen Vektoren aus einem gemappten Embedding-Store gelesen werden.
+
+        :param name: Name des Index.
+        :param store: Der geöffnete Store.
+        :return: None
+        """
+        super().__init__(name, store.version, store.dimension)
+        self.store = store
+        self.ids = store.ids
+        self._rowOf = store.rowOf
+        self.revision = 1
+
+    def load(self, ids: list[str], vectors, version: str) -> None:
+        raise ValueError(f"Index '{self.name}' is read-only (memory-mapped store)")
+
+    def upsert(self, ids: list[str], vectors, version: str = None) -> None:
+        raise ValueError(f"Index '{self.name}' is read-only (memory-mapped store)")
+
+    def delete(self, ids: list[str], version: str = None) -> int:
+        raise ValueError(f"Index '{self.name}' is read-only (memory-mapped store)")
+
+    def apply(self, upsertIds: list[str], vectors, deleteIds: list[str], version: str = None) -> int:
+        raise ValueError(f"Index '{self.name}' is read-only (memory-mapped store)")
+
+    def snapshot(self) -> tuple[list[str], np.ndarray]:
+        return list(self.ids), self.store.rows(slice(None))
+
+    def vectors(self, ids: list[str]) -> np.ndarray:
+        return self.store.vectors(ids)
+
+    def search(self, queries, k: int) -> tuple[list[str], np.ndarray, np.ndarray]:
+        indices, scores = self.store.search(queries, k)
+        return self.ids, indices, scores
+
+    def info(self) -> dict:
+        info = super().info()
+        info.update({"bytes": self.store.nbytes(), "indexType": "mapped", "dtype": self.store.dtype,
+                     "path": self.store.path})
+        return info
+
+
+def loadStoreDirectory(directory: str = EMBEDDING_STORE_DIR, store: EmbeddingIndexStore = indexStore) -> list[str]:
+    """
+    Lädt alle Embedding-Stores eines Verzeichnisses als schreibgeschützte Indizes, benannt nach dem Dateinamen.
+    Unlesbare oder beschädigte Dateien werden mit einer Meldung übersprungen.
+
+    :param directory: Das Verzeichnis (leer = keine).
+    :param store: Die Ablage, in die die Indizes eingetragen werden.
+    :return: Namen der geladenen Indizes.
+    """
+    if not directory:
+        return []
+    names = []
+    for path in sorted(glob.glob(os.path.join(directory, f"*{STORE_SUFFIX}"))):
+        name = os.path.basename(path)[:-len(STORE_SUFFIX)]
+        try:
+            index = MappedEmbeddingIndex(name, EmbeddingStore(path))
+        except (OSError, ValueError) as e:
+            # Eine beschädigte Datei soll den Start der API nicht verhindern
+            print(f"Skipping embedding store {path}: {e}")
+            continue
+        store.add(index)
+        names.append(name)
+    return names
+
+
+def readEmbeddingJson(path: str, idField: str = None) -> tuple[list[str], np.ndarray]:
+    """
+    Liest Embeddings aus den JSON-Dateien der Node-API: entweder ein Objekt {Kürzel: Vektor}
+    (module-embeddings.json) oder eine Liste von Objekten mit Schlüssel und 'vector' (topic-embeddings.json).
+
+    :param path: Die JSON-Datei.
+    :param idField: Feld mit dem Schlüssel bei einer Liste (default: 'acronym', 'tId', 'topic' oder 'identifier').
+    :return: Tuple aus Schlüsseln und Matrix der Vektoren.
+    """
+    with open(path, encoding='utf-8') as file:
+        data = json.load(file)
+    if isinstance(data, dict):
+        return list(data.keys()), np.asarray(list(data.values()), dtype=np.float32)
+
+    if idField is None:
+        candidates = [field for field in ('acronym', 'tId', 'topic', 'identifier') if data and field in data[0]]
+        if not candidates:
+            raise ValueError(f"Cannot determine the id field of {path}")
+        idField = candidates[0]
+    return [item[idField] for item in data], np.asarray([item['vector'] for item in data], dtype=np.float32)
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Konvertiert Embedding-JSON-Dateien in einen Embedding-Store.")
+    parser.add_argument("source", help="JSON-Datei (z.B. module-embeddings.json oder topic-embeddings.json)")
+    parser.add_argument("target", help=f"Zieldatei (*{STORE_SUFFIX})")
+    parser.add_argument("--version", required=True, help="Version der Embeddings")
+    parser.add_argument("--dtype", choices=sorted(STORE_DTYPES), default='float16')
+    parser.add_argument("--id-field", default=None, help="Feld mit dem Schlüssel bei einer Liste von Objekten")
+    args = parser.parse_args(argv)
+
+    ids, vectors = readEmbeddingJson(args.source, args.id_field)
+    writeEmbeddingStore(args.target, ids, vectors, args.version, args.dtype)
+    print(f"Wrote {len(ids)} vectors ({args.dtype}, dimension {vectors.shape[1]}) to {args.target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+# Backend für die BERT-Encoder: 'torch' (fp32), 'int8' (dynamische Quantisierung) oder 'onnx' (ONNX Runtime)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+# Verzeichnis, in dem die ONNX-Exporte der Modelle abgelegt werden
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "onnx-models")
+
+INFERENCE_BACKENDS = ('torch', 'int8', 'onnx')
+ACCURACY_FILE = os.path.join(os.path.dirname(__file__), '..', 'staticdata', 'backend-accuracy.json')
+
+
+def quantizeDynamic(model):
+    """
+    Quantisiert die Linear-Schichten eines Modells dynamisch auf int8. Gewichte werden einmalig quantisiert,
+    Aktivierungen zur Laufzeit; Aufrufschnittstelle und Ausgaben bleiben die eines BertModel.
+
+    :param model: Das fp32-Modell.
+    :return: Das quantisierte Modell im Evaluationsmodus.
+    """
+    import torch
+
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8).eval()
+
+
+def onnxModelPath(name: str) -> str:
+    """
+    :param name: Name des Modells bei Hugging Face.
+    :return: Pfad der ONNX-Datei des Modells.
+    """
+    return os.path.join(ONNX_MODEL_DIR, name.replace('/', '--'), 'model.onnx')
+
+
+def exportOnnx(model, tokenizer, path: str) -> str:
+    """
+    Exportiert ein BertModel einmalig nach ONNX (dynamische Batchgröße und Sequenzlänge).
+
+    :param model: Das fp32-Modell.
+    :param tokenizer: Der zugehörige Tokenizer (für die Beispiel-Eingabe).
+    :param path: Zieldatei.
+    :return: Der Pfad der exportierten Datei.
+    """
+    import torch
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    sample = tokenizer(["Beispieltext für den Export"], return_tensors='pt')
+    inputNames = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+    dynamicAxes = {name: {0: 'batch', 1: 'sequence'} for name in inputNames}
+    dynamicAxes.update({'last_hidden_state': {0: 'batch', 1: 'sequence'}, 'pooler_output': {0: 'batch'}})
+
+    temporaryPath = f"{path}.{os.getpid()}.tmp"
+    with torch.inference_mode():
+        torch.onnx.export(model, tuple(sample[name] for name in inputNames), temporaryPath,
+                          input_names=inputNames, output_names=['last_hidden_state', 'pooler_output'],
+                          dynamic_axes=dynamicAxes, opset_version=14)
+    os.replace(temporaryPath, path)
+    return path
+
+
+class OnnxBertModel:
+    def __init__(self, path: str, config):
+        """
+        Führt einen ONNX-Export eines BertModel mit ONNX Runtime aus und bietet dieselbe Aufrufschnittstelle
+        wie das torch-Modell (Aufruf mit den Tensoren des Tokenizers, Ausgabe mit last_hidden_state und pooler_output).
+
+        :param path: Pfad der ONNX-Datei.
+        :param config: Die Konfiguration des ursprünglichen Modells (z.B. für hidden_size).
+        :return: None
+        """
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError("INFERENCE_BACKEND=onnx requires the onnxruntime package") from e
+
+        import torch
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = torch.get_num_threads()
+        self.session = onnxruntime.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.inputNames = [entry.name for entry in self.session.get_inputs()]
+        self.config = config
+        self.path = path
+
+    def __call__(self, **features):
+        import torch
+
+        inputs = {name: features[name].cpu().numpy().astype(np.int64) for name in self.inputNames}
+        lastHiddenState, poolerOutput = self.session.run(['last_hidden_state', 'pooler_output'], inputs)
+        return SimpleNamespace(last_hidden_state=torch.from_numpy(lastHiddenState),
+                               pooler_output=torch.from_numpy(poolerOutput))
+
+    def eval(self):
+        return self
+
+
+def loadBert(name: str, backend: str = None):
+    """
+    Lädt Tokenizer und Modell eines BERT-Modells für das gewählte Inferenz-Backend.
+
+    :param name: Name des Modells bei Hugging Face.
+    :param backend: 'torch', 'int8' oder 'onnx' (default: INFERENCE_BACKEND).
+    :return: Tuple bestehend aus Tokenizer und Modell.
+    :raises ValueError: Wenn das Backend unbekannt ist.
+    """
+    from transformers import BertTokenizer, BertModel
+
+    backend = backend or INFERENCE_BACKEND
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+
+    tokenizer = BertTokenizer.from_pretrained(name)
+    model = BertModel.from_pretrained(name).eval()
+    if backend == 'int8':
+        model = quantizeDynamic(model)
+    elif backend == 'onnx':
+        path = onnxModelPath(name)
+        if not os.path.exists(path):
+            print(f"Exporting {name} to {path}")
+            exportOnnx(model, tokenizer, path)
+        model = OnnxBertModel(path, model.config)
+    return tokenizer, model
+
+
+def checkAccuracy(reference, candidate, pooling: str = 'mean', top_k: int = 5, path: str = ACCURACY_FILE) -> dict:
+    """
+    Vergleicht ein Inferenz-Backend mit der fp32-Referenz auf einem festen Satz deutscher Module und Anfragen
+    (staticdata/backend-accuracy.json): Kosinus-Ähnlichkeit der Embeddings, Abweichung der Scores und Top-k-Rankings.
+
+    :param reference: Tuple aus Tokenizer und Modell der Referenz (torch fp32).
+    :param candidate: Tuple aus Tokenizer und Modell des zu prüfenden Backends.
+    :param pooling: 'pooler' oder 'mean' (siehe models/bertEncoder.poolOutputs).
+    :param top_k: Anzahl der Module, deren Ranking verglichen wird.
+    :param path: Datei mit den Modulen und Anfragen.
+    :return: Dictionary mit den Kennzahlen des Vergleichs und den Laufzeiten beider Backends.
+    """
+    from models.bertEncoder import encodeTexts
+    from utils.similarityMatrix import cosineSimilarityMatrix, normalizeRows, topKIndices
+
+    with open(path, encoding='utf-8') as file:
+        data = json.load(file)
+    texts = data['queries'] + data['modules']
+    queryCount = len(data['queries'])
+
+    embeddings, seconds = {}, {}
+    for label, (tokenizer, model) in (('reference', reference), ('candidate', candidate)):
+        encodeTexts(texts[:1], model, tokenizer, pooling=pooling)
+        start = time.perf_counter()
+        embeddings[label] = encodeTexts(texts, model, tokenizer, pooling=pooling)
+        seconds[label] = time.perf_counter() - start
+
+    agreement = np.sum(normalizeRows(embeddings['reference']) * normalizeRows(embeddings['candidate']), axis=1)
+    scores = {label: cosineSimilarityMatrix(vectors[:queryCount], vectors[queryCount:])
+              for label, vectors in embeddings.items()}
+    ranks = {label: topKIndices(matrix, top_k) for label, matrix in scores.items()}
+    overlap = [len(set(expected).intersection(found)) / len(expected)
+               for expected, found in zip(ranks['reference'], ranks['candidate'])]
+
+    return {
+        "texts": len(texts),
+        "pooling": pooling,
+        "embeddingCosineMin": round(float(agreement.min()), 6),
+        "embeddingCosineMean": round(float(agreement.mean()), 6),
+        "scoreAbsDiffMax": round(float(np.abs(scores['reference'] - scores['candidate']).max()), 6),
+        "topK": top_k,
+        "topKRecall": round(float(np.mean(overlap)), 4),
+        "topKExactOrder": round(float(np.mean([(a == b).all() for a, b in zip(ranks['reference'], ranks['candidate'])])), 4),
+        "referenceSeconds": round(seconds['reference'], 4),
+        "candidateSeconds": round(seconds['candidate'], 4),
+        "speedup": round(seconds['reference'] / seconds['candidate'], 2) if seconds['candidate'] else None,
+    }
+
+
+def main(argv: list[str] = None) -> None:
+    from models.modelRegistry import BERT_MODEL_NAME
+
+    parser = argparse.ArgumentParser(description="Exportiert und prüft Inferenz-Backends der BERT-Encoder.")
+    parser.add_argument("command", choices=['export', 'check'])
+    parser.add_argument("--model", default=BERT_MODEL_NAME)
+    parser.add_argument("--backend", choices=INFERENCE_BACKENDS, default='int8')
+    parser.add_argument("--pooling", choices=['mean', 'pooler'], default='mean')
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        tokenizer, model = loadBert(args.model, 'torch')
+        print(exportOnnx(model, tokenizer, onnxModelPath(args.model)))
+    else:
+        report = checkAccuracy(loadBert(args.model, 'torch'), loadBert(args.model, args.backend),
+                               pooling=args.pooling, top_k=args.top_k)
+        print(json.dumps({"model": args.model, "backend": args.backend, **report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
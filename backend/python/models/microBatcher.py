@@ -0,0 +1,113 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+# Micro-Batching von Encoding-Aufträgen mehrerer gleichzeitiger Anfragen
+MICRO_BATCH_ENABLED = os.getenv("MICRO_BATCH_ENABLED", "true").lower() == "true"
+# Maximale Wartezeit in Millisekunden, bis ein Batch auch unvollständig verarbeitet wird
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "5"))
+# Maximale Anzahl an Texten, die zu einem Batch zusammengefasst werden
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "64"))
+
+
+class _Job:
+    def __init__(self, texts: list[str]):
+        self.texts = texts
+        self.future = Future()
+
+
+class MicroBatcher:
+    def __init__(self, encode, name: str, maxBatchSize: int = MICRO_BATCH_MAX_SIZE,
+                 maxWaitSeconds: float = MICRO_BATCH_MAX_WAIT_MS / 1000):
+        """
+        Initialisiert einen Micro-Batcher, der Encoding-Aufträge gleichzeitiger Anfragen kurz sammelt,
+        gemeinsam in einem Aufruf verarbeitet und die Ergebnisse an die jeweiligen Aufrufer verteilt.
+
+        :param encode: Funktion, die eine Liste von Texten auf eine Matrix mit einer Zeile je Text abbildet.
+        :param name: Name des Batchers (für den Worker-Thread).
+        :param maxBatchSize: Maximale Anzahl an Texten je gesammeltem Batch.
+        :param maxWaitSeconds: Maximale Wartezeit auf weitere Aufträge in Sekunden.
+        :return: None
+        """
+        self.encodeFn = encode
+        self.name = name
+        self.maxBatchSize = maxBatchSize
+        self.maxWaitSeconds = maxWaitSeconds
+        self.batches = 0
+        self.jobs = 0
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def submit(self, texts: list[str]) -> Future:
+        """
+        Reiht einen Encoding-Auftrag ein.
+
+        :param texts: Die zu kodierenden Texte.
+        :return: Future, das die Matrix mit einer Zeile je Text liefert.
+        """
+        job = _Job(list(texts))
+        self._ensureWorker()
+        self._queue.put(job)
+        return job.future
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """
+        Kodiert Texte über den Batcher und wartet auf das Ergebnis.
+
+        :param texts: Die zu kodierenden Texte.
+        :return: Matrix mit einer Zeile je Text.
+        """
+        return self.submit(texts).result()
+
+    def queueDepth(self) -> int:
+        """
+        :return: Anzahl der Aufträge, die auf ihre Verarbeitung warten.
+        """
+        return self._queue.qsize()
+
+    def _ensureWorker(self) -> None:
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name=f"micro-batcher-{self.name}", daemon=True)
+                self._worker.start()
+
+    def _collect(self) -> list[_Job]:
+        """
+        Wartet auf den ersten Auftrag und sammelt danach weitere, bis der Batch voll ist oder die Wartezeit abläuft.
+        """
+        batch = [self._queue.get()]
+        size = len(batch[0].texts)
+        deadline = time.monotonic() + self.maxWaitSeconds
+        while size < self.maxBatchSize:
+            remaining = deadline - time.monotonic()
+            try:
+                job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(job)
+            size += len(job.texts)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = [job for job in self._collect() if job.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                vectors = self.encodeFn([text for job in batch for text in job.texts])
+            except BaseException as e:
+                for job in batch:
+                    job.future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.jobs += len(batch)
+            start = 0
+            for job in batch:
+                job.future.set_result(vectors[start:start + len(job.texts)])
+                start += len(job.texts)
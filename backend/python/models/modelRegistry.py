@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+
+from models.inferenceBackend import INFERENCE_BACKEND, loadBert
+
+# Standardmodelle der Python-API
+BERT_MODEL_NAME = os.getenv("BERT_MODEL_NAME", "bert-base-german-cased")
+KEYBERT_MODEL_NAME = os.getenv("KEYBERT_MODEL_NAME", "all-MiniLM-L6-v2")
+# true = Modelle beim Start der API laden, false = erst bei der ersten Anfrage
+MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "true").lower() == "true"
+
+
+class ModelRegistry:
+    def __init__(self):
+        """
+        Initialisiert die ModelRegistry, die jedes Modell genau einmal pro Prozess lädt und
+        anschließend als gemeinsam genutztes Handle an alle Module ausgibt.
+
+        :return: None
+        """
+        self._handles = {}
+        self._info = {}
+        self._lock = threading.Lock()
+        self._loadLocks = {}
+
+    def get(self, key: str, loader):
+        """
+        Gibt das Handle zu einem Schlüssel zurück und lädt es beim ersten Zugriff mit dem übergebenen Loader.
+        Gleichzeitige Anfragen für dasselbe Modell warten auf einen einzigen Ladevorgang.
+
+        :param key: Eindeutiger Schlüssel des Modells (z.B. 'bert:bert-base-german-cased').
+        :param loader: Funktion ohne Parameter, die das Handle lädt.
+        :return: Das geladene Handle.
+        """
+        handle = self._handles.get(key)
+        if handle is not None:
+            return handle
+
+        with self._lock:
+            loadLock = self._loadLocks.setdefault(key, threading.Lock())
+
+        with loadLock:
+            if key not in self._handles:
+                print(f"Loading model {key}")
+                start = time.perf_counter()
+                handle = loader()
+                self.register(key, handle, loadSeconds=time.perf_counter() - start)
+            return self._handles[key]
+
+    def register(self, key: str, handle, loadSeconds: float = 0.0) -> None:
+        """
+        Hinterlegt ein bereits geladenes Handle (z.B. ein kleines Ersatzmodell für Benchmarks).
+
+        :param key: Eindeutiger Schlüssel des Modells.
+        :param handle: Das Handle, das unter dem Schlüssel ausgegeben werden soll.
+        :param loadSeconds: Dauer des Ladevorgangs in Sekunden.
+        :return: None
+        """
+        with self._lock:
+            self._handles[key] = handle
+            self._info[key] = {"loadedAt": time.time(), "loadSeconds": round(loadSeconds, 3)}
+
+    def getBert(self, name: str = BERT_MODEL_NAME, backend: str = None):
+        """
+        Gibt Tokenizer und Modell eines BERT-Modells zurück.
+
+        :param name: Name des Modells bei Hugging Face.
+        :param backend: Inferenz-Backend ('torch', 'int8' oder 'onnx', default: INFERENCE_BACKEND).
+        :return: Tuple bestehend aus Tokenizer und Modell.
+        """
+        backend = backend or INFERENCE_BACKEND
+        return self.get(f"bert:{bertModelId(name, backend)}", lambda: loadBert(name, backend))
+
+    def getKeyBERT(self, name: str = KEYBERT_MODEL_NAME):
+        """
+        Gibt das KeyBERT-Modell zur Schlüsselwortextraktion zurück.
+
+        :param name: Name des zugrunde liegenden Sentence-Transformers-Modells.
+        :return: Die KeyBERT-Instanz.
+        """
+        def load():
+            from keybert import KeyBERT
+            return KeyBERT(model=name)
+
+        return self.get(f"keybert:{name}", load)
+
+    def preload(self) -> None:
+        """
+        Lädt alle Standardmodelle der API.
+
+        :return: None
+        """
+        self.getBert()
+        self.getKeyBERT()
+
+    def status(self) -> list[dict]:
+        """
+        Gibt an, welche Modelle geladen sind und wie viel Speicher ihre Gewichte belegen.
+
+        :return: Liste von Dictionaries mit Schlüssel, Ladezeit, Anzahl Parameter und Speicherbedarf in Bytes.
+        """
+        with self._lock:
+            entries = list(self._handles.items())
+
+        result = []
+        for key, handle in entries:
+            parameters, memoryBytes = 0, 0
+            for module in _torchModules(handle):
+                for tensor in list(module.parameters()) + list(module.buffers()):
+                    parameters += tensor.numel()
+                    memoryBytes += tensor.numel() * tensor.element_size()
+            result.append({"model": key, **self._info[key], "parameters": parameters, "memoryBytes": memoryBytes})
+        return result
+
+
+def bertModelId(name: str = BERT_MODEL_NAME, backend: str = None) -> str:
+    """
+    Gibt die Kennung eines BERT-Modells samt Inferenz-Backend zurück, z.B. für Registry- und Cache-Schlüssel.
+    Für das fp32-Backend 'torch' ist das der Modellname selbst.
+
+    :param name: Name des Modells bei Hugging Face.
+    :param backend: Inferenz-Backend (default: INFERENCE_BACKEND).
+    :return: Die Kennung.
+    """
+    backend = backend or INFERENCE_BACKEND
+    return name if backend == 'torch' else f"{name}:{backend}"
+
+
+def _torchModules(handle) -> list:
+    """
+    Sucht die torch-Module in einem Handle (z.B. in einem Tuple aus Tokenizer und Modell oder in KeyBERT).
+
+    :param handle: Das Handle aus der Registry.
+    :return: Liste der gefundenen torch-Module.
+    """
+    import torch
+
+    if isinstance(handle, torch.nn.Module):
+        return [handle]
+    if isinstance(handle, (tuple, list)):
+        return [module for item in handle for module in _torchModules(item)]
+    # KeyBERT kapselt das Sentence-Transformers-Modell in einem Backend
+    backend = getattr(handle, "model", None)
+    embeddingModel = getattr(backend, "embedding_model", None)
+    if isinstance(embeddingModel, torch.nn.Module):
+        return [embeddingModel]
+    return []
+
+
+registry = ModelRegistry()
@@ -1,20 +1,37 @@
+import os
+
+import numpy as np
 import pandas as pd
-from transformers import BertTokenizer, BertModel
 from sklearn.metrics.pairwise import cosine_similarity
 
+from models.bertEncoder import encodeTexts, embedTexts
+from utils.metrics import stage
+from utils.similarityMatrix import cosineSimilarityMatrix, topKIndices
+
+# Anzahl der Jobs, deren Ähnlichkeiten zu allen Modulen gleichzeitig als Matrix gehalten werden
+BULK_JOB_CHUNK_SIZE = int(os.getenv("BULK_JOB_CHUNK_SIZE", "256"))
+
 
-def get_bert_embeddings(text, model, tokenizer):
+def get_bert_embeddings(texts: list[str], model, tokenizer) -> np.ndarray:
     """
-     Holt die BERT-Embeddings für gegebenen Text.
+     Holt die BERT-Embeddings für eine Liste von Texten (Mittelwert der Token-Vektoren).
 
-     :param text: Der Eingabetext, für den die Embeddings berechnet werden sollen.
+     :param texts: Die Eingabetexte, für die die Embeddings berechnet werden sollen.
      :param model: Das BERT-Modell, das zur Berechnung der Embeddings verwendet wird.
      :param tokenizer: Der BERT-Tokenizer, der zum Vorverarbeiten des Texts verwendet wird.
-     :return: Die BERT-Embeddings als Numpy-Array.
+     :return: Die BERT-Embeddings als Numpy-Array der Form (Anzahl Texte, Hidden Size).
      """
-    inputs = tokenizer(text, return_tensors='pt', truncation=True, padding=True, max_length=512)
-    outputs = model(**inputs)
-    return outputs.last_hidden_state.mean(dim=1).squeeze().detach().numpy()
+    return encodeTexts(texts, model, tokenizer, pooling='mean')
+
+
+def moduleText(module: dict) -> str:
+    """
+    Setzt den Text zusammen, mit dem ein Modul für BERT repräsentiert wird.
+
+    :param module: Das Modul mit den Feldern 'name', 'content', 'skills' und 'chair'.
+    :return: Der zusammengesetzte Text.
+    """
+    return f"{module['name']} {module['content']} {module['skills']} {module['chair']} {module['name']}"
 
 
 def calculate_similarity_bert(job_description: dict, modules: list[dict], jobTitleOnly: bool = False) -> pd.DataFrame:
@@ -26,28 +43,61 @@ def calculate_similarity_bert(job_description: dict, modules: list[dict], jobTit
     :param jobTitleOnly: Flag, das angibt, ob nur der Jobtitel berücksichtigt werden soll.
     :return: Ein DataFrame, das die Module mit ihren Ähnlichkeitsscores enthält.
     """
-    tokenizer = BertTokenizer.from_pretrained('bert-base-german-cased')
-    model = BertModel.from_pretrained('bert-base-german-cased')
-
     if jobTitleOnly:
         job_text = f"{job_description['title']}"
     else:
         job_text = f"{job_description['title']} {job_description['description']}"
 
-    job_embedding = get_bert_embeddings(job_text, model, tokenizer)
+    module_texts = [moduleText(module) for module in modules]
+    embeddings = embedTexts([job_text] + module_texts, pooling='mean')
+
+    with stage("similarity"):
+        similarities = cosine_similarity(embeddings[:1], embeddings[1:])[0].round(4)
+
+    with stage("aggregation"):
+        modules_df = pd.DataFrame(modules)
+        modules_df['score'] = similarities
+
+        filtered_modules = modules_df.loc[modules_df['score'] > 0.0]
+        sorted_modules = filtered_modules.sort_values(by='score', ascending=False)
+
+        return sorted_modules[['acronym', 'score']]
+
+
+def calculate_similarity_bert_bulk(job_descriptions: list[dict], modules: list[dict], jobTitleOnly: bool = False,
+                                   top_k: int = 5, chunkSize: int = None) -> list[list[dict]]:
+    """
+    Bewertet viele Stellenbeschreibungen gegen dieselbe Modulliste. Die Module werden nur einmal eingebettet,
+    die Jobs in Batches; die Ähnlichkeiten werden blockweise als Matrix (Jobs x Module) berechnet.
+    Je Job ergeben sich dieselben Scores wie bei calculate_similarity_bert.
+
+    :param job_descriptions: Die Stellenbeschreibungen {title: ..., description: ...}.
+    :param modules: Die Module, die bewertet werden sollen.
+    :param jobTitleOnly: Flag, das angibt, ob nur der Jobtitel berücksichtigt werden soll.
+    :param top_k: Anzahl der besten Module je Job.
+    :param chunkSize: Anzahl der Jobs je Block der Matrix (default: BULK_JOB_CHUNK_SIZE).
+    :return: Je Job eine Liste von {'acronym', 'score'} absteigend nach Score (nur Scores größer 0).
+    """
+    chunkSize = chunkSize or BULK_JOB_CHUNK_SIZE
+    if jobTitleOnly:
+        job_texts = [f"{job['title']}" for job in job_descriptions]
+    else:
+        job_texts = [f"{job['title']} {job['description']}" for job in job_descriptions]
+    if not modules:
+        return [[] for _ in job_texts]
 
-    similarities = []
-    for module in modules:
-        module_text = f"{module['name']} {module['content']} {module['skills']} {module['chair']} {module['name']}"
-        module_embedding = get_bert_embeddings(module_text, model, tokenizer)
-        similarity = cosine_similarity([job_embedding], [module_embedding])[0][0]
-        rounded_similarity = round(similarity, 4)
-        similarities.append(rounded_similarity)
+    acronyms = [module['acronym'] for module in modules]
+    module_embeddings = embedTexts([moduleText(module) for module in modules], pooling='mean')
 
-    modules_df = pd.DataFrame(modules)
-    modules_df['score'] = similarities
+    results = []
+    for start in range(0, len(job_texts), chunkSize):
+        job_embeddings = embedTexts(job_texts[start:start + chunkSize], pooling='mean')
 
-    filtered_modules = modules_df.loc[modules_df['score'] > 0.0]
-    sorted_modules = filtered_modules.sort_values(by='score', ascending=False)
+        with stage("similarity"):
+            scores = cosineSimilarityMatrix(job_embeddings, module_embeddings).round(4)
 
-    return sorted_modules[['acronym', 'score']]
+        with stage("aggregation"):
+            for row, indices in zip(scores, topKIndices(scores, top_k)):
+                results.append([{"acronym": acronyms[index], "score": round(float(row[index]), 4)}
+                                for index in indices if row[index] > 0.0])
+    return results
@@ -1,20 +1,21 @@
+import numpy as np
 import pandas as pd
-from transformers import BertTokenizer, BertModel
 from sklearn.metrics.pairwise import cosine_similarity
 
+from models.bertEncoder import encodeTexts
+from models.modelRegistry import registry
 
-def get_MiniLM_embeddings(text, model, tokenizer):
+
+def get_MiniLM_embeddings(texts: list[str], model, tokenizer) -> np.ndarray:
     """
-     Holt die BERT-Embeddings für gegebenen Text.
+     Holt die BERT-Embeddings für eine Liste von Texten (Mittelwert der Token-Vektoren).
 
-     :param text: Der Eingabetext, für den die Embeddings berechnet werden sollen.
+     :param texts: Die Eingabetexte, für die die Embeddings berechnet werden sollen.
      :param model: Das BERT-Modell, das zur Berechnung der Embeddings verwendet wird.
      :param tokenizer: Der BERT-Tokenizer, der zum Vorverarbeiten des Texts verwendet wird.
-     :return: Die BERT-Embeddings als Numpy-Array.
+     :return: Die BERT-Embeddings als Numpy-Array der Form (Anzahl Texte, Hidden Size).
      """
-    inputs = tokenizer(text, return_tensors='pt', truncation=True, padding=True, max_length=512)
-    outputs = model(**inputs)
-    return outputs.last_hidden_state.mean(dim=1).squeeze().detach().numpy()
+    return encodeTexts(texts, model, tokenizer, pooling='mean')
 
 
 def calculate_similarity_MiniLM(job_description: dict, modules: list[dict], jobTitleOnly: bool = False) -> pd.DataFrame:
@@ -26,23 +27,20 @@ def calculate_similarity_MiniLM(job_description: dict, modules: list[dict], jobT
     :param jobTitleOnly: Flag, das angibt, ob nur der Jobtitel berücksichtigt werden soll.
     :return: Ein DataFrame, das die Module mit ihren Ähnlichkeitsscores enthält.
     """
-    tokenizer = BertTokenizer.from_pretrained('bert-base-german-cased')
-    model = BertModel.from_pretrained('bert-base-german-cased')
+    tokenizer, model = registry.getBert()
 
     if jobTitleOnly:
         job_text = f"{job_description['title']}"
     else:
         job_text = f"{job_description['title']} {job_description['description']}"
 
-    job_embedding = get_MiniLM_embeddings(job_text, model, tokenizer)
+    module_texts = [
+        f"{module['name']} {module['content']} {module['skills']} {module['chair']} {module['name']}"
+        for module in modules
+    ]
+    embeddings = get_MiniLM_embeddings([job_text] + module_texts, model, tokenizer)
 
-    similarities = []
-    for module in modules:
-        module_text = f"{module['name']} {module['content']} {module['skills']} {module['chair']} {module['name']}"
-        module_embedding = get_MiniLM_embeddings(module_text, model, tokenizer)
-        similarity = cosine_similarity([job_embedding], [module_embedding])[0][0]
-        rounded_similarity = round(similarity, 4)
-        similarities.append(rounded_similarity)
+    similarities = cosine_similarity(embeddings[:1], embeddings[1:])[0].round(4)
 
     modules_df = pd.DataFrame(modules)
     modules_df['score'] = similarities
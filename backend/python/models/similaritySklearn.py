@@ -1,50 +1,253 @@
+import copy
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from scipy import sparse
+
+from utils.metrics import stage
+from utils.similarityMatrix import topKIndices
+
+# Anzahl der TF-IDF-Indizes (je Modulkorpus), die im Speicher gehalten werden
+TFIDF_INDEX_CACHE_SIZE = int(os.getenv("TFIDF_INDEX_CACHE_SIZE", "8"))
+# Anteil geänderter Module, bis zu dem ein neuer Korpus aus einem vorhandenen Index abgeleitet statt neu trainiert wird
+TFIDF_INCREMENTAL_MAX_CHANGE = float(os.getenv("TFIDF_INCREMENTAL_MAX_CHANGE", "0.2"))
+
+RESULT_COLUMNS = ['acronym', 'name', 'score', 'mId']
+
+_tfidfIndexes = OrderedDict()
+_tfidfIndexesLock = threading.Lock()
+
+
+def moduleText(module: dict) -> str:
+    """
+    Setzt den Text zusammen, mit dem ein Modul im TF-IDF-Index repräsentiert wird.
+
+    :param module: Das Modul mit den Feldern 'name', 'content', 'skills' und 'chair'.
+    :return: Der zusammengesetzte Text.
+    """
+    return module['name'] + module['content'] + module['skills'] + module['chair'] + module['name']
+
+
+def corpusFingerprint(modules: list[dict]) -> str:
+    """
+    Bildet einen Fingerabdruck des Modulkorpus, unter dem der passende TF-IDF-Index abgelegt wird.
+
+    :param modules: Die Module.
+    :return: SHA-256-Hash als Hex-String.
+    """
+    return _fingerprint([_moduleKey(module) for module in modules])
+
+
+def _fingerprint(moduleKeys: list[str]) -> str:
+    # Unabhängig von der Reihenfolge, damit ein abgeleiteter Index denselben Fingerabdruck hat wie ein neu trainierter
+    digest = hashlib.sha256()
+    for key in sorted(moduleKeys):
+        digest.update(key.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _moduleKey(module: dict) -> str:
+    # Enthält alle Felder, die der Index zurückgibt (siehe _metadata), nicht nur die indizierten Texte
+    return f"{module.get('acronym')}\x00{module.get('mId')}\x00{module.get('name')}\x00{moduleText(module)}\x01"
+
+
+class TfidfModuleIndex:
+    def __init__(self, modules: list[dict]):
+        """
+        Trainiert einen TF-IDF-Vektorisierer einmalig auf einem Modulkorpus und speichert die Module
+        als dünnbesetzte, L2-normierte Matrix. Anfragen müssen danach nur noch den Jobtext transformieren.
+
+        :param modules: Die Module mit den Feldern 'acronym', 'name', 'content', 'skills', 'chair' und optional 'mId'.
+        :return: None
+        """
+        self.vectorizer = TfidfVectorizer()
+        self._moduleKeys = [_moduleKey(module) for module in modules]
+        self.fingerprint = _fingerprint(self._moduleKeys)
+        self._lock = threading.RLock()
+        if modules:
+            self.matrix = self.vectorizer.fit_transform([moduleText(module) for module in modules]).tocsr()
+        else:
+            self.matrix = sparse.csr_matrix((0, 0))
+        self.modules = [self._metadata(module) for module in modules]
+
+    def search(self, text: str, top_k: int = None) -> tuple[list[dict], np.ndarray]:
+        """
+        Berechnet die Kosinus-Ähnlichkeit eines Textes zu allen Modulen als dünnbesetztes Matrix-Vektor-Produkt.
+
+        :param text: Der Jobtext.
+        :param top_k: Anzahl der besten Module oder None für alle Module mit einer Ähnlichkeit größer 0.
+        :return: Tuple aus den Modulen (absteigend nach Ähnlichkeit) und den gerundeten Ähnlichkeiten.
+        """
+        with self._lock:
+            modules, matrix = self.modules, self.matrix
+        if not modules or not hasattr(self.vectorizer, 'vocabulary_'):
+            return [], np.empty(0)
+
+        query = self.vectorizer.transform([text])
+        scores = np.asarray((matrix @ query.T).todense()).ravel().round(4)
+        candidates = np.flatnonzero(scores > 0.0)
+        order = candidates[topKIndices(scores[candidates], top_k or len(candidates))[0]]
+        return [modules[index] for index in order], scores[order]
+
+    def add(self, modules: list[dict]) -> None:
+        """
+        Fügt Module hinzu bzw. ersetzt Module mit gleichem Kürzel. Vokabular und IDF-Gewichte bleiben dabei
+        unverändert, Wörter außerhalb des Vokabulars werden ignoriert.
+
+        :param modules: Die hinzuzufügenden Module.
+        :return: None
+        """
+        if not modules:
+            return
+        if not hasattr(self.vectorizer, 'vocabulary_'):
+            rebuilt = TfidfModuleIndex(modules)
+            with self._lock:
+                self.vectorizer, self.matrix, self.modules = rebuilt.vectorizer, rebuilt.matrix, rebuilt.modules
+                self._moduleKeys, self.fingerprint = rebuilt._moduleKeys, rebuilt.fingerprint
+            return
+        added = self.vectorizer.transform([moduleText(module) for module in modules]).tocsr()
+        acronyms = {module['acronym'] for module in modules}
+        with self._lock:
+            keep = [index for index, module in enumerate(self.modules) if module['acronym'] not in acronyms]
+            self.matrix = sparse.vstack([self.matrix[keep], added]).tocsr()
+            self.modules = [self.modules[index] for index in keep] + [self._metadata(module) for module in modules]
+            self._moduleKeys = [self._moduleKeys[index] for index in keep] + [_moduleKey(module) for module in modules]
+            self.fingerprint = _fingerprint(self._moduleKeys)
+
+    def copy(self) -> 'TfidfModuleIndex':
+        """
+        Erstellt eine Kopie, die mit add und remove verändert werden kann, ohne diesen Index zu verändern.
+        Vektorisierer und Matrix werden geteilt, da add und remove sie nicht verändern, sondern ersetzen.
+
+        :return: Die Kopie.
+        """
+        clone = copy.copy(self)
+        with self._lock:
+            clone.modules, clone._moduleKeys = list(self.modules), list(self._moduleKeys)
+        clone._lock = threading.RLock()
+        return clone
+
+    def remove(self, acronyms: list[str]) -> int:
+        """
+        Entfernt Module anhand ihrer Kürzel.
+
+        :param acronyms: Die Kürzel der zu entfernenden Module.
+        :return: Anzahl der entfernten Module.
+        """
+        acronyms = set(acronyms)
+        with self._lock:
+            keep = [index for index, module in enumerate(self.modules) if module['acronym'] not in acronyms]
+            removed = len(self.modules) - len(keep)
+            if removed:
+                self.matrix = self.matrix[keep]
+                self.modules = [self.modules[index] for index in keep]
+                self._moduleKeys = [self._moduleKeys[index] for index in keep]
+                self.fingerprint = _fingerprint(self._moduleKeys)
+        return removed
+
+    @staticmethod
+    def _metadata(module: dict) -> dict:
+        return {column: module.get(column) for column in RESULT_COLUMNS if column != 'score'}
+
+
+def getTfidfIndex(modules: list[dict]) -> TfidfModuleIndex:
+    """
+    Gibt den TF-IDF-Index für einen Modulkorpus zurück und trainiert ihn nur, wenn der Korpus neu ist.
+    Unterscheidet sich der Korpus nur in wenigen Modulen (höchstens TFIDF_INCREMENTAL_MAX_CHANGE) von einem
+    vorhandenen Index, wird eine Kopie dieses Index mit add und remove angepasst (siehe deriveTfidfIndex).
+
+    :param modules: Die Module.
+    :return: Der TF-IDF-Index.
+    """
+    moduleKeys = [_moduleKey(module) for module in modules]
+    fingerprint = _fingerprint(moduleKeys)
+    with _tfidfIndexesLock:
+        index = _tfidfIndexes.get(fingerprint)
+        if index is not None:
+            _tfidfIndexes.move_to_end(fingerprint)
+            return index
+        candidates = list(_tfidfIndexes.values())
+
+    index = deriveTfidfIndex(candidates, modules, moduleKeys) or TfidfModuleIndex(modules)
+    with _tfidfIndexesLock:
+        _tfidfIndexes[fingerprint] = index
+        while len(_tfidfIndexes) > TFIDF_INDEX_CACHE_SIZE:
+            _tfidfIndexes.popitem(last=False)
+    return index
+
+
+def deriveTfidfIndex(candidates: list[TfidfModuleIndex], modules: list[dict], moduleKeys: list[str]):
+    """
+    Leitet den Index für einen Korpus aus dem ähnlichsten vorhandenen Index ab: entfernte und geänderte Module
+    werden entfernt, neue und geänderte Module hinzugefügt. Vokabular und IDF-Gewichte des vorhandenen Index
+    bleiben dabei erhalten, daher nur bis zu einem Anteil von TFIDF_INCREMENTAL_MAX_CHANGE geänderter Module.
+
+    :param candidates: Die vorhandenen Indizes.
+    :param modules: Die Module des neuen Korpus.
+    :param moduleKeys: Die Schlüssel der Module (siehe _moduleKey).
+    :return: Der abgeleitete Index oder None, wenn er neu trainiert werden sollte.
+    """
+    acronyms = [module.get('acronym') for module in modules]
+    # add und remove arbeiten mit Kürzeln, doppelte Kürzel lassen sich daher nicht abgleichen
+    if not modules or len(set(acronyms)) != len(acronyms):
+        return None
+    keySet = set(moduleKeys)
+    maxChanges = int(len(modules) * TFIDF_INCREMENTAL_MAX_CHANGE)
+
+    best = None
+    for candidate in candidates:
+        with candidate._lock:
+            stored = list(zip(candidate.modules, candidate._moduleKeys))
+        storedAcronyms = [module['acronym'] for module, _ in stored]
+        if len(set(storedAcronyms)) != len(storedAcronyms) or not hasattr(candidate.vectorizer, 'vocabulary_'):
+            continue
+        storedKeys = {key for _, key in stored}
+        removed = {module['acronym'] for module, key in stored if key not in keySet}
+        added = [module for module, key in zip(modules, moduleKeys) if key not in storedKeys]
+        changes = len(removed) + len(added)
+        if changes <= maxChanges and (best is None or changes < best[0]):
+            best = (changes, candidate, removed, added)
+    if best is None:
+        return None
+
+    _, candidate, removed, added = best
+    index = candidate.copy()
+    index.remove(removed)
+    index.add(added)
+    return index
 
 
 def calculate_similarity_sklearn(job_description: dict, modules: list[dict],
-                                 jobTitleOnly: bool = False) -> pd.DataFrame:
+                                 jobTitleOnly: bool = False, top_k: int = None) -> pd.DataFrame:
     """
     Berechnet die Ähnlichkeiten zwischen einer Stellenanzeige und einer Liste von Modulen.
 
     :param job_description: dict, enthält den Namen und die Beschreibung der Stellenanzeige.
     :param modules: list of dicts, enthält Namen und Beschreibungen der Module.
+    :param jobTitleOnly: Flag, ob nur der Jobtitel berücksichtigt werden soll.
+    :param top_k: Anzahl der besten Module oder None für alle Module mit einer Ähnlichkeit größer 0.
     :return: DataFrame mit Ähnlichkeiten der Module zur Stellenanzeige.
     """
 
-    print('Calculate sklearn')
-
-    pd.set_option('display.expand_frame_repr', False)  # Verhindert Zeilenumbrüche in der Darstellung
-    pd.set_option('display.max_columns', None)  # Zeigt alle Spalten an
-    pd.set_option('display.max_colwidth', None)  # Setzt die maximale Spaltenbreite auf unbegrenzt
-
-    modules_df = pd.DataFrame(modules)
-
     if jobTitleOnly:
         job_text = f"{job_description['title']}"
     else:
         job_text = f"{job_description['title']}" + " " + f"{job_description['description']}"
 
-    corpus_title = list(
-        modules_df['name'] + modules_df['content'] + modules_df['skills'] + modules_df['chair'] + modules_df[
-            'name']) + [job_text]
-
-    vectorizer = TfidfVectorizer()
-    X_Title = vectorizer.fit_transform(corpus_title)
-
-    similarity_matrix_title = cosine_similarity(X_Title[:len(modules)], X_Title[len(modules):])
-
-    similarities = [round(similarity, 4) for similarity in similarity_matrix_title[:, 0]]
-
-    modules_df['score'] = similarities
-
-    filtered_modules = modules_df.loc[modules_df['score'] > 0.0]
+    with stage("similarity"):
+        matches, scores = getTfidfIndex(modules).search(job_text, top_k=top_k)
 
-    sorted_modules = filtered_modules.sort_values(by='score', ascending=False)
+    with stage("aggregation"):
+        sorted_modules = pd.DataFrame(matches, columns=[column for column in RESULT_COLUMNS if column != 'score'])
+        sorted_modules['score'] = scores
 
-    # writeModuleLog(modules_df)
-    return sorted_modules[['acronym', 'name', 'score', 'mId']]
+    # writeModuleLog(sorted_modules)
+    return sorted_modules[RESULT_COLUMNS]
 
 
 def writeModuleLog(df: pd.DataFrame) -> None:
@@ -0,0 +1,251 @@
+import os
+
+import numpy as np
+
+from utils.similarityMatrix import normalizeRows, topKIndices
+
+# Art des Suchindex für Modul-Indizes: 'exact' (vollständige Suche) oder 'ivf' (approximativ)
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "exact")
+# Anzahl der Cluster des IVF-Index (0 = Wurzel aus der Anzahl der Vektoren)
+IVF_NLIST = int(os.getenv("IVF_NLIST", "0"))
+# Anzahl der Cluster, die je Anfrage durchsucht werden (höher = genauer, aber langsamer)
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "8"))
+
+# Kennzeichnet in den Ergebnissen von search fehlende Treffer (weniger Kandidaten als k)
+NO_MATCH = -1
+
+
+class VectorIndex:
+    kind = None
+
+    def __init__(self):
+        """
+        Basisklasse für Suchindizes über normalisierten Vektoren. Die Ähnlichkeit ist die Kosinus-Ähnlichkeit,
+        also das Skalarprodukt der normalisierten Vektoren.
+
+        :return: None
+        """
+        self.ids = []
+        self.dimension = 0
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def build(self, ids: list[str], vectors) -> 'VectorIndex':
+        """
+        Baut den Index vollständig neu auf.
+
+        :param ids: Schlüssel der Vektoren (z.B. Modulkürzel).
+        :param vectors: Matrix der Form (Anzahl Schlüssel, Dimension).
+        :return: Der Index selbst.
+        """
+        vectors = self._prepare(ids, vectors)
+        self.ids = list(ids)
+        self.dimension = vectors.shape[1]
+        self.vectors = vectors
+        self._train()
+        return self
+
+    def add(self, ids: list[str], vectors) -> None:
+        """
+        Fügt Vektoren hinzu, ohne den Index neu zu trainieren.
+
+        :param ids: Schlüssel der neuen Vektoren.
+        :param vectors: Matrix der Form (Anzahl Schlüssel, Dimension).
+        :return: None
+        """
+        if not ids:
+            return
+        if not self.ids:
+            self.build(ids, vectors)
+            return
+        vectors = self._prepare(ids, vectors)
+        if vectors.shape[1] != self.dimension:
+            raise ValueError(f"Dimension mismatch: {vectors.shape[1]} vs {self.dimension}")
+        # Neue Arrays statt Änderung an Ort und Stelle; die Vektoren werden vor der Clusterzuordnung ersetzt,
+        # damit eine gleichzeitige Suche nie auf Zeilen zugreift, die es noch nicht gibt
+        self.vectors = np.ascontiguousarray(np.vstack([self.vectors, vectors]))
+        self.ids = self.ids + list(ids)
+        self._insert(vectors)
+
+    def search(self, queries, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Sucht für jede Anfrage die k ähnlichsten Vektoren.
+
+        :param queries: Matrix der Form (Anzahl Anfragen, Dimension).
+        :param k: Anzahl der gesuchten Treffer je Anfrage.
+        :return: Tuple aus Zeilenindizes (Position in ids, NO_MATCH für fehlende Treffer) und Ähnlichkeiten,
+                 jeweils der Form (Anzahl Anfragen, min(k, Anzahl Vektoren)) und absteigend sortiert.
+        """
+        queries = normalizeRows(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        if self.ids and queries.shape[1] != self.dimension:
+            raise ValueError(f"Dimension mismatch: {queries.shape[1]} vs {self.dimension}")
+        k = max(0, min(k, len(self.ids)))
+        if k == 0:
+            return np.empty((len(queries), 0), dtype=np.intp), np.empty((len(queries), 0), dtype=np.float32)
+        return self._search(queries, k)
+
+    def save(self, path: str) -> None:
+        """
+        Speichert den Index als unkomprimierte NumPy-Archivdatei (.npz).
+
+        :param path: Zieldatei.
+        :return: None
+        """
+        np.savez(path, kind=np.array(self.kind), ids=np.array(self.ids, dtype=str),
+                 vectors=self.vectors, **self._state())
+
+    def _prepare(self, ids: list[str], vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[0] != len(ids):
+            raise ValueError(f"Expected {len(ids)} vectors, got shape {vectors.shape}")
+        return normalizeRows(vectors)
+
+    def _train(self) -> None:
+        pass
+
+    def _insert(self, vectors: np.ndarray) -> None:
+        pass
+
+    def _state(self) -> dict:
+        return {}
+
+    def _restore(self, state) -> None:
+        pass
+
+    def _search(self, queries: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        raise NotImplementedError
+
+
+class ExactIndex(VectorIndex):
+    kind = 'exact'
+
+    def _search(self, queries: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        scores = queries @ self.vectors.T
+        indices = topKIndices(scores, k)
+        return indices, np.take_along_axis(scores, indices, axis=1)
+
+
+class IVFIndex(VectorIndex):
+    kind = 'ivf'
+
+    def __init__(self, nlist: int = IVF_NLIST, nprobe: int = IVF_NPROBE, iterations: int = 10, seed: int = 0):
+        """
+        Approximativer Index (Inverted File): die Vektoren werden per k-Means auf nlist Cluster verteilt,
+        eine Anfrage durchsucht nur die nprobe Cluster, deren Zentroiden ihr am ähnlichsten sind.
+
+        :param nlist: Anzahl der Cluster (0 = Wurzel aus der Anzahl der Vektoren).
+        :param nprobe: Anzahl der je Anfrage durchsuchten Cluster (Abwägung zwischen Recall und Latenz).
+        :param iterations: Anzahl der k-Means-Iterationen beim Aufbau.
+        :param seed: Startwert des Zufallsgenerators, damit der Aufbau reproduzierbar ist.
+        :return: None
+        """
+        super().__init__()
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.iterations = iterations
+        self.seed = seed
+        self.centroids = np.empty((0, 0), dtype=np.float32)
+        self.assignments = np.empty(0, dtype=np.intp)
+        self._order = np.empty(0, dtype=np.intp)
+        self._offsets = np.zeros(1, dtype=np.intp)
+
+    def _train(self) -> None:
+        count = len(self.vectors)
+        if count == 0:
+            # Ohne Vektoren gibt es keine Cluster; add trainiert den Index beim ersten Einfügen
+            self.centroids = np.empty((0, self.dimension), dtype=np.float32)
+            self._setAssignments(np.empty(0, dtype=np.intp))
+            return
+        clusters = max(1, min(self.nlist or int(np.sqrt(count)), count))
+        rng = np.random.default_rng(self.seed)
+        centroids = self.vectors[rng.choice(count, clusters, replace=False)]
+
+        # Sphärisches k-Means: Zuordnung über das Skalarprodukt, Zentroiden werden normalisiert
+        for _ in range(self.iterations):
+            assignments = self._assign(self.vectors, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, self.vectors)
+            empty = np.bincount(assignments, minlength=clusters) == 0
+            sums[empty] = self.vectors[rng.choice(count, int(empty.sum()))]
+            centroids = normalizeRows(sums)
+
+        self.centroids = centroids
+        self._setAssignments(self._assign(self.vectors, centroids))
+
+    def _insert(self, vectors: np.ndarray) -> None:
+        self._setAssignments(np.concatenate([self.assignments, self._assign(vectors, self.centroids)]))
+
+    def _search(self, queries: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        vectors, order, offsets = self.vectors, self._order, self._offsets
+        indices = np.full((len(queries), k), NO_MATCH, dtype=np.intp)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        if len(self.centroids) == 0:
+            return indices, scores
+        probes = topKIndices(queries @ self.centroids.T, self.nprobe)
+        for row, query in enumerate(queries):
+            candidates = np.concatenate([order[offsets[cluster]:offsets[cluster + 1]] for cluster in probes[row]])
+            candidateScores = vectors[candidates] @ query
+            best = topKIndices(candidateScores, k)[0]
+            indices[row, :len(best)] = candidates[best]
+            scores[row, :len(best)] = candidateScores[best]
+        return indices, scores
+
+    def _assign(self, vectors: np.ndarray, centroids: np.ndarray, chunkSize: int = 4096) -> np.ndarray:
+        return np.concatenate([
+            np.argmax(vectors[start:start + chunkSize] @ centroids.T, axis=1)
+            for start in range(0, len(vectors), chunkSize)
+        ]) if len(vectors) else np.empty(0, dtype=np.intp)
+
+    def _setAssignments(self, assignments: np.ndarray) -> None:
+        # Zeilen nach Cluster sortiert, ein Cluster ist damit ein zusammenhängender Abschnitt von _order
+        self.assignments = assignments
+        self._order = np.argsort(assignments, kind='stable')
+        self._offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=len(self.centroids)))])
+
+    def _state(self) -> dict:
+        return {
+            "centroids": self.centroids,
+            "assignments": self.assignments,
+            "params": np.array([self.nlist, self.nprobe, self.iterations, self.seed]),
+        }
+
+    def _restore(self, state) -> None:
+        self.nlist, self.nprobe, self.iterations, self.seed = (int(value) for value in state["params"])
+        self.centroids = state["centroids"]
+        self._setAssignments(state["assignments"])
+
+
+VECTOR_INDEX_TYPES = {ExactIndex.kind: ExactIndex, IVFIndex.kind: IVFIndex}
+
+
+def createVectorIndex(kind: str = None, **options) -> VectorIndex:
+    """
+    Erzeugt einen leeren Suchindex.
+
+    :param kind: 'exact' oder 'ivf' (default: VECTOR_INDEX_TYPE).
+    :param options: Parameter des Index (z.B. nlist und nprobe für 'ivf').
+    :return: Der Index.
+    :raises ValueError: Wenn die Art des Index unbekannt ist.
+    """
+    kind = kind or VECTOR_INDEX_TYPE
+    if kind not in VECTOR_INDEX_TYPES:
+        raise ValueError(f"Unknown vector index type: {kind}")
+    return VECTOR_INDEX_TYPES[kind](**options)
+
+
+def loadVectorIndex(path: str) -> VectorIndex:
+    """
+    Lädt einen mit VectorIndex.save gespeicherten Index.
+
+    :param path: Die Datei.
+    :return: Der Index.
+    """
+    with np.load(path, allow_pickle=False) as state:
+        index = createVectorIndex(str(state["kind"]))
+        index.ids = state["ids"].tolist()
+        index.vectors = np.ascontiguousarray(state["vectors"], dtype=np.float32)
+        index.dimension = index.vectors.shape[1]
+        index._restore(state)
+    return index
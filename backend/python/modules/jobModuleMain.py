@@ -1,14 +1,21 @@
-from starlette.responses import JSONResponse
-from models.similaritySklearn import calculate_similarity_sklearn
-from models.similarityBert import calculate_similarity_bert
+import os
+from functools import partial
 
-from utils.textPrepare import TextPreprocessor
+from models.similaritySklearn import calculate_similarity_sklearn, getTfidfIndex
+from models.similarityBert import calculate_similarity_bert, calculate_similarity_bert_bulk
+
+from utils.textPrepare import TextPreprocessor, preprocessTexts
+from utils.executor import preprocessPool, mapInProcessPool
 from utils.evaluateSectionRelevance import SectionEvaluator
 from utils.logging import writeResultLog
+from utils.metrics import stage
 from utils.keywordExtractionBert import keywordExtraction
 
 import pandas as pd
 
+# Anzahl der Module, die im Hybrid-Modus nach der TF-IDF-Vorauswahl mit BERT bewertet werden
+HYBRID_CANDIDATE_COUNT = int(os.getenv("HYBRID_CANDIDATE_COUNT", "40"))
+
 
 def string_to_boolean(s: str) -> bool:
     """
@@ -50,10 +57,17 @@ def modulePreprocessing(modules: list[dict], module_names: list[str], textPrepro
         :param split: Flag, ob der Text gesplittet werden soll.
         :return: Verarbeitete Liste von Modulen.
         """
-    for module in modules:
-        for name in module_names:
-            if len(module[name]) > 0:
-                module[name] = textPreprocessor.preprocessText(module[name], split)
+    fields = [(module, name) for module in modules for name in module_names if len(module[name]) > 0]
+    texts = [module[name] for module, name in fields]
+
+    with stage("preprocessing"):
+        if preprocessPool() is None:
+            results = textPreprocessor.preprocessMany(texts, split)
+        else:
+            results = mapInProcessPool(partial(preprocessTexts, splitResult=split), texts)
+
+    for (module, name), result in zip(fields, results):
+        module[name] = result
 
     return modules
 
@@ -67,8 +81,9 @@ def preProcessText(job_description: dict, modules: list[dict], split: bool = Fal
      :return: Tuple bestehend aus der bearbeiteten Stellenbeschreibung und den bearbeiteten Modulen.
      """
     textPreprocessor = TextPreprocessor()
-    job_description['title'] = textPreprocessor.preprocessText(job_description['title'], split)
-    job_description['description'] = textPreprocessor.preprocessText(job_description['description'], split)
+    with stage("preprocessing"):
+        job_description['title'] = textPreprocessor.preprocessText(job_description['title'], split)
+        job_description['description'] = textPreprocessor.preprocessText(job_description['description'], split)
 
     module_names = ['content', 'skills', 'name', 'chair']
     modules = modulePreprocessing(modules, module_names, textPreprocessor, split)
@@ -76,28 +91,88 @@ def preProcessText(job_description: dict, modules: list[dict], split: bool = Fal
     return job_description, modules
 
 
-def calculate_semantic_similarity(modelType: str, job_description: dict, module_list: list[dict], jobTitleOnly: bool) -> \
-        list[dict]:
+def calculate_semantic_similarity(modelType: str, job_description: dict, module_list: list[dict], jobTitleOnly: bool,
+                                  candidateCount: int = None, evaluateRecall: bool = False, recallAt: int = 5,
+                                  diagnostics: dict = None) -> list[dict]:
     """
     Berechnet die semantische Ähnlichkeit zwischen der Stellenbeschreibung und der Modul-Liste.
 
-    :param modelType: Der zu verwendende Modelltyp ('sklearn' oder 'bert').
+    :param modelType: Der zu verwendende Modelltyp ('sklearn', 'bert' oder 'hybrid').
     :param job_description: Dictionary mit der Stellenbeschreibung.
     :param module_list: Liste der Module.
     :param jobTitleOnly: Flag, ob nur der Jobtitel berücksichtigt werden soll.
+    :param candidateCount: Nur 'hybrid': Anzahl der TF-IDF-Kandidaten, die mit BERT bewertet werden.
+    :param evaluateRecall: Nur 'hybrid': Flag, ob zusätzlich alle Module mit BERT bewertet werden, um den Recall zu messen.
+    :param recallAt: Nur 'hybrid': Anzahl der besten Module, für die der Recall gemessen wird.
+    :param diagnostics: Optionales Dictionary, in das der Hybrid-Modus seine Kennzahlen schreibt.
     :return: Liste von ähnlichen Modulen.
     """
     if modelType == 'sklearn':
         return calculate_similarity_sklearn(job_description, module_list, jobTitleOnly)
     elif modelType == 'bert':
         return calculate_similarity_bert(job_description, module_list, jobTitleOnly)
+    elif modelType == 'hybrid':
+        return calculate_similarity_hybrid(job_description, module_list, jobTitleOnly, candidateCount,
+                                           evaluateRecall, recallAt, diagnostics)
     else:
         print("Model Type not found")
         return []
 
 
+def calculate_similarity_hybrid(job_description: dict, module_list: list[dict], jobTitleOnly: bool = False,
+                                candidateCount: int = None, evaluateRecall: bool = False, recallAt: int = 5,
+                                diagnostics: dict = None) -> pd.DataFrame:
+    """
+    Bewertet die Module in zwei Stufen: TF-IDF wählt die vielversprechendsten Kandidaten aus,
+    nur diese werden anschließend mit BERT eingebettet und neu bewertet.
+
+    :param job_description: Dictionary mit der Stellenbeschreibung.
+    :param module_list: Liste der Module.
+    :param jobTitleOnly: Flag, ob nur der Jobtitel berücksichtigt werden soll.
+    :param candidateCount: Anzahl der Kandidaten für BERT (default: HYBRID_CANDIDATE_COUNT).
+    :param evaluateRecall: Flag, ob zusätzlich alle Module mit BERT bewertet werden, um den Recall zu messen.
+    :param recallAt: Anzahl der besten Module, für die der Recall gemessen wird.
+    :param diagnostics: Optionales Dictionary, in das die Kennzahlen der Vorauswahl geschrieben werden.
+    :return: DataFrame wie bei calculate_similarity_bert.
+    """
+    candidateCount = candidateCount or HYBRID_CANDIDATE_COUNT
+    lexical = calculate_similarity_sklearn(job_description, module_list, jobTitleOnly, top_k=candidateCount)
+    selected = set(lexical['acronym'])
+
+    # Gibt es zu wenige lexikalische Treffer, wird mit den übrigen Modulen in ihrer Reihenfolge aufgefüllt
+    for module in module_list:
+        if len(selected) >= candidateCount:
+            break
+        selected.add(module['acronym'])
+    candidates = [module for module in module_list if module['acronym'] in selected]
+
+    result = calculate_similarity_bert(job_description, candidates, jobTitleOnly)
+
+    if diagnostics is not None:
+        diagnostics.update({
+            "modelType": "hybrid",
+            "moduleCount": len(module_list),
+            "candidateCount": candidateCount,
+            "lexicalMatches": len(lexical),
+            "rerankedCount": len(candidates),
+        })
+        if evaluateRecall:
+            reference = calculate_similarity_bert(job_description, module_list, jobTitleOnly)
+            expected = list(reference['acronym'].head(recallAt))
+            found = set(result['acronym'].head(recallAt))
+            diagnostics["recall"] = {
+                "k": recallAt,
+                "recall": round(len(found.intersection(expected)) / len(expected), 4) if expected else 1.0,
+                "missed": [acronym for acronym in expected if acronym not in found],
+                "candidateRecall": round(len(selected.intersection(expected)) / len(expected), 4) if expected else 1.0,
+            }
+
+    return result
+
+
 def jobModuleProposalKeyWords(title: str, keywords: str, modules: list,
-                              resultLimit: int = 5) -> JSONResponse:
+                              resultLimit: int = 5, modelType: str = 'bert', candidateCount: int = None,
+                              evaluateRecall: bool = False) -> dict:
     """
     Erstellt einen Vorschlag für Module basierend auf Schlüsselwörtern.
 
@@ -105,7 +180,10 @@ def jobModuleProposalKeyWords(title: str, keywords: str, modules: list,
     :param keywords: Schlüsselwörter für die Suche.
     :param modules: mögliche Module, die empfohlen werden können.
     :param resultLimit: Maximale Anzahl zurückgegebener Ergebnisse.
-    :return: JSONResponse mit den Vorschlägen für Module.
+    :param modelType: Der zu verwendende Modelltyp ('sklearn', 'bert' oder 'hybrid').
+    :param candidateCount: Nur 'hybrid': Anzahl der TF-IDF-Kandidaten, die mit BERT bewertet werden.
+    :param evaluateRecall: Nur 'hybrid': Flag, ob der Recall der Vorauswahl gegenüber reinem BERT gemessen wird.
+    :return: Dictionary mit den Vorschlägen für Module.
     """
     job_description = {"title": title, "description": keywords}
 
@@ -117,14 +195,17 @@ def jobModuleProposalKeyWords(title: str, keywords: str, modules: list,
     module_names = ['content', 'skills', 'name', 'chair']
     module_list = modulePreprocessing(module_list, module_names, textPreprocessor, split)
 
-    result = calculate_similarity_bert(job_description, module_list)
+    diagnostics = {}
+    result = calculate_semantic_similarity(modelType, job_description, module_list, False,
+                                           candidateCount=candidateCount, evaluateRecall=evaluateRecall,
+                                           recallAt=resultLimit, diagnostics=diagnostics)
 
-    limited_results = result.head(resultLimit).to_dict(orient='records')
-    print(limited_results)
+    with stage("serialization"):
+        limited_results = result.head(resultLimit).to_dict(orient='records')
 
     resultLogging = False
     parameters = ["textPreProcessing", "modelType", "jobTitleOnly", "sectionRelevanze", "keyWordExtraction"]
-    values = [True, 'bert', False, True, True]
+    values = [True, modelType, False, True, True]
     information_df = pd.DataFrame(zip(parameters, values), columns=["Parameter", "Value"])
 
     if resultLogging:
@@ -132,37 +213,77 @@ def jobModuleProposalKeyWords(title: str, keywords: str, modules: list,
         writeResultLog(result, csv_filename, job_description['title'], job_description['description'], information_df,
                        limit=resultLimit)
 
-    jsonResponse = JSONResponse({
+    response = {
         "title": job_description["title"],
         "keywords": keywords,
         "recModules": limited_results
-    })
-    print(jsonResponse)
-    return jsonResponse
+    }
+    if diagnostics:
+        response["diagnostics"] = diagnostics
+    return response
+
+
+def jobsModuleProposalKeyWords(jobs: list[dict], modules: list, resultLimit: int = 5,
+                               modelType: str = 'bert') -> dict:
+    """
+    Erstellt Modulvorschläge für viele Jobs gegen dieselbe Modulliste (z.B. um gespeicherte Jobs nach einer
+    Änderung des Modulhandbuchs neu zu bewerten). Die Module werden nur einmal vorverarbeitet und eingebettet
+    bzw. indiziert; je Job ergeben sich dieselben Vorschläge wie bei jobModuleProposalKeyWords.
+
+    :param jobs: Liste von Dictionaries mit 'title' und 'keywords'.
+    :param modules: mögliche Module, die empfohlen werden können.
+    :param resultLimit: Maximale Anzahl zurückgegebener Ergebnisse je Job.
+    :param modelType: Der zu verwendende Modelltyp ('bert' oder 'sklearn').
+    :return: Dictionary mit 'results', den Vorschlägen je Job in der Reihenfolge der Eingabe.
+    """
+    job_descriptions = [{"title": job["title"], "description": job["keywords"]} for job in jobs]
+
+    module_names = ['content', 'skills', 'name', 'chair']
+    module_list = modulePreprocessing(modules, module_names, TextPreprocessor(), False)
+
+    if modelType == 'bert':
+        recommendations = calculate_similarity_bert_bulk(job_descriptions, module_list, False, top_k=resultLimit)
+    elif modelType == 'sklearn':
+        index = getTfidfIndex(module_list)
+        recommendations = []
+        for job in job_descriptions:
+            with stage("similarity"):
+                matches, scores = index.search(f"{job['title']} {job['description']}", top_k=resultLimit)
+            recommendations.append([{**match, "score": round(float(score), 4)} for match, score in zip(matches, scores)])
+    else:
+        raise ValueError(f"Unsupported model type for bulk recommendations: {modelType}")
+
+    return {
+        "results": [
+            {"title": job["title"], "keywords": job["keywords"], "recModules": recModules}
+            for job, recModules in zip(jobs, recommendations)
+        ]
+    }
 
 
-def keywordsJobDescription(title: str, description: str, keywordNumber: int) -> JSONResponse:
+def keywordsJobDescription(title: str, description: str, keywordNumber: int) -> dict:
     """
     Extrahiert Schlüsselwörter aus der Stellenbeschreibung.
 
     :param title: Titel des Jobs.
     :param description: Beschreibung des Jobs.
     :param keywordNumber: Anzahl der zu extrahierenden Schlüsselwörter.
-    :return: JSONResponse mit den extrahierten Schlüsselwörtern.
+    :return: Dictionary mit den extrahierten Schlüsselwörtern.
     """
 
     evaluator = SectionEvaluator()
-    relevantDescription = evaluator.evaluateSection(description, relevance='important')
+    with stage("section_evaluation"):
+        relevantDescription = evaluator.evaluateSection(description, relevance='important')
     if relevantDescription:
         description = description
 
-    keywords = keywordExtraction(description, preprocess=False, top_n=keywordNumber)
-    jsonResponse = JSONResponse({
+    with stage("keyword_extraction"):
+        keywords = keywordExtraction(description, preprocess=False, top_n=keywordNumber)
+    return {
         "title": title,
         "description": description,
         "keywords": keywords
-    })
-    return jsonResponse
+    }
 
 
 print("jobModuleMain.py imported")
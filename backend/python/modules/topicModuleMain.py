@@ -1,15 +1,17 @@
+from functools import partial
 from typing import Dict, List
 from starlette.responses import JSONResponse
-from transformers import BertTokenizer, BertModel
-from utils.textPrepare import TextPreprocessor
-import torch
+from utils.textPrepare import preprocessTexts
+from utils.executor import mapInProcessPool
+from models.bertEncoder import embedTexts
+from models.embeddingIndex import indexStore
+from models.vectorIndex import NO_MATCH
+from utils.metrics import stage
+from utils.similarityMatrix import cosineSimilarityMatrix, topKIndices
+import numpy as np
 
 import pandas as pd
 
-# Load BERT model and tokenizer
-tokenizer = BertTokenizer.from_pretrained("bert-base-german-cased")
-model = BertModel.from_pretrained("bert-base-german-cased")
-
 #=============================================================================
 #                             PRE-GENERATED EMBEDDINGS
 #=============================================================================
@@ -25,66 +27,156 @@ def recommendModulesFromEmbeddings(topics: List[Dict[str, any]], modules: List[D
     Returns:
         Dictionary with recommended modules and their topic-specific scores
     """
-    import torch
-   
-    topic_similarities = {}
-    for topic in topics:
-        topic_id = topic['tId']
-        topic_vector = torch.tensor(topic['vector'])
-       
-        # Find top 3 modules for this topic
-        module_scores = []
-        for module in modules:
-            module_acronym = module['acronym']
-            module_vector = torch.tensor(module['vector'])
-           
-            similarity = calculate_similarity(topic_vector, module_vector)
-            module_scores.append({
-                "acronym": module_acronym,
-                "score": similarity
-            })
-       
-        top_modules = sorted(module_scores, key=lambda x: x["score"], reverse=True)[:3]
-        topic_similarities[topic_id] = top_modules
-   
+    if not topics or not modules:
+        return {"recModules": []}
+
+    return recommendModulesFromVectors(
+        [topic['tId'] for topic in topics],
+        np.asarray([topic['vector'] for topic in topics], dtype=np.float32),
+        [module['acronym'] for module in modules],
+        np.asarray([module['vector'] for module in modules], dtype=np.float32)
+    )
+
+
+def recommendModulesFromVectors(topic_ids: List[str], topic_vectors: np.ndarray, acronyms: List[str],
+                                module_vectors: np.ndarray) -> Dict[str, any]:
+    """
+    Generate module recommendations from topic and module vectors given as matrices.
+
+    Args:
+        topic_ids: Identifiers of the topics, one per row of topic_vectors
+        topic_vectors: Matrix of shape (topics, dimension)
+        acronyms: Acronyms of the modules, one per row of module_vectors
+        module_vectors: Matrix of shape (modules, dimension)
+
+    Returns:
+        Dictionary with recommended modules and their topic-specific scores
+    """
+    if not topic_ids or not acronyms:
+        return {"recModules": []}
+
+    # One normalized topics x modules score matrix instead of pairwise comparisons
+    with stage("similarity"):
+        scores = cosineSimilarityMatrix(topic_vectors, module_vectors)
+
+    with stage("aggregation"):
+        return {"recModules": aggregateTopModules(topic_ids, acronyms, scores, top_k=3)}
+
+
+def aggregateTopModules(topic_ids: List[str], acronyms: List[str], scores: np.ndarray, top_k: int = 3) -> List[Dict[str, any]]:
+    """
+    Aggregate the top-k modules of every topic into a ranked list of module recommendations.
+
+    Args:
+        topic_ids: Identifiers of the topics (rows of the score matrix)
+        acronyms: Acronyms of the modules (columns of the score matrix)
+        scores: Similarity matrix of shape (topics, modules)
+        top_k: Number of modules that are selected per topic
+
+    Returns:
+        Modules sorted by frequency and average score, each with the topics it was selected for
+    """
+    top_indices = topKIndices(scores, top_k)
+    return aggregateTopMatches(topic_ids, acronyms, top_indices, np.take_along_axis(scores, top_indices, axis=1))
+
+
+def aggregateTopMatches(topic_ids: List[str], acronyms: List[str], top_indices: np.ndarray,
+                        top_scores: np.ndarray) -> List[Dict[str, any]]:
+    """
+    Aggregate the selected modules of every topic (e.g. the result of a vector index search) into a ranked list.
+
+    Args:
+        topic_ids: Identifiers of the topics (rows of top_indices)
+        acronyms: Acronyms of the modules that top_indices refer to
+        top_indices: Module indices of shape (topics, k), best first, NO_MATCH for missing matches
+        top_scores: Similarities of shape (topics, k)
+
+    Returns:
+        Modules sorted by frequency and average score, each with the topics it was selected for
+    """
     module_recommendations = {}
-    for topic_id, top_modules in topic_similarities.items():
-        for module in top_modules:
-            acronym = module["acronym"]
-            similarity = module["score"]
-           
-            if acronym not in module_recommendations:
-                module_recommendations[acronym] = {
+    for topic_index, topic_id in enumerate(topic_ids):
+        for module_index, similarity in zip(top_indices[topic_index], top_scores[topic_index]):
+            if module_index == NO_MATCH:
+                continue
+            acronym = acronyms[module_index]
+            similarity = float(similarity)
+
+            recommendation = module_recommendations.get(acronym)
+            if recommendation is None:
+                recommendation = module_recommendations[acronym] = {
                     "acronym": acronym,
-                    "sources": [],
+                    "sources": {},
                     "total_score": 0.0,
                     "frequency": 0
                 }
-            
-            topic_exists = any(source["identifier"] == topic_id for source in module_recommendations[acronym]["sources"])
-            if not topic_exists:
-                module_recommendations[acronym]["sources"].append({
-                    "identifier": topic_id,
-                    "score": similarity
-                })
-           
-            module_recommendations[acronym]["total_score"] += similarity
-            module_recommendations[acronym]["frequency"] += 1
-   
+
+            # a topic is listed only once per module, even if an acronym occurs several times
+            recommendation["sources"].setdefault(topic_id, similarity)
+            recommendation["total_score"] += similarity
+            recommendation["frequency"] += 1
+
     # Calculate average score for each module
     for module in module_recommendations.values():
+        module["sources"] = [
+            {"identifier": identifier, "score": score} for identifier, score in module["sources"].items()
+        ]
         module["score"] = module["total_score"] / module["frequency"]
         del module["total_score"]
-   
+
     # Sort modules by frequency and score
-    sorted_modules = sorted(
+    return sorted(
         module_recommendations.values(),
         key=lambda x: (x["frequency"], x["score"]),
         reverse=True
     )
-   
-    # Return the sorted modules
-    return {"recModules": sorted_modules}
+
+#=============================================================================
+#                             INDEXED EMBEDDINGS
+#=============================================================================
+
+def recommendModulesFromIndex(module_index_name: str, topics: List[Dict[str, any]] = None, topic_ids: List[str] = None,
+                              topic_index_name: str = None, module_index_version: str = None,
+                              top_k: int = 3) -> Dict[str, any]:
+    """
+    Generate module recommendations against a module embedding index held by the server.
+
+    Args:
+        module_index_name: Name of the module index
+        topics: List of dictionaries with 'tId' and 'vector' for each topic
+        topic_ids: Topic ids whose vectors are looked up in the topic index (instead of 'topics')
+        topic_index_name: Name of the topic index used for 'topic_ids'
+        module_index_version: Expected version of the module index, None accepts any version
+        top_k: Number of modules that are selected per topic
+
+    Returns:
+        Dictionary with recommended modules and the version and revision of the module index
+    """
+    module_index = indexStore.get(module_index_name, module_index_version)
+
+    if topic_ids:
+        if not topic_index_name:
+            raise ValueError("topic_index_name is required when topics are referenced by id")
+        identifiers = list(topic_ids)
+        topic_vectors = indexStore.get(topic_index_name).vectors(identifiers)
+    else:
+        topics = topics or []
+        identifiers = [topic['tId'] for topic in topics]
+        topic_vectors = np.asarray([topic['vector'] for topic in topics], dtype=np.float32)
+
+    recommendations = []
+    if identifiers:
+        # the index's vector index ('exact' or 'ivf') replaces scoring every module
+        with stage("similarity"):
+            acronyms, top_indices, top_scores = module_index.search(topic_vectors, top_k)
+        with stage("aggregation"):
+            recommendations = aggregateTopMatches(identifiers, acronyms, top_indices, top_scores)
+
+    return {
+        "recModules": recommendations,
+        "indexVersion": module_index.version,
+        "indexRevision": module_index.revision,
+    }
 
 #=============================================================================
 #                             LIVE-GENERATED EMBEDDINGS
@@ -100,52 +192,82 @@ def createEmbeddingsForTopics(topics: List[Dict[str, str]]) -> List[Dict[str, an
     :return: Eine Liste von Dictionaries mit 'name' und den zugehörigen Embeddings.
     """    
     
-    results = []
-    
-    for topic in topics:
-
-        name = topic.get("name", "")
-        description = topic.get("description", "")
-        
-        input_text = f"{name} {description}"
-        
-        inputs = tokenizer(input_text, return_tensors="pt", truncation=True, padding=True, max_length=512)
-        
-        with torch.no_grad():
-            outputs = model(**inputs)
-        
-        pooled_output = outputs.pooler_output
-        
-        embedding = pooled_output.squeeze().tolist()
-        
-        results.append({
+    names, embeddings = createEmbeddingMatrixForTopics(topics)
+
+    return [
+        {
             "name": name,
-            "embedding": embedding
-        })
-    
-    return results
+            "embedding": embedding.tolist()
+        }
+        for name, embedding in zip(names, embeddings)
+    ]
+
+
+def createEmbeddingMatrixForTopics(topics: List[Dict[str, str]]) -> tuple[List[str], np.ndarray]:
+    """
+    Berechnet die Embeddings für eine Liste von Topics als Matrix.
+
+    :param topics: Eine Liste von Dictionaries mit 'name' und 'description' für jedes Topic.
+    :return: Tuple aus den Namen der Topics und einer float32-Matrix mit einem Embedding je Topic.
+    """
+    names = [topic.get("name", "") for topic in topics]
+    input_texts = [f"{name} {topic.get('description', '')}" for name, topic in zip(names, topics)]
+
+    return names, embedTexts(input_texts, pooling='pooler')
+
+
+def embedTopicBatch(topics: List[Dict[str, str]], offset: int = 0) -> List[Dict[str, any]]:
+    """
+    Berechnet die Embeddings für einen Teil der Topics eines Streams (siehe /topic-embeddings/stream).
+    Schlägt der gemeinsame Aufruf fehl, werden die Topics einzeln berechnet, sodass nur die fehlerhaften
+    Topics einen Fehler-Eintrag erhalten.
+
+    :param topics: Eine Liste von Dictionaries mit 'name' und 'description' für jedes Topic.
+    :param offset: Position des ersten Topics in der gesamten Anfrage.
+    :return: Ein Eintrag je Topic, entweder {'type': 'embedding', ...} oder {'type': 'error', ...}.
+    """
+    try:
+        names, embeddings = createEmbeddingMatrixForTopics(topics)
+        return [
+            {"type": "embedding", "index": offset + position, "name": name, "embedding": embedding.tolist()}
+            for position, (name, embedding) in enumerate(zip(names, embeddings))
+        ]
+    except Exception:
+        if len(topics) == 1:
+            raise
+
+    records = []
+    for position, topic in enumerate(topics):
+        try:
+            records.extend(embedTopicBatch([topic], offset + position))
+        except Exception as e:
+            records.append({"type": "error", "index": offset + position, "name": topic.get("name", ""),
+                            "detail": str(e)})
+    return records
 
 
-def generate_embedding(text: str) -> torch.Tensor:
+def generate_embeddings(texts: List[str]) -> np.ndarray:
     """
-    Generate a BERT embedding for the given text.
+    Generate BERT embeddings for the given texts in batches.
     """
-    inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True, max_length=512)
-    outputs = model(**inputs)
-    return outputs.pooler_output.squeeze()
+    return embedTexts(texts, pooling='pooler')
 
 def recommendModulesFromTopics(topics: List[Dict[str, str]], modules: List[Dict[str, str]]) -> List[Dict[str, any]]:
     """
     Generate module recommendations for a list of topics.
     """
     
-    text_preprocessor = TextPreprocessor()
+    # all texts are preprocessed in one go (optionally spread over the preprocessing processes)
+    texts = [text for topic in topics for text in (topic["name"], topic["description"])] + \
+            [text for module in modules for text in (module["name"], module["content"], module.get("skills", ""))]
+    with stage("preprocessing"):
+        processed = iter(mapInProcessPool(partial(preprocessTexts, splitResult=False), texts))
 
     preprocessed_topics = [
         {
             "tId": topic["tId"],
-            "name": text_preprocessor.preprocessText(topic["name"], splitResult=False),
-            "description": text_preprocessor.preprocessText(topic["description"], splitResult=False),
+            "name": next(processed),
+            "description": next(processed),
         }
         for topic in topics
     ]
@@ -153,80 +275,87 @@ def recommendModulesFromTopics(topics: List[Dict[str, str]], modules: List[Dict[
     preprocessed_modules = [
         {
             "acronym": module["acronym"],
-            "name": text_preprocessor.preprocessText(module["name"], splitResult=False),
-            "content": text_preprocessor.preprocessText(module["content"], splitResult=False),
-            "skills": text_preprocessor.preprocessText(module.get("skills", ""), splitResult=False),
+            "name": next(processed),
+            "content": next(processed),
+            "skills": next(processed),
         }
         for module in modules
     ]
 
-    topic_embeddings = [
-        generate_embedding(f"{topic['name']} {topic['description']}") for topic in preprocessed_topics
-    ]
+    topic_embeddings = generate_embeddings(
+        [f"{topic['name']} {topic['description']}" for topic in preprocessed_topics]
+    )
 
-    module_embeddings = [
-        generate_embedding(f"{module['name']} {module['name']} {module['content']} {module['skills']}")  # Double weight for 'name'
-        for module in preprocessed_modules
-    ]
+    module_embeddings = generate_embeddings(
+        [f"{module['name']} {module['name']} {module['content']} {module['skills']}"  # Double weight for 'name'
+         for module in preprocessed_modules]
+    )
 
-    similarities = []
-    for topic_index, topic_embedding in enumerate(topic_embeddings):
-        topic = preprocessed_topics[topic_index]
-        for module, module_embedding in zip(preprocessed_modules, module_embeddings):
-            similarity_score = calculate_similarity(topic_embedding, module_embedding)
-            similarities.append({
-                "acronym": module["acronym"],
-                "type": "topic",
-                "identifier": topic["tId"],
-                "score": similarity_score,
-            })
+    if not preprocessed_topics or not preprocessed_modules:
+        return []
 
-    module_recommendations = {}
-    for similarity in similarities:
-        acronym = similarity["acronym"]
-        if acronym not in module_recommendations:
-            module_recommendations[acronym] = {
-                "acronym": acronym,
-                "source": [],
-                "frequency": 0,
-                "score": 0.0,
-            }
-
-        module_recommendations[acronym]["source"].append({
-            "type": similarity["type"],
-            "identifier": similarity["identifier"],
-            "score": similarity["score"],
-        })
-        module_recommendations[acronym]["frequency"] += 1
-        module_recommendations[acronym]["score"] += similarity["score"]
+    # topics x modules score matrix
+    with stage("similarity"):
+        scores = cosineSimilarityMatrix(topic_embeddings, module_embeddings).astype(np.float64)
+
+    with stage("aggregation"):
+        return aggregateTopicScores(preprocessed_topics, preprocessed_modules, scores)
+
+
+def aggregateTopicScores(preprocessed_topics: List[Dict[str, str]], preprocessed_modules: List[Dict[str, str]],
+                         scores: np.ndarray) -> List[Dict[str, any]]:
+    """
+    Merge the scores of modules with the same acronym and select the three modules with the best average score.
+
+    Args:
+        preprocessed_topics: Topics with 'tId' (rows of the score matrix)
+        preprocessed_modules: Modules with 'acronym' (columns of the score matrix)
+        scores: Similarity matrix of shape (topics, modules)
+
+    Returns:
+        The top modules with their average score, frequency and topic-specific scores
+    """
+    # modules with the same acronym are merged into one recommendation
+    group_of_acronym = {}
+    module_groups = np.array([
+        group_of_acronym.setdefault(module["acronym"], len(group_of_acronym)) for module in preprocessed_modules
+    ])
+    score_sums = np.zeros(len(group_of_acronym))
+    np.add.at(score_sums, module_groups, scores.sum(axis=0))
+    frequencies = np.bincount(module_groups) * len(preprocessed_topics)
 
     # normalize scores by frequency to get the average similarity
-    for module_data in module_recommendations.values():
-        module_data["score"] /= module_data["frequency"]
+    average_scores = score_sums / frequencies
+
+    acronyms = list(group_of_acronym)
+    top_modules = []
+    for group in topKIndices(average_scores, 3)[0]:
+        columns = np.flatnonzero(module_groups == group)
+        top_modules.append({
+            "acronym": acronyms[group],
+            "source": [
+                {
+                    "type": "topic",
+                    "identifier": topic["tId"],
+                    "score": float(scores[topic_index, column]),
+                }
+                for topic_index, topic in enumerate(preprocessed_topics)
+                for column in columns
+            ],
+            "frequency": int(frequencies[group]),
+            "score": float(average_scores[group]),
+        })
 
-    # convert to sorted list of top recommendations
-    top_modules = sorted(
-        module_recommendations.values(),
-        key=lambda x: x["score"],
-        reverse=True
-    )[:3]
-    
     return top_modules
 
 #=============================================================================
 #                             COMMON
 #=============================================================================
 
-def calculate_similarity(embedding1: torch.Tensor, embedding2: torch.Tensor) -> float:
+def calculate_similarity(embedding1: np.ndarray, embedding2: np.ndarray) -> float:
     """
     Calculate cosine similarity between two embeddings.
     """
-    if len(embedding1.shape) > 1:
-        embedding1 = embedding1.squeeze()
-    if len(embedding2.shape) > 1:
-        embedding2 = embedding2.squeeze()
-    if embedding1.shape != embedding2.shape:
-        raise ValueError(f"Dimension mismatch: {embedding1.shape} vs {embedding2.shape}")
-    return torch.nn.functional.cosine_similarity(embedding1, embedding2, dim=0).item()
+    return float(cosineSimilarityMatrix(embedding1, embedding2)[0, 0])
 
 print("topicModuleMain.py imported")
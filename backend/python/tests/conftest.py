@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Die Tests importieren die Module wie die API relativ zu backend/python
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -0,0 +1,33 @@
+import os
+
+import numpy as np
+import pytest
+
+from models.embeddingIndex import EmbeddingIndexStore
+from models.embeddingStore import EmbeddingStore, loadStoreDirectory, writeEmbeddingStore
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_truncatedStoreIsRejected(tmp_path, dtype):
+    path = str(tmp_path / "modules.baemb")
+    writeEmbeddingStore(path, ["M1", "M2"], np.eye(2, 8), "1", dtype)
+    os.truncate(path, os.path.getsize(path) - 4)
+
+    with pytest.raises(ValueError):
+        EmbeddingStore(path)
+
+
+def test_loadStoreDirectorySkipsCorruptStores(tmp_path):
+    writeEmbeddingStore(str(tmp_path / "modules.baemb"), ["M1", "M2"], np.eye(2, 8), "1")
+    writeEmbeddingStore(str(tmp_path / "topics.baemb"), ["T1", "T2"], np.eye(2, 8), "1")
+    truncated = str(tmp_path / "topics.baemb")
+    os.truncate(truncated, 20)
+    (tmp_path / "empty.baemb").write_bytes(b"")
+    store = EmbeddingIndexStore()
+
+    names = loadStoreDirectory(str(tmp_path), store)
+
+    assert names == ["modules"]
+    assert store.get("modules").ids == ["M1", "M2"]
+    with pytest.raises(KeyError):
+        store.get("topics")
@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from utils.similarityMatrix import topKIndices
+
+
+def test_topKIndicesKeepsSmallerIndexOnTiesAtBoundary():
+    scores = np.array([
+        [0.5, 0.9, 0.5, 0.5, 0.1, 0.5],
+        [0.2, 0.2, 0.2, 0.2, 0.2, 0.2],
+    ])
+
+    assert topKIndices(scores, 2).tolist() == [[1, 0], [0, 1]]
+    assert topKIndices(scores, 3).tolist() == [[1, 0, 2], [0, 1, 2]]
+
+
+@pytest.mark.parametrize("k", [1, 3, 7, 12])
+def test_topKIndicesMatchesStableSort(k):
+    scores = np.random.default_rng(0).integers(0, 3, size=(50, 10)).astype(np.float32)
+
+    expected = [sorted(range(10), key=lambda column: -row[column])[:k] for row in scores]
+
+    assert topKIndices(scores, k).tolist() == expected
@@ -0,0 +1,23 @@
+import pytest
+
+from utils.vectorCodec import VECTOR_MEDIA_TYPE, resolveRequestDtype
+
+
+@pytest.mark.parametrize("contentType, bodyDtype, expected", [
+    (VECTOR_MEDIA_TYPE, None, "float32"),
+    (f"{VECTOR_MEDIA_TYPE}; dtype=float16", None, "float16"),
+    (VECTOR_MEDIA_TYPE, "float16", "float16"),
+    (f"{VECTOR_MEDIA_TYPE}; dtype=float16", "float16", "float16"),
+])
+def test_resolveRequestDtype(contentType, bodyDtype, expected):
+    assert resolveRequestDtype(contentType, bodyDtype) == expected
+
+
+def test_resolveRequestDtypeRejectsConflict():
+    with pytest.raises(ValueError):
+        resolveRequestDtype(f"{VECTOR_MEDIA_TYPE}; dtype=float16", "float32")
+
+
+def test_resolveRequestDtypeRejectsUnknownDtype():
+    with pytest.raises(ValueError):
+        resolveRequestDtype(f"{VECTOR_MEDIA_TYPE}; dtype=int4")
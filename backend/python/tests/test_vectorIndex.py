@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from models.embeddingIndex import EmbeddingIndex
+from models.vectorIndex import NO_MATCH, createVectorIndex
+
+
+@pytest.mark.parametrize("kind", ["exact", "ivf"])
+def test_emptyIndexReturnsNoMatches(kind):
+    index = createVectorIndex(kind).build([], np.empty((0, 4), dtype=np.float32))
+
+    indices, scores = index.search(np.ones((2, 4)), 3)
+
+    assert indices.shape == (2, 0)
+    assert scores.shape == (2, 0)
+
+
+@pytest.mark.parametrize("kind", ["exact", "ivf"])
+def test_singleVectorIndex(kind):
+    index = createVectorIndex(kind).build(["M1"], np.array([[1.0, 0.0, 0.0]]))
+
+    indices, scores = index.search(np.array([[1.0, 1.0, 0.0], [0.0, 0.0, 1.0]]), 3)
+
+    assert indices.tolist() == [[0], [0]]
+    assert scores[0, 0] == pytest.approx(np.sqrt(0.5), abs=1e-6)
+
+
+@pytest.mark.parametrize("kind", ["exact", "ivf"])
+def test_emptyIndexAcceptsVectorsLater(kind):
+    index = createVectorIndex(kind).build([], np.empty((0, 2), dtype=np.float32))
+
+    index.add(["M1", "M2"], np.array([[1.0, 0.0], [0.0, 1.0]]))
+    indices, _ = index.search(np.array([[0.0, 1.0]]), 1)
+
+    assert index.ids[indices[0, 0]] == "M2"
+
+
+def test_ivfEmbeddingIndexAfterDeletingAllIds():
+    embeddingIndex = EmbeddingIndex("handbook", "v1", 3, indexType="ivf")
+    embeddingIndex.load(["M1", "M2"], np.eye(3)[:2], "v1")
+    embeddingIndex.search(np.eye(3)[:1], 2)
+
+    embeddingIndex.delete(["M1", "M2"])
+    ids, indices, scores = embeddingIndex.search(np.eye(3)[:1], 2)
+
+    assert indices.shape == (1, 0)
+    assert not (indices == NO_MATCH).any()
+
+
+def test_applyChangesIndexInOneRevision():
+    index = EmbeddingIndex("modules", "1", 2)
+    index.load(["M1", "M2"], np.array([[1.0, 0.0], [0.0, 1.0]]), "1")
+    revision = index.revision
+
+    removed = index.apply(["M3"], np.array([[1.0, 1.0]]), ["M1"], version="2")
+
+    assert removed == 1
+    assert index.ids == ["M2", "M3"]
+    assert index.version == "2"
+    assert index.revision == revision + 1
+
+
+def test_applyWithoutChangesKeepsRevision():
+    index = EmbeddingIndex("modules", "1", 2)
+    index.load(["M1"], np.array([[1.0, 0.0]]), "1")
+    revision = index.revision
+
+    assert index.apply([], [], [], version="2") == 0
+    assert index.version == "1"
+    assert index.revision == revision
@@ -0,0 +1,160 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Speicherbudget des In-Memory-Caches in MB
+EMBEDDING_CACHE_MB = float(os.getenv("EMBEDDING_CACHE_MB", "256"))
+# Optionales Verzeichnis für den persistenten Cache (leer = nur im Speicher)
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "")
+# Speicherbudget und Verzeichnis des Caches für Kandidatenwörter der Schlüsselwortextraktion
+KEYWORD_CACHE_MB = float(os.getenv("KEYWORD_CACHE_MB", "32"))
+KEYWORD_CACHE_DIR = os.getenv("KEYWORD_CACHE_DIR", "")
+
+
+class EmbeddingCache:
+    def __init__(self, maxBytes: int, directory: str = None):
+        """
+        Initialisiert einen inhaltsadressierten Cache für Embeddings mit einer LRU-Stufe im Speicher
+        und einer optionalen Stufe auf der Festplatte, die Neustarts übersteht.
+
+        :param maxBytes: Maximale Größe aller Vektoren im Speicher in Bytes.
+        :param directory: Verzeichnis für die Festplattenstufe oder None.
+        :return: None
+        """
+        self.maxBytes = maxBytes
+        self.directory = directory or None
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.diskHits = 0
+        self.misses = 0
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def makeKey(modelId: str, pooling: str, text: str) -> str:
+        """
+        Bildet den Schlüssel eines Embeddings aus Modell, Pooling und (vorverarbeitetem) Text.
+
+        :param modelId: Name des Modells.
+        :param pooling: Pooling-Modus, mit dem das Embedding berechnet wurde.
+        :param text: Der Text, zu dem das Embedding gehört.
+        :return: SHA-256-Hash als Hex-String.
+        """
+        return hashlib.sha256(f"{modelId}\x00{pooling}\x00{text}".encode('utf-8')).hexdigest()
+
+    def get(self, key: str):
+        """
+        Sucht ein Embedding zuerst im Speicher und danach auf der Festplatte.
+
+        :param key: Schlüssel aus makeKey.
+        :return: Das Embedding als (schreibgeschütztes) Numpy-Array oder None.
+        """
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector
+
+        vector = self._readDisk(key)
+        with self._lock:
+            if vector is None:
+                self.misses += 1
+                return None
+            self.diskHits += 1
+            self._store(key, vector)
+        return vector
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        """
+        Legt ein Embedding im Cache ab.
+
+        :param key: Schlüssel aus makeKey.
+        :param vector: Das Embedding.
+        :return: None
+        """
+        vector = np.array(vector, dtype=np.float32)
+        vector.setflags(write=False)
+        with self._lock:
+            self._store(key, vector)
+        self._writeDisk(key, vector)
+
+    def stats(self) -> dict:
+        """
+        Gibt die Kennzahlen des Caches zurück.
+
+        :return: Dictionary mit Trefferzahlen, Anzahl Einträgen und belegtem Speicher.
+        """
+        with self._lock:
+            lookups = self.hits + self.diskHits + self.misses
+            return {
+                "hits": self.hits,
+                "diskHits": self.diskHits,
+                "misses": self.misses,
+                "hitRate": round((self.hits + self.diskHits) / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "maxBytes": self.maxBytes,
+                "directory": self.directory,
+            }
+
+    def clear(self) -> None:
+        """
+        Leert die Speicherstufe des Caches. Die Festplattenstufe bleibt erhalten.
+
+        :return: None
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _store(self, key: str, vector: np.ndarray) -> None:
+        """
+        Fügt einen Eintrag in die LRU-Stufe ein und verdrängt die ältesten Einträge, bis das Budget eingehalten ist.
+        Muss unter dem Lock aufgerufen werden.
+        """
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.nbytes
+        self._entries[key] = vector
+        self._bytes += vector.nbytes
+        while self._bytes > self.maxBytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.npy")
+
+    def _readDisk(self, key: str):
+        if not self.directory:
+            return None
+        try:
+            vector = np.load(self._path(key))
+        except (OSError, ValueError):
+            return None
+        vector.setflags(write=False)
+        return vector
+
+    def _writeDisk(self, key: str, vector: np.ndarray) -> None:
+        if not self.directory:
+            return
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporaryPath = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporaryPath, 'wb') as file:
+                np.save(file, vector)
+            os.replace(temporaryPath, path)
+        except OSError as e:
+            print(f"Error writing embedding cache: {e}")
+
+
+embeddingCache = EmbeddingCache(int(EMBEDDING_CACHE_MB * 1024 * 1024), EMBEDDING_CACHE_DIR)
+keywordEmbeddingCache = EmbeddingCache(int(KEYWORD_CACHE_MB * 1024 * 1024), KEYWORD_CACHE_DIR)
@@ -1,57 +1,81 @@
+import json
 import os
 import sys
 import re
+from functools import lru_cache
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'Transformer'))
 import utils.textPrepare as tp
 
 
+# Datei mit den wichtigen und unwichtigen Überschriften von Stellenanzeigen
+HEADINGS_FILE = os.path.join(os.path.dirname(__file__), '..', 'staticdata', 'section-headings.json')
+
+
+class HeadingMatcher:
+    def __init__(self, headings: list[str]):
+        """
+        Kompiliert eine Liste von Überschriften einmalig zu einem kombinierten regulären Ausdruck,
+        sodass jede Zeile in einem Durchlauf gegen alle Überschriften geprüft wird.
+
+        :param headings: Liste der Überschriften (Groß- und Kleinschreibung wird ignoriert).
+        :return: None
+        """
+        self.headings = list(headings)
+        self._lowered = [heading.lower() for heading in self.headings]
+        alternatives = sorted(set(self._lowered), key=len, reverse=True)
+        self._pattern = re.compile('|'.join(re.escape(heading) for heading in alternatives)) if alternatives else None
+
+    def matches(self, loweredLine: str) -> bool:
+        """
+        Prüft, ob eine der Überschriften in der Zeile vorkommt.
+
+        :param loweredLine: Die Zeile in Kleinbuchstaben.
+        :return: True, wenn mindestens eine Überschrift enthalten ist.
+        """
+        return self._pattern is not None and self._pattern.search(loweredLine) is not None
+
+    def firstHeading(self, loweredLine: str):
+        """
+        Gibt die erste Überschrift der Liste zurück, die in der Zeile vorkommt (für die Markierung im Entwicklungsmodus).
+
+        :param loweredLine: Die Zeile in Kleinbuchstaben.
+        :return: Die Überschrift in ihrer ursprünglichen Schreibweise oder None.
+        """
+        for heading, lowered in zip(self.headings, self._lowered):
+            if lowered in loweredLine:
+                return heading
+        return None
+
+
+@lru_cache(maxsize=None)
+def loadHeadingMatchers(path: str) -> tuple[HeadingMatcher, HeadingMatcher]:
+    """
+    Lädt die Überschriften aus einer JSON-Datei ({"important": [...], "unimportant": [...]}) und kompiliert sie.
+    Das Ergebnis wird pro Datei nur einmal berechnet.
+
+    :param path: Pfad zur JSON-Datei.
+    :return: Tuple aus den Matchern für wichtige und unwichtige Überschriften.
+    """
+    with open(path, encoding='utf-8') as file:
+        headings = json.load(file)
+    return HeadingMatcher(headings.get('important', [])), HeadingMatcher(headings.get('unimportant', []))
+
+
 class SectionEvaluator:
-    def __init__(self):
+    def __init__(self, headingsFile: str = HEADINGS_FILE):
         """
-        Initialisiert die SectionEvaluator-Klasse mit vordefinierten wichtigen und weniger wichtigen Überschriften.
+        Initialisiert die SectionEvaluator-Klasse mit den wichtigen und weniger wichtigen Überschriften aus der Überschriften-Datei.
+
+        :param headingsFile: Pfad zur JSON-Datei mit den Überschriften (default: staticdata/section-headings.json).
         """
         self.tp = tp.TextPreprocessor()
 
+        self.importantMatcher, self.unimportantMatcher = loadHeadingMatchers(os.path.abspath(headingsFile))
+
         # Listen für importante und unimportante Überschriften
-        self.importante_ueberschriften = [
-            'Anforderungen', 'Anforderungsprofil', 'Aufgaben warten auf Sie',
-            'DAS BRINGST DU MIT', 'DAS ERWARTET DICH', "Darum geht's",
-            'Das bringen Sie mit', 'Das bringst Du mit', 'Das erwartet Dich', 'Das erwartet Sie',
-            'Das machst du als Systemadministrator', 'Das sollte Dir Spaß machen',
-            'Das werden Sie machen', 'Deine Aufgaben', 'Deine Mission:', 'Der Job',
-            'Diese Aufgaben können dich erwarten', 'Diese Herausforderungen übernimmst du',
-            'Erfahrungen im Bereich', 'Hauptaufgaben', 'IHR AUFGABENBEREICH',
-            'Ihr Profil', 'Ihre Aufgaben', 'Kenntnisse im Bereich',
-            'Mit diesen Skills begeisterst du uns', 'Persönliche Kompetenzen',
-            'Qualifikationen', 'Qualitfikation', 'Sie bringen mit',
-            'Sie sind zuständig für', 'Spannende Aufgaben', 'Tätigkeiten',
-            'Voraussetzungen', 'Was Sie bei uns machen', 'Was erwartet Sie',
-            'Wir unterstützen', 'Womit du uns überzeugst',
-            'Zuständigkeiten', 'aufgaben warten auf dich', 'dein Aufgabenbereich',
-            'dein Aufgabengebiet', 'deine Aufgabengebiete', 'dein Profil', 'deine Position', 'erwarten wir',
-            'ihr aufgabengebiet', 'ihre aufgabengebiete', 'mitbringen müssen', 'mitbringen solltest',
-            'persönliche FähigkeitenAufgabenschwerpunkte', 'sollten Sie mitbringen',
-            'solltest du mitbringen', 'verstehen Sie es', 'was sie erwartet',
-            'wir erwarten', 'zeichnet dich aus', 'Ihr Know-How', 'Dein neuer Job',
-            'unsere Anfroderungen', 'Wer Sie sind', 'Wünschenswert', 'folgende Skills'
-        ]
-
-        self.unimportante_ueberschriften = [
-            'Arbeitsort', 'Attraktive Bedingungen', 'bieten wir',
-            'Bei uns inklusive', 'Benefits', 'Dafür steht',
-            'Das dürfen Sie erwarten', 'Das erwartet dich bei uns',
-            'Das gibt es für Dich', 'Datenschutzhinweis', 'Deine Benefits',
-            'Entdecke die fantastischen Benefits, die auf Dich warten',
-            'Gute Gründe, um ins Team zu kommen', 'Haben wir Ihr Interesse geweckt?',
-            'Ihr Partner', 'Ihre Bewerbung', 'Kontakt', 'Kontakt und Informationen',
-            'Satte Rabatte', 'Sie haben noch Fragen', 'Standort', 'Unser Angebot',
-            'Vorteile', 'Warum gerade wir', 'Was wir Dir bieten',
-            'Was wir Ihnen bieten können', 'Weitere Hinweise', 'Wir bieten',
-            'Wir ihnen bieten', 'von uns', 'warum wir', 'wissen solltest',
-            'Über', 'Interessiert?', 'Warum zu', 'Ihre Perspektiven',
-            'wir garentieren', 'Wir freuen uns',
-        ]
+        self.importante_ueberschriften = self.importantMatcher.headings
+        self.unimportante_ueberschriften = self.unimportantMatcher.headings
 
     def evaluateSection(self, text, dev=False, relevance='all'):
         """
@@ -62,7 +86,6 @@ class SectionEvaluator:
         :param relevance: Gibt die Relevanz der zurückgegebenen Abschnitte an ('unimportant', oder 'all').
         :return: Ein zusammengefasster String der bewerteten Abschnitte mit Kennzeichnungen für wichtige und weniger wichtige Abschnitte.
         """
-        print("start: evaluateSection")
         # Aufteilen des Textes in Zeilen
         lines = re.split(r'[\n\t]', text)
         previousRelevance = None  # True = important, False = unimportant
@@ -76,14 +99,14 @@ class SectionEvaluator:
                 # Wenn der Absatz leer oder zu lange ist, überspringen
                 continue
 
-            unimportant_named = False
+            lowered = absatz_stripped.lower()
+
             # Überprüfen auf unimportante Überschriften und deren Markierung
-            for ue in self.unimportante_ueberschriften:
-                if ue.lower() in absatz_stripped.lower():
-                    if dev:
-                        absatz_stripped = absatz_stripped.replace(ue, f"*{ue}*")
-                    unimportant_named = True
-                    break
+            unimportant_named = self.unimportantMatcher.matches(lowered)
+            if unimportant_named and dev:
+                ue = self.unimportantMatcher.firstHeading(lowered)
+                absatz_stripped = absatz_stripped.replace(ue, f"*{ue}*")
+                lowered = absatz_stripped.lower()
 
             if unimportant_named and (relevance == 'all' or relevance == 'unimportant'):
                 if relevance == 'all':
@@ -91,14 +114,11 @@ class SectionEvaluator:
                 result_lines.append(absatz_stripped)
                 previousRelevance = False
 
-            important_named = False
             # Überprüfen auf importante Überschriften und deren Markierung
-            for ue in self.importante_ueberschriften:
-                if ue.lower() in absatz_stripped.lower() and len(absatz_stripped) < 100:
-                    if dev:
-                        absatz_stripped = absatz_stripped.replace(ue, f"*{ue}*")
-                    important_named = True
-                    break
+            important_named = len(absatz_stripped) < 100 and self.importantMatcher.matches(lowered)
+            if important_named and dev:
+                ue = self.importantMatcher.firstHeading(lowered)
+                absatz_stripped = absatz_stripped.replace(ue, f"*{ue}*")
 
             if important_named and (relevance == 'all' or relevance == 'important'):
                 # Wenn eine importante Überschrift gefunden wird
@@ -0,0 +1,146 @@
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from utils.metrics import EXECUTOR_RUNNING, QUEUE_DEPTH, stage
+from utils.profiling import runProfiled
+
+# Anzahl der Threads für Modell-Inferenz (torch, KeyBERT) außerhalb der Event-Loop
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "4"))
+# Anzahl der Prozesse für die reine Python-Vorverarbeitung (0 = im Inferenz-Thread)
+PREPROCESS_PROCESSES = int(os.getenv("PREPROCESS_PROCESSES", "0"))
+# Anzahl der Texte, die einem Vorverarbeitungsprozess auf einmal übergeben werden
+PREPROCESS_CHUNK_SIZE = int(os.getenv("PREPROCESS_CHUNK_SIZE", "64"))
+# Maximale Anzahl gleichzeitig laufender Anfragen je Endpunkt, z.B. "job-keywords=1,recommend-modules-for-job=2"
+DEFAULT_ENDPOINT_CONCURRENCY = int(os.getenv("DEFAULT_ENDPOINT_CONCURRENCY", str(INFERENCE_THREADS)))
+ENDPOINT_CONCURRENCY = {
+    name.strip(): int(limit)
+    for name, _, limit in (entry.partition('=') for entry in os.getenv("ENDPOINT_CONCURRENCY", "").split(','))
+    if name.strip() and limit.strip()
+}
+
+inferenceExecutor = ThreadPoolExecutor(max_workers=INFERENCE_THREADS, thread_name_prefix="inference")
+# Label von baula_queue_depth für Aufträge, die an den Inferenz-Thread-Pool übergeben, aber noch nicht gestartet sind
+EXECUTOR_QUEUE = "inference-executor"
+
+_limiters = {}
+_preprocessPool = None
+_preprocessPoolLock = threading.Lock()
+
+
+def endpointLimiter(endpoint: str) -> asyncio.Semaphore:
+    """
+    Gibt die Semaphore zurück, die die gleichzeitigen Anfragen eines Endpunkts begrenzt.
+
+    :param endpoint: Name des Endpunkts (z.B. 'job-keywords').
+    :return: Die Semaphore des Endpunkts.
+    """
+    limiter = _limiters.get(endpoint)
+    if limiter is None:
+        limiter = _limiters[endpoint] = asyncio.Semaphore(ENDPOINT_CONCURRENCY.get(endpoint, DEFAULT_ENDPOINT_CONCURRENCY))
+    return limiter
+
+
+async def runBlocking(endpoint: str, fn, *args, **kwargs):
+    """
+    Führt eine blockierende Funktion im Inferenz-Thread-Pool aus, damit die Event-Loop weitere Anfragen
+    (z.B. Health-Checks) bedienen kann. Die Anzahl gleichzeitiger Aufrufe je Endpunkt ist begrenzt.
+    Wird die Anfrage profiliert (siehe utils/profiling.py), läuft fn unter cProfile und dem torch-Profiler.
+
+    :param endpoint: Name des Endpunkts, dessen Limit gilt.
+    :param fn: Die auszuführende Funktion.
+    :param args: Positionsargumente für fn.
+    :param kwargs: Schlüsselwortargumente für fn.
+    :return: Der Rückgabewert von fn.
+    """
+    limiter = endpointLimiter(endpoint)
+    # Wartende Anfragen je Endpunkt (baula_queue_depth) und ihre Wartezeit (Schritt 'queue_wait')
+    QUEUE_DEPTH.inc(queue=endpoint)
+    try:
+        with stage("queue_wait"):
+            await limiter.acquire()
+    finally:
+        QUEUE_DEPTH.dec(queue=endpoint)
+
+    # Übergebene, noch nicht gestartete Aufträge; leaveQueue zählt einen Auftrag genau einmal heraus,
+    # entweder beim Start im Thread oder, falls er vorher abgebrochen wird, hier nach dem Warten
+    QUEUE_DEPTH.inc(queue=EXECUTOR_QUEUE)
+    pending = [True]
+    pendingLock = threading.Lock()
+
+    def leaveQueue() -> None:
+        with pendingLock:
+            if pending[0]:
+                pending[0] = False
+                QUEUE_DEPTH.dec(queue=EXECUTOR_QUEUE)
+
+    try:
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(inferenceExecutor,
+                                          functools.partial(context.run, _runTracked, leaveQueue, fn, *args, **kwargs))
+    finally:
+        leaveQueue()
+        limiter.release()
+
+
+def _runTracked(leaveQueue, fn, *args, **kwargs):
+    leaveQueue()
+    EXECUTOR_RUNNING.inc()
+    try:
+        return runProfiled(fn, *args, **kwargs)
+    finally:
+        EXECUTOR_RUNNING.dec()
+
+
+def preprocessPool():
+    """
+    Gibt den Prozess-Pool für die Vorverarbeitung zurück und legt ihn beim ersten Zugriff an.
+    Die Prozesse werden mit 'spawn' gestartet, damit sie keine Threads oder Modelle des Elternprozesses erben.
+
+    :return: Der ProcessPoolExecutor oder None, wenn PREPROCESS_PROCESSES 0 ist.
+    """
+    global _preprocessPool
+    if PREPROCESS_PROCESSES <= 0:
+        return None
+    with _preprocessPoolLock:
+        if _preprocessPool is None:
+            _preprocessPool = ProcessPoolExecutor(max_workers=PREPROCESS_PROCESSES,
+                                                  mp_context=multiprocessing.get_context('spawn'))
+        return _preprocessPool
+
+
+def mapInProcessPool(fn, items: list, chunkSize: int = None) -> list:
+    """
+    Verteilt eine Liste in Blöcken auf den Prozess-Pool. fn erhält jeweils einen Block (Liste)
+    und muss eine Liste gleicher Länge zurückgeben. Ohne Prozess-Pool oder bei kleinen Listen
+    wird fn direkt im aufrufenden Thread ausgeführt.
+
+    :param fn: Auf Modulebene definierte (picklebare) Funktion.
+    :param items: Die zu verarbeitenden Elemente.
+    :param chunkSize: Größe der Blöcke (default: PREPROCESS_CHUNK_SIZE).
+    :return: Die Ergebnisse in der Reihenfolge der Eingabe.
+    """
+    chunkSize = chunkSize or PREPROCESS_CHUNK_SIZE
+    pool = preprocessPool()
+    if pool is None or len(items) <= chunkSize:
+        return fn(items)
+    chunks = [items[start:start + chunkSize] for start in range(0, len(items), chunkSize)]
+    return [result for chunk in pool.map(fn, chunks) for result in chunk]
+
+
+def shutdownExecutors() -> None:
+    """
+    Beendet den Prozess-Pool der Vorverarbeitung (beim Herunterfahren der API).
+
+    :return: None
+    """
+    global _preprocessPool
+    with _preprocessPoolLock:
+        if _preprocessPool is not None:
+            _preprocessPool.shutdown(cancel_futures=True)
+            _preprocessPool = None
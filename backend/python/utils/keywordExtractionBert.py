@@ -1,11 +1,19 @@
-from keybert import KeyBERT
-from nltk.corpus import stopwords
+import os
 import re
+from functools import lru_cache
 
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
 
-german_stop_words = stopwords.words('german')
+from models.modelRegistry import registry, KEYBERT_MODEL_NAME
+from utils.embeddingCache import keywordEmbeddingCache, EmbeddingCache
+from utils.metrics import stage
+from utils.textPrepare import stopWordSet
+
+# Alle Sätze einer Stellenanzeige gemeinsam kodieren statt KeyBERT je Satz aufzurufen
+KEYWORD_BATCHED = os.getenv("KEYWORD_BATCHED", "true").lower() == "true"
 
-kw_model = KeyBERT()
 
 custom_stopwords = [
     "verantwortlich", "team", "projekt", "abgeschlossen",
@@ -40,8 +48,16 @@ custom_stopwords = [
     "m", "w", "d"
 ]
 
-# Kombinierte Liste von Stoppwörtern
-combined_stopwords = list(german_stop_words) + custom_stopwords
+
+@lru_cache(maxsize=None)
+def combinedStopwords() -> list[str]:
+    """
+    Kombiniert die NLTK-Stoppwörter mit custom_stopwords. Die NLTK-Liste wird erst beim ersten Aufruf geladen
+    (und bei Bedarf heruntergeladen), nicht schon beim Import.
+
+    :return: Die Stoppwörter für den CountVectorizer.
+    """
+    return sorted(stopWordSet('german')) + custom_stopwords
 
 def keywordExtraction(text: str, preprocess, top_n: int = 5):
     """
@@ -53,9 +69,8 @@ def keywordExtraction(text: str, preprocess, top_n: int = 5):
     :return: Ein Komma-getrennter String von extrahierten Schlüsselwörtern.
     """
     if text:
-        print("start: keywordExtraction")
-
         # Splitten des Texts basierend auf '.', '!', '?' und Zeilenumbrüchen
+        wordEmbeddings = {}
         if preprocess:
             all_keywords = re.split(' ', text)
         else:
@@ -66,15 +81,21 @@ def keywordExtraction(text: str, preprocess, top_n: int = 5):
 
             all_keywords = []
 
-            for sentence in split_text:
-                keyword = keywordCalculation(sentence)
-                if keyword:
-                    all_keywords.append(keyword[0][0])
+            if KEYWORD_BATCHED:
+                all_keywords, wordEmbeddings = sentenceKeywords(split_text)
+            else:
+                for sentence in split_text:
+                    keyword = keywordCalculation(sentence)
+                    if keyword:
+                        all_keywords.append(keyword[0][0])
 
 
         unique_keywords = list(set(all_keywords))
 
-        final_keywords = keywordCalculation(', '.join(unique_keywords), top_n=top_n)
+        if KEYWORD_BATCHED:
+            final_keywords = rankKeywords(', '.join(unique_keywords), top_n=top_n, wordEmbeddings=wordEmbeddings)
+        else:
+            final_keywords = keywordCalculation(', '.join(unique_keywords), top_n=top_n)
         keywords_string = [k[0] for k in final_keywords]
         return keywords_string
     else:
@@ -84,15 +105,126 @@ def keywordExtraction(text: str, preprocess, top_n: int = 5):
 def keywordCalculation(text: str, top_n: int = 1):
     """
     Berechnet die Schlüsselwörter für den gegebenen Text mithilfe des KeyBERT-Modells.
+    Die Embeddings der Kandidatenwörter kommen aus dem Wort-Cache (siehe embedWords).
 
     :param text: Der Text, für den die Schlüsselwörter berechnet werden sollen.
     :param top_n: Die maximale Anzahl von Schlüsselwörtern, die zurückgegeben werden sollen (default: 1).
     :return: Eine Liste der ermittelten Schlüsselwörter.
     """
+    if not text:
+        return []
+    count = candidateVectorizer()
+    try:
+        count.fit([text])
+    except ValueError:
+        # Der Text enthält nur Stoppwörter
+        return []
+    kw_model = registry.getKeyBERT()
     keyword = kw_model.extract_keywords(
         text,
-        keyphrase_ngram_range=(1, 1),
+        vectorizer=count,
         top_n=top_n,
-        stop_words=combined_stopwords
+        word_embeddings=embedWords(count.get_feature_names_out())
     )
     return keyword
+
+
+def candidateVectorizer() -> CountVectorizer:
+    """
+    Erzeugt den CountVectorizer, mit dem KeyBERT die Kandidatenwörter eines Textes bestimmt.
+
+    :return: Ein noch nicht trainierter CountVectorizer (Unigramme ohne Stoppwörter).
+    """
+    return CountVectorizer(ngram_range=(1, 1), stop_words=combinedStopwords())
+
+
+def embedWords(words: list[str], cache: EmbeddingCache = keywordEmbeddingCache) -> np.ndarray:
+    """
+    Berechnet die Embeddings von Kandidatenwörtern mit dem Modell von KeyBERT.
+    Bereits bekannte Wörter werden aus dem Cache geladen, nur neue Wörter werden kodiert.
+
+    :param words: Die Kandidatenwörter.
+    :param cache: Der zu verwendende Cache oder None, um den Cache zu umgehen.
+    :return: Matrix mit einem Embedding je Wort.
+    """
+    words = list(words)
+    kw_model = registry.getKeyBERT()
+    if cache is None or not words:
+        with stage("keyword_embedding"):
+            return kw_model.model.embed(words)
+
+    keys = [cache.makeKey(f"keybert:{KEYBERT_MODEL_NAME}", 'word', word) for word in words]
+    vectors = [cache.get(key) for key in keys]
+    missing = [index for index, vector in enumerate(vectors) if vector is None]
+    if missing:
+        with stage("keyword_embedding"):
+            encoded = kw_model.model.embed([words[index] for index in missing])
+        for index, vector in zip(missing, encoded):
+            cache.put(keys[index], vector)
+            vectors[index] = vector
+    return np.stack(vectors).astype(np.float32, copy=False)
+
+
+def sentenceKeywords(sentences: list[str]) -> tuple[list[str], dict]:
+    """
+    Bestimmt für jeden Satz das beste Schlüsselwort, entspricht also keywordCalculation(sentence) für alle Sätze.
+    Statt KeyBERT je Satz aufzurufen, werden alle Sätze und das gemeinsame Vokabular in je einem Aufruf kodiert.
+
+    :param sentences: Die Sätze der Stellenanzeige.
+    :return: Tuple aus den Schlüsselwörtern (je Satz höchstens eines) und den berechneten Wort-Embeddings.
+    """
+    if not sentences:
+        return [], {}
+    count = candidateVectorizer()
+    try:
+        documentTerms = count.fit_transform(sentences).tocsr()
+    except ValueError:
+        # Kein Satz enthält ein Wort, das kein Stoppwort ist
+        return [], {}
+    words = count.get_feature_names_out()
+
+    with stage("keyword_embedding"):
+        sentenceEmbeddings = registry.getKeyBERT().model.embed(sentences)
+    candidateEmbeddings = embedWords(words)
+
+    keywords = []
+    for index in range(len(sentences)):
+        candidateIndices = documentTerms[index].nonzero()[1]
+        if len(candidateIndices) == 0:
+            continue
+        distances = cosine_similarity(sentenceEmbeddings[index:index + 1], candidateEmbeddings[candidateIndices])
+        keywords.append(words[candidateIndices[distances.argsort()[0][-1]]])
+    return keywords, dict(zip(words, candidateEmbeddings))
+
+
+def rankKeywords(text: str, top_n: int = 5, wordEmbeddings: dict = None) -> list[tuple[str, float]]:
+    """
+    Ordnet die Kandidatenwörter eines Textes wie KeyBERT nach ihrer Ähnlichkeit zum Text.
+    Bereits berechnete Wort-Embeddings werden wiederverwendet, nur unbekannte Wörter werden kodiert.
+
+    :param text: Der Text, dessen Schlüsselwörter bestimmt werden sollen.
+    :param top_n: Die maximale Anzahl von Schlüsselwörtern (default: 5).
+    :param wordEmbeddings: Bereits berechnete Embeddings je Wort (z.B. aus sentenceKeywords) oder None.
+    :return: Liste aus Tupeln (Schlüsselwort, Ähnlichkeit), absteigend sortiert.
+    """
+    if not text:
+        return []
+    wordEmbeddings = dict(wordEmbeddings or {})
+    count = candidateVectorizer()
+    try:
+        count.fit([text])
+    except ValueError:
+        return []
+    words = count.get_feature_names_out()
+
+    missing = [word for word in words if word not in wordEmbeddings]
+    if missing:
+        wordEmbeddings.update(zip(missing, embedWords(missing)))
+    candidateEmbeddings = np.stack([wordEmbeddings[word] for word in words])
+
+    with stage("keyword_embedding"):
+        documentEmbedding = registry.getKeyBERT().model.embed([text])
+    distances = cosine_similarity(documentEmbedding, candidateEmbeddings)
+    return [
+        (words[index], round(float(distances[0][index]), 4)) for index in distances.argsort()[0][-top_n:]
+    ][::-1]
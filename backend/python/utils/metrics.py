@@ -0,0 +1,283 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Latenzen und Kennzahlen erfassen und unter /metrics ausgeben (false = stage() und die Middleware messen nichts)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Obergrenzen der Histogramm-Buckets für Latenzen in Sekunden bzw. für Batchgrößen
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+def _formatValue(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatLabels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, description: str, labelNames: tuple = ()):
+        """
+        Basisklasse für eine Metrik mit optionalen Labels; die Werte werden je Kombination der Labelwerte gehalten.
+
+        :param name: Name der Metrik im Prometheus-Format (z.B. 'baula_stage_duration_seconds').
+        :param description: Beschreibung für die HELP-Zeile.
+        :param labelNames: Namen der Labels.
+        :return: None
+        """
+        self.name = name
+        self.description = description
+        self.labelNames = tuple(labelNames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelNames):
+            raise ValueError(f"{self.name} expects labels {self.labelNames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelNames)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_formatLabels(self.labelNames, key)} {_formatValue(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, value: float, **labels) -> None:
+        """
+        Übernimmt den Stand eines Zählers, der an anderer Stelle geführt wird (z.B. die Treffer eines Caches).
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labelNames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        """
+        Histogramm mit festen Buckets; je Labelkombination werden die Anzahl je Bucket, die Summe und die Anzahl
+        der Beobachtungen gezählt.
+
+        :param name: Name der Metrik.
+        :param description: Beschreibung für die HELP-Zeile.
+        :param labelNames: Namen der Labels.
+        :param buckets: Aufsteigende Obergrenzen der Buckets (+Inf wird ergänzt).
+        :return: None
+        """
+        super().__init__(name, description, labelNames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        bucket = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][bucket] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucketCount in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucketCount
+                labels = _formatLabels(self.labelNames, key, f'le="{_formatValue(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _formatLabels(self.labelNames, key)
+            lines.append(f"{self.name}_sum{labels} {_formatValue(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """
+        Sammelt alle Metriken eines Prozesses und gibt sie im Prometheus-Textformat aus.
+        Collector-Funktionen werden vor jeder Ausgabe aufgerufen und übernehmen Kennzahlen, die an anderer Stelle
+        geführt werden (z.B. Cache-Treffer oder Warteschlangenlängen).
+
+        :return: None
+        """
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _getOrCreate(self, cls, name: str, description: str, labelNames: tuple, **options):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, description, labelNames, **options)
+            elif not isinstance(metric, cls) or metric.labelNames != tuple(labelNames):
+                raise ValueError(f"Metric {name} is already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, description: str, labelNames: tuple = ()) -> Counter:
+        return self._getOrCreate(Counter, name, description, labelNames)
+
+    def gauge(self, name: str, description: str, labelNames: tuple = ()) -> Gauge:
+        return self._getOrCreate(Gauge, name, description, labelNames)
+
+    def histogram(self, name: str, description: str, labelNames: tuple = (),
+                  buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self._getOrCreate(Histogram, name, description, labelNames, buckets=buckets)
+
+    def addCollector(self, collector) -> None:
+        """
+        :param collector: Funktion ohne Parameter, die vor jeder Ausgabe aufgerufen wird.
+        :return: None
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        :return: Alle Metriken im Prometheus-Textformat (Version 0.0.4).
+        """
+        with self._lock:
+            collectors = list(self._collectors)
+        for collector in collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+REQUEST_SECONDS = metrics.histogram("baula_http_request_duration_seconds",
+                                    "Dauer der HTTP-Anfragen je Endpunkt", ("method", "endpoint", "status"))
+REQUESTS_IN_PROGRESS = metrics.gauge("baula_http_requests_in_progress", "Anzahl laufender HTTP-Anfragen")
+STAGE_SECONDS = metrics.histogram("baula_stage_duration_seconds",
+                                  "Dauer der Verarbeitungsschritte (Vorverarbeitung, Forward-Pass, ...)", ("stage",))
+BATCH_SIZE = metrics.histogram("baula_batch_size", "Anzahl der Texte je Forward-Pass", ("model",), SIZE_BUCKETS)
+QUEUE_DEPTH = metrics.gauge("baula_queue_depth", "Anzahl der Aufträge, die auf einen freien Platz warten", ("queue",))
+EXECUTOR_RUNNING = metrics.gauge("baula_executor_running", "Anzahl der Aufträge, die im Inferenz-Thread-Pool laufen")
+CACHE_HITS = metrics.counter("baula_cache_hits_total", "Treffer der Caches", ("cache",))
+CACHE_MISSES = metrics.counter("baula_cache_misses_total", "Fehlzugriffe der Caches", ("cache",))
+CACHE_HIT_RATIO = metrics.gauge("baula_cache_hit_ratio", "Anteil der Treffer an allen Zugriffen seit dem Start",
+                                ("cache",))
+
+
+def recordCache(name: str, hits: int, misses: int) -> None:
+    """
+    Übernimmt Treffer und Fehlzugriffe eines Caches, die an anderer Stelle gezählt werden.
+
+    :param name: Name des Caches (Label 'cache').
+    :param hits: Anzahl der Treffer seit dem Start.
+    :param misses: Anzahl der Fehlzugriffe seit dem Start.
+    :return: None
+    """
+    CACHE_HITS.set(hits, cache=name)
+    CACHE_MISSES.set(misses, cache=name)
+    CACHE_HIT_RATIO.set(round(hits / (hits + misses), 4) if hits + misses else 0.0, cache=name)
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Misst die Dauer des umschlossenen Blocks als Verarbeitungsschritt (baula_stage_duration_seconds).
+
+    :param name: Name des Schritts, z.B. 'preprocessing', 'tokenization' oder 'forward_pass'.
+    """
+    if not METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=name)
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        """
+        ASGI-Middleware, die die Dauer jeder HTTP-Anfrage je Methode, Route und Statuscode erfasst.
+        Als Endpunkt wird die Vorlage der Route verwendet (z.B. '/embedding-indexes/{name}'),
+        damit Pfadparameter nicht zu beliebig vielen Zeitreihen führen.
+
+        :param app: Die ASGI-Anwendung.
+        :return: None
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def sendWithStatus(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, sendWithStatus)
+        finally:
+            REQUESTS_IN_PROGRESS.dec()
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or "unmatched"
+            REQUEST_SECONDS.observe(time.perf_counter() - start, method=scope["method"], endpoint=endpoint,
+                                    status=status)
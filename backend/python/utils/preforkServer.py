@@ -0,0 +1,269 @@
+import gc
+import importlib
+import os
+import random
+import signal
+import socket
+import time
+
+# Anzahl der Worker-Prozesse im Produktionsmodus (0 = Entwicklungsmodus mit einem Prozess und Auto-Reload)
+API_WORKERS = int(os.getenv("API_WORKERS", "0"))
+# torch-Threads je Worker (0 = verfügbare Kerne gleichmäßig auf die Worker verteilen)
+TORCH_THREADS_PER_WORKER = int(os.getenv("TORCH_THREADS_PER_WORKER", "0"))
+# Ein Worker wird nach so vielen Anfragen geordnet beendet und ersetzt (0 = nie)
+WORKER_MAX_REQUESTS = int(os.getenv("WORKER_MAX_REQUESTS", "0"))
+# Zufälliger Zuschlag auf WORKER_MAX_REQUESTS, damit nicht alle Worker gleichzeitig ersetzt werden
+WORKER_MAX_REQUESTS_JITTER = int(os.getenv("WORKER_MAX_REQUESTS_JITTER", "0"))
+# Sekunden, die ein Worker beim Herunterfahren für laufende Anfragen bekommt
+WORKER_GRACEFUL_TIMEOUT = float(os.getenv("WORKER_GRACEFUL_TIMEOUT", "30"))
+
+# Worker, die schneller als das beendet werden, werden erst nach einer Pause ersetzt
+_MIN_WORKER_LIFETIME = 1.0
+
+
+def threadsPerWorker(workers: int) -> int:
+    """
+    :param workers: Anzahl der Worker.
+    :return: Anzahl der torch-Threads je Worker, sodass die Worker zusammen die Kerne nicht überbelegen.
+    """
+    if TORCH_THREADS_PER_WORKER > 0:
+        return TORCH_THREADS_PER_WORKER
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+    return max(1, cores // max(1, workers))
+
+
+def bindSocket(host: str, port: int) -> socket.socket:
+    """
+    Bindet den Server-Socket im Elternprozess; alle Worker nehmen Verbindungen auf demselben Socket an.
+
+    :param host: Adresse, auf der der Server lauscht.
+    :param port: Port des Servers.
+    :return: Der gebundene Socket.
+    """
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def preloadInParent(appPath: str) -> None:
+    """
+    Importiert die Anwendung und lädt die Modelle im Elternprozess, damit die Worker die Gewichte per
+    Copy-on-Write teilen. Im Elternprozess wird keine Inferenz ausgeführt: torch läuft hier mit einem Thread,
+    sodass kein OpenMP-Thread-Pool existiert, der nach dem Fork in den Workern hängen bleiben könnte.
+    Aufgewärmt wird erst in den Workern (siehe utils/startup.py).
+
+    :param appPath: Import-Pfad der Anwendung, z.B. 'api.api:app'.
+    :return: None
+    """
+    import torch
+    from models.modelRegistry import registry, MODEL_PRELOAD
+    from utils.startup import HEAVY_MODULES
+
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    torch.set_num_threads(1)
+    importlib.import_module(appPath.split(':')[0])
+    for moduleName in HEAVY_MODULES:
+        importlib.import_module(moduleName)
+    if MODEL_PRELOAD:
+        registry.preload()
+    # Geladene Objekte aus der Garbage Collection nehmen, damit sie in den Workern nicht durch GC-Läufe kopiert werden
+    gc.collect()
+    gc.freeze()
+
+
+def runWorker(sock: socket.socket, appPath: str, threads: int, maxRequests: int, timeoutKeepAlive: int) -> None:
+    """
+    Läuft im Worker-Prozess: setzt die torch-Threads und bedient Anfragen mit uvicorn auf dem geerbten Socket.
+
+    :param sock: Der im Elternprozess gebundene Socket.
+    :param appPath: Import-Pfad der Anwendung.
+    :param threads: Anzahl der torch-Threads (Intra-Op) des Workers.
+    :param maxRequests: Anzahl der Anfragen, nach denen sich der Worker beendet (0 = nie).
+    :param timeoutKeepAlive: Keep-Alive-Timeout in Sekunden.
+    :return: None
+    """
+    import torch
+    import uvicorn
+
+    for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+        signal.signal(signum, signal.SIG_DFL)
+    torch.set_num_threads(threads)
+
+    config = uvicorn.Config(appPath, timeout_keep_alive=timeoutKeepAlive, limit_max_requests=maxRequests or None,
+                            timeout_graceful_shutdown=WORKER_GRACEFUL_TIMEOUT)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class PreforkServer:
+    def __init__(self, appPath: str, host: str, port: int, workers: int = API_WORKERS, timeoutKeepAlive: int = 11):
+        """
+        Produktionsserver: bindet den Socket und lädt die Modelle einmal im Elternprozess und startet dann
+        die Worker per fork. Beendete Worker (z.B. nach WORKER_MAX_REQUESTS) werden ersetzt.
+        SIGTERM/SIGINT beenden alle Worker geordnet, SIGHUP ersetzt sie nacheinander.
+
+        :param appPath: Import-Pfad der Anwendung, z.B. 'api.api:app'.
+        :param host: Adresse, auf der der Server lauscht.
+        :param port: Port des Servers.
+        :param workers: Anzahl der Worker-Prozesse.
+        :param timeoutKeepAlive: Keep-Alive-Timeout in Sekunden.
+        :return: None
+        """
+        self.appPath = appPath
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.timeoutKeepAlive = timeoutKeepAlive
+        self.threads = threadsPerWorker(self.workers)
+        self.children = {}
+        self._stopping = False
+        self._recycle = False
+        # Alte Worker, die nach einem SIGHUP noch ersetzt werden müssen
+        self._recyclePending = []
+        # Geordnet beendete Worker mit der Frist, nach der sie per SIGKILL beendet werden
+        self._retiring = {}
+
+    def run(self) -> None:
+        """
+        Startet den Server und überwacht die Worker, bis ein SIGTERM oder SIGINT eintrifft.
+
+        :return: None
+        """
+        sock = bindSocket(self.host, self.port)
+        print(f"Listening on {self.host}:{self.port}, loading models before starting {self.workers} workers "
+              f"with {self.threads} torch threads each")
+        preloadInParent(self.appPath)
+
+        signal.signal(signal.SIGTERM, self._handleStop)
+        signal.signal(signal.SIGINT, self._handleStop)
+        signal.signal(signal.SIGHUP, self._handleRecycle)
+
+        for _ in range(self.workers):
+            self._spawn(sock)
+
+        while not self._stopping:
+            if self._recycle:
+                self._recycle = False
+                self._recyclePending = list(self.children)
+            self._reap(sock)
+            self._recycleNext(sock)
+            self._killOverdue()
+            time.sleep(0.5)
+
+        self._stopWorkers()
+        sock.close()
+
+    def _spawn(self, sock: socket.socket) -> int:
+        maxRequests = WORKER_MAX_REQUESTS
+        if maxRequests and WORKER_MAX_REQUESTS_JITTER:
+            maxRequests += random.randint(0, WORKER_MAX_REQUESTS_JITTER)
+
+        pid = os.fork()
+        if pid == 0:
+            exitCode = 0
+            try:
+                runWorker(sock, self.appPath, self.threads, maxRequests, self.timeoutKeepAlive)
+            except BaseException as e:
+                print(f"Worker {os.getpid()} failed: {e}")
+                exitCode = 1
+            finally:
+                os._exit(exitCode)
+
+        self.children[pid] = time.monotonic()
+        print(f"Started worker {pid}")
+        return pid
+
+    def _reap(self, sock: socket.socket) -> None:
+        while self.children or self._retiring:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if self._retiring.pop(pid, None) is not None:
+                print(f"Worker {pid} retired with status {os.waitstatus_to_exitcode(status)}")
+                continue
+            startedAt = self.children.pop(pid, None)
+            if startedAt is None:
+                continue
+            print(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}")
+            if not self._stopping:
+                if time.monotonic() - startedAt < _MIN_WORKER_LIFETIME:
+                    time.sleep(_MIN_WORKER_LIFETIME)
+                self._spawn(sock)
+
+    def _recycleNext(self, sock: socket.socket) -> None:
+        """
+        Ersetzt nach einem SIGHUP die alten Worker nacheinander, ohne die Überwachungsschleife zu blockieren:
+        erst wenn der zuletzt beendete Worker eingesammelt ist, startet ein neuer Worker und ein weiterer
+        alter Worker erhält ein SIGTERM. Abgestürzte Worker werden währenddessen weiter durch _reap ersetzt.
+        """
+        if self._retiring:
+            return
+        while self._recyclePending:
+            pid = self._recyclePending.pop(0)
+            if self.children.pop(pid, None) is None:
+                # Der Worker wurde inzwischen schon beendet und ersetzt
+                continue
+            self._spawn(sock)
+            self._retire(pid)
+            return
+
+    def _retire(self, pid: int) -> None:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        self._retiring[pid] = time.monotonic() + WORKER_GRACEFUL_TIMEOUT + 5
+
+    def _killOverdue(self) -> None:
+        now = time.monotonic()
+        for pid, deadline in list(self._retiring.items()):
+            if deadline <= now:
+                print(f"Killing worker {pid} after graceful timeout")
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                # Danach nicht erneut senden; eingesammelt wird der Prozess von _reap
+                self._retiring[pid] = float('inf')
+
+    def _stopWorkers(self) -> None:
+        self._terminate(list(self.children) + list(self._retiring))
+        self.children.clear()
+        self._retiring.clear()
+        self._recyclePending.clear()
+
+    def _terminate(self, pids: list[int]) -> None:
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + WORKER_GRACEFUL_TIMEOUT + 5
+        remaining = set(pids)
+        while remaining and time.monotonic() < deadline:
+            for pid in list(remaining):
+                try:
+                    if os.waitpid(pid, os.WNOHANG)[0] != 0:
+                        remaining.discard(pid)
+                except ChildProcessError:
+                    remaining.discard(pid)
+            time.sleep(0.1)
+        for pid in remaining:
+            print(f"Killing worker {pid} after graceful timeout")
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+
+    def _handleStop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _handleRecycle(self, signum, frame) -> None:
+        self._recycle = True
@@ -0,0 +1,323 @@
+import asyncio
+import contextvars
+import cProfile
+import hmac
+import json
+import os
+import random
+import shutil
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+# Token für den Header X-Profile-Token, mit dem eine einzelne Anfrage profiliert wird (leer = kein Profiling per Header)
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+# Anteil der Anfragen, die ohne Header zufällig profiliert werden (0 = keine)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Verzeichnis für die Profile und maximale Anzahl gespeicherter Profile (die ältesten werden gelöscht)
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MAX_COUNT = int(os.getenv("PROFILE_MAX_COUNT", "50"))
+# Abstand der Stichproben für die Flame-Graph-Stacks in Millisekunden
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+# Zusätzlich den torch-Profiler verwenden, sofern torch bereits geladen ist
+PROFILE_TORCH = os.getenv("PROFILE_TORCH", "true").lower() == "true"
+
+PROFILE_HEADER = "x-profile-token"
+PROFILE_ID_HEADER = "x-profile-id"
+# Pfade, die nie profiliert werden
+EXCLUDED_PATHS = ("/healthz", "/readyz", "/metrics", "/profiles")
+PROFILE_FILES = ("meta.json", "profile.pstats", "profile.txt", "stacks.folded", "torch.txt")
+
+currentSession = contextvars.ContextVar("profileSession", default=None)
+# Es läuft höchstens ein Profil gleichzeitig: cProfile erfasst ab Python 3.12 alle Threads des Prozesses
+_sessionLock = threading.Lock()
+
+
+class StackSampler:
+    def __init__(self, threadId: int, stacks: Counter, interval: float):
+        """
+        Nimmt in einem eigenen Thread in festen Abständen den Aufruf-Stack eines Threads auf und zählt gleiche Stacks.
+        Anders als cProfile erfasst das nur den profilierten Thread und verlangsamt ihn kaum.
+
+        :param threadId: Id des Threads, dessen Stack aufgenommen wird.
+        :param stacks: Zähler, in dem die Stacks (von außen nach innen, mit ';' getrennt) gezählt werden.
+        :param interval: Abstand der Stichproben in Sekunden.
+        :return: None
+        """
+        self.threadId = threadId
+        self.stacks = stacks
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.threadId)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+
+class ProfileSession:
+    def __init__(self, method: str, path: str, trigger: str):
+        """
+        Hält die Profile einer einzelnen Anfrage: cProfile, die Stichproben der Stacks und den torch-Profiler.
+        Profiliert wird in den Funktionen, die die Anfrage über runBlocking im Inferenz-Thread-Pool ausführt,
+        also dort, wo Vorverarbeitung, Inferenz und Ähnlichkeitsberechnung laufen.
+
+        :param method: HTTP-Methode der Anfrage.
+        :param path: Pfad der Anfrage.
+        :param trigger: 'header' oder 'sample'.
+        :return: None
+        """
+        self.startedAt = time.time()
+        # Die Ids sind zeitlich sortierbar; danach richten sich die Liste und das Löschen alter Profile
+        self.id = (f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(self.startedAt))}"
+                   f"{int(self.startedAt * 1000) % 1000:03d}-{uuid.uuid4().hex[:8]}")
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.profiler = cProfile.Profile()
+        self.stacks = Counter()
+        self.torchTables = []
+        self.profiledSeconds = 0.0
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def run(self, fn, *args, **kwargs):
+        """
+        Führt eine Funktion profiliert aus.
+
+        :param fn: Die Funktion.
+        :param args: Positionsargumente für fn.
+        :param kwargs: Schlüsselwortargumente für fn.
+        :return: Der Rückgabewert von fn.
+        """
+        with self._lock:
+            torchProfiler = _torchProfiler()
+            start = time.perf_counter()
+            try:
+                with StackSampler(threading.get_ident(), self.stacks, PROFILE_SAMPLE_INTERVAL_MS / 1000):
+                    if torchProfiler is not None:
+                        torchProfiler.__enter__()
+                    self.profiler.enable()
+                    try:
+                        return fn(*args, **kwargs)
+                    finally:
+                        self.profiler.disable()
+                        if torchProfiler is not None:
+                            torchProfiler.__exit__(None, None, None)
+            finally:
+                seconds = time.perf_counter() - start
+                self.profiledSeconds += seconds
+                self.calls.append({"function": getattr(fn, "__name__", repr(fn)), "seconds": round(seconds, 4)})
+                table = _torchTable(torchProfiler) if torchProfiler is not None else ""
+                if table:
+                    self.torchTables.append(f"# {self.calls[-1]['function']}\n{table}")
+
+    def save(self, status: int, durationSeconds: float, directory: str = PROFILE_DIR) -> str:
+        """
+        Schreibt die Profile in ein eigenes Unterverzeichnis und löscht die ältesten Profile über PROFILE_MAX_COUNT.
+
+        :param status: Statuscode der Antwort.
+        :param durationSeconds: Gesamtdauer der Anfrage in Sekunden.
+        :param directory: Verzeichnis der Profile.
+        :return: Pfad des Unterverzeichnisses.
+        """
+        import pstats
+
+        target = os.path.join(directory, self.id)
+        os.makedirs(target, exist_ok=True)
+        with self._lock:
+            self.profiler.create_stats()
+            stats = self.profiler.stats
+            if stats:
+                self.profiler.dump_stats(os.path.join(target, "profile.pstats"))
+                with open(os.path.join(target, "profile.txt"), "w", encoding="utf-8") as file:
+                    pstats.Stats(self.profiler, stream=file).sort_stats("cumulative").print_stats(60)
+            with open(os.path.join(target, "stacks.folded"), "w", encoding="utf-8") as file:
+                for stack, count in self.stacks.most_common():
+                    file.write(f"{stack} {count}\n")
+            if self.torchTables:
+                with open(os.path.join(target, "torch.txt"), "w", encoding="utf-8") as file:
+                    file.write("\n\n".join(self.torchTables))
+            meta = {
+                "id": self.id,
+                "method": self.method,
+                "path": self.path,
+                "trigger": self.trigger,
+                "status": status,
+                "startedAt": round(self.startedAt, 3),
+                "durationMs": round(durationSeconds * 1000, 3),
+                "profiledMs": round(self.profiledSeconds * 1000, 3),
+                "calls": self.calls,
+                "samples": sum(self.stacks.values()),
+                "sampleIntervalMs": PROFILE_SAMPLE_INTERVAL_MS,
+                "pid": os.getpid(),
+                "python": sys.version.split()[0],
+            }
+        with open(os.path.join(target, "meta.json"), "w", encoding="utf-8") as file:
+            json.dump(meta, file, indent=2)
+        pruneProfiles(directory)
+        return target
+
+
+def _torchProfiler():
+    # torch wird nicht extra geladen: Endpunkte ohne Modell-Inferenz brauchen keinen torch-Profiler
+    if not PROFILE_TORCH or "torch" not in sys.modules:
+        return None
+    import torch
+
+    # Der Profiler ohne Kineto erfasst nur den aufrufenden Thread und lässt sich in wechselnden Threads
+    # des Pools starten; Forward-Passes in den Threads der Micro-Batcher erfasst er daher nicht
+    return torch.autograd.profiler.profile(use_kineto=False, record_shapes=True)
+
+
+def _torchTable(profiler) -> str:
+    try:
+        return profiler.key_averages().table(sort_by="self_cpu_time_total", row_limit=30)
+    except Exception as e:
+        return f"torch profiler failed: {e}"
+
+
+def runProfiled(fn, *args, **kwargs):
+    """
+    Führt eine Funktion aus und profiliert sie, wenn die aktuelle Anfrage profiliert wird (siehe ProfilingMiddleware).
+    Wird von runBlocking im Inferenz-Thread aufgerufen, der den Kontext der Anfrage übernimmt.
+
+    :param fn: Die Funktion.
+    :param args: Positionsargumente für fn.
+    :param kwargs: Schlüsselwortargumente für fn.
+    :return: Der Rückgabewert von fn.
+    """
+    session = currentSession.get()
+    if session is None:
+        return fn(*args, **kwargs)
+    return session.run(fn, *args, **kwargs)
+
+
+def pruneProfiles(directory: str = PROFILE_DIR, maxCount: int = PROFILE_MAX_COUNT) -> None:
+    """
+    Löscht die ältesten Profile, sodass höchstens maxCount Profile erhalten bleiben.
+
+    :param directory: Verzeichnis der Profile.
+    :param maxCount: Maximale Anzahl an Profilen.
+    :return: None
+    """
+    entries = sorted(entry.name for entry in os.scandir(directory) if entry.is_dir()) if os.path.isdir(directory) else []
+    for name in entries[:max(0, len(entries) - maxCount)]:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def listProfiles(directory: str = PROFILE_DIR) -> list[dict]:
+    """
+    :param directory: Verzeichnis der Profile.
+    :return: Metadaten der gespeicherten Profile, neueste zuerst, jeweils mit den vorhandenen Dateien und ihrer Größe.
+    """
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in sorted((entry.name for entry in os.scandir(directory) if entry.is_dir()), reverse=True):
+        try:
+            with open(os.path.join(directory, name, "meta.json"), encoding="utf-8") as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            continue
+        meta["files"] = {
+            fileName: os.path.getsize(os.path.join(directory, name, fileName))
+            for fileName in PROFILE_FILES if os.path.exists(os.path.join(directory, name, fileName))
+        }
+        profiles.append(meta)
+    return profiles
+
+
+def profilePath(profileId: str, fileName: str, directory: str = PROFILE_DIR) -> str:
+    """
+    :param profileId: Id des Profils.
+    :param fileName: Name der Datei (siehe PROFILE_FILES).
+    :param directory: Verzeichnis der Profile.
+    :return: Pfad der Datei.
+    :raises KeyError: Wenn es das Profil oder die Datei nicht gibt.
+    """
+    if fileName not in PROFILE_FILES or os.path.basename(profileId) != profileId or profileId.startswith('.'):
+        raise KeyError(f"Unknown profile file: {profileId}/{fileName}")
+    path = os.path.join(directory, profileId, fileName)
+    if not os.path.isfile(path):
+        raise KeyError(f"Unknown profile file: {profileId}/{fileName}")
+    return path
+
+
+def isAuthorized(token: str) -> bool:
+    """
+    :param token: Wert des Headers X-Profile-Token.
+    :return: True, wenn der Token PROFILE_TOKEN entspricht.
+    """
+    return bool(PROFILE_TOKEN) and token is not None and hmac.compare_digest(token, PROFILE_TOKEN)
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        """
+        ASGI-Middleware, die einzelne Anfragen profiliert: auf Anforderung über den Header X-Profile-Token
+        oder zufällig mit PROFILE_SAMPLE_RATE. Die Antwort enthält dann die Id des Profils im Header X-Profile-Id.
+
+        :param app: Die ASGI-Anwendung.
+        :return: None
+        """
+        self.app = app
+
+    def _trigger(self, scope) -> str:
+        if scope["type"] != "http" or scope["path"].startswith(EXCLUDED_PATHS):
+            return None
+        headers = dict(scope.get("headers") or [])
+        token = headers.get(PROFILE_HEADER.encode())
+        if token is not None and isAuthorized(token.decode("latin-1")):
+            return "header"
+        if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        trigger = self._trigger(scope)
+        if trigger is None or not _sessionLock.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession(scope["method"], scope["path"], trigger)
+        status = 500
+
+        async def sendWithProfileId(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {**message, "headers": [*message.get("headers", []),
+                                                  (PROFILE_ID_HEADER.encode(), session.id.encode())]}
+            await send(message)
+
+        contextToken = currentSession.set(session)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, sendWithProfileId)
+        finally:
+            duration = time.perf_counter() - start
+            currentSession.reset(contextToken)
+            try:
+                await asyncio.to_thread(session.save, status, duration)
+            except Exception as e:
+                print(f"Saving profile {session.id} failed: {e}")
+            finally:
+                _sessionLock.release()
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+# Gültigkeitsdauer der zwischengespeicherten Ergebnisse in Sekunden (0 = Cache aus)
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "900"))
+# Maximale Anzahl zwischengespeicherter Ergebnisse (die am längsten nicht genutzten werden verdrängt)
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+
+_spaces = re.compile(r"[ \t\f\v\u00a0]+")
+
+
+def normalizeText(text: str) -> str:
+    """
+    Normalisiert einen Text für den Cache-Schlüssel, ohne das Ergebnis zu verändern: Unicode-Normalform NFC,
+    einheitliche Zeilenumbrüche und zusammengefasste Leerzeichen. Groß- und Kleinschreibung bleibt erhalten,
+    da das BERT-Modell zwischen ihnen unterscheidet.
+
+    :param text: Der Text.
+    :return: Der normalisierte Text.
+    """
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+    return "\n".join(_spaces.sub(" ", line).strip() for line in text.split("\n")).strip()
+
+
+def moduleSetFingerprint(modules: list) -> str:
+    """
+    Bildet einen Fingerabdruck der Modulliste einer Anfrage. Ändert sich ein Modul, ändert sich auch der Schlüssel,
+    sodass keine Ergebnisse zu einem veralteten Modulhandbuch geliefert werden.
+
+    :param modules: Die Module, wie sie in der Anfrage übergeben wurden.
+    :return: SHA-256-Hash als Hex-String.
+    """
+    payload = json.dumps(modules, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, maxEntries: int, ttlSeconds: float):
+        """
+        Initialisiert einen Cache für fertige Ergebnisse von Endpunkten mit Ablaufzeit und LRU-Verdrängung.
+        Einträge können mit einem Tag (z.B. dem Fingerabdruck der Modulliste) versehen und darüber entfernt werden.
+
+        :param maxEntries: Maximale Anzahl an Einträgen (0 = Cache aus).
+        :param ttlSeconds: Gültigkeitsdauer eines Eintrags in Sekunden (0 = Cache aus).
+        :return: None
+        """
+        self.maxEntries = maxEntries
+        self.ttlSeconds = ttlSeconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxEntries > 0 and self.ttlSeconds > 0
+
+    @staticmethod
+    def makeKey(endpoint: str, *parts) -> str:
+        """
+        Bildet den Schlüssel eines Ergebnisses aus dem Endpunkt und allen Werten, von denen es abhängt
+        (Texte werden mit normalizeText normalisiert).
+
+        :param endpoint: Name des Endpunkts.
+        :param parts: Texte, Parameter, Fingerabdruck der Modulliste und Modellversion.
+        :return: SHA-256-Hash als Hex-String.
+        """
+        values = [f"s:{normalizeText(part)}" if isinstance(part, str) else f"r:{part!r}" for part in (endpoint, *parts)]
+        return hashlib.sha256("\x00".join(values).encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """
+        :param key: Schlüssel aus makeKey.
+        :return: Das gespeicherte Ergebnis oder None, wenn es keines gibt oder es abgelaufen ist.
+        """
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value, tag: str = None) -> None:
+        """
+        Legt ein Ergebnis im Cache ab. Das Ergebnis darf danach nicht mehr verändert werden.
+
+        :param key: Schlüssel aus makeKey.
+        :param value: Das Ergebnis.
+        :param tag: Optionales Tag, über das der Eintrag mit invalidate entfernt werden kann.
+        :return: None
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttlSeconds, value, tag)
+            while len(self._entries) > self.maxEntries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, tag: str = None) -> int:
+        """
+        Entfernt alle Einträge oder nur die Einträge mit einem Tag.
+
+        :param tag: Das Tag (z.B. Fingerabdruck einer Modulliste) oder None für alle Einträge.
+        :return: Anzahl der entfernten Einträge.
+        """
+        with self._lock:
+            if tag is None:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                keys = [key for key, entry in self._entries.items() if entry[2] == tag]
+                for key in keys:
+                    del self._entries[key]
+                removed = len(keys)
+            self.invalidations += removed
+        return removed
+
+    def stats(self) -> dict:
+        """
+        Gibt die Kennzahlen des Caches zurück.
+
+        :return: Dictionary mit Trefferzahlen, Anzahl Einträgen und Einstellungen.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "maxEntries": self.maxEntries,
+                "ttlSeconds": self.ttlSeconds,
+            }
+
+
+resultCache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL_SECONDS)
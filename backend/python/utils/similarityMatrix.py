@@ -0,0 +1,61 @@
+import numpy as np
+
+
+def normalizeRows(vectors: np.ndarray, eps: float = 1e-8) -> np.ndarray:
+    """
+    Normalisiert jede Zeile einer Matrix auf die Länge 1.
+
+    :param vectors: Matrix der Form (Anzahl Vektoren, Dimension).
+    :param eps: Untergrenze für die Norm, damit Nullvektoren nicht zu einer Division durch 0 führen.
+    :return: Die normalisierte Matrix als float32-Array.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, eps)
+
+
+def cosineSimilarityMatrix(queries: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+    """
+    Berechnet die Kosinus-Ähnlichkeit aller Anfrage-Vektoren zu allen Kandidaten-Vektoren in einer Matrixoperation.
+
+    :param queries: Matrix der Form (Anzahl Anfragen, Dimension), z.B. Topic-Embeddings.
+    :param candidates: Matrix der Form (Anzahl Kandidaten, Dimension), z.B. Modul-Embeddings.
+    :return: Matrix der Form (Anzahl Anfragen, Anzahl Kandidaten) mit den Ähnlichkeiten.
+    :raises ValueError: Wenn die Dimensionen der Vektoren nicht übereinstimmen.
+    """
+    queries = normalizeRows(queries)
+    candidates = normalizeRows(candidates)
+    if queries.shape[1] != candidates.shape[1]:
+        raise ValueError(f"Dimension mismatch: {queries.shape[1]} vs {candidates.shape[1]}")
+    return queries @ candidates.T
+
+
+def topKIndices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Bestimmt je Zeile die Indizes der k höchsten Scores mit Hilfe einer Teilsortierung.
+
+    Die Indizes sind absteigend nach Score sortiert, bei gleichem Score gewinnt der kleinere Index.
+
+    :param scores: Matrix der Form (Anzahl Zeilen, Anzahl Kandidaten).
+    :param k: Anzahl der gesuchten Kandidaten je Zeile.
+    :return: Integer-Matrix der Form (Anzahl Zeilen, min(k, Anzahl Kandidaten)).
+    """
+    scores = np.atleast_2d(scores)
+    rows, columns = scores.shape
+    k = max(0, min(k, columns))
+    if k == 0:
+        return np.empty((rows, 0), dtype=np.intp)
+
+    comparable = np.where(np.isnan(scores), -np.inf, scores)
+    if k == columns:
+        return np.lexsort((np.broadcast_to(np.arange(columns), (rows, columns)), -comparable), axis=-1)
+
+    # argpartition wählt bei Gleichstand am k-ten Platz eine beliebige Teilmenge. Daher werden alle Spalten
+    # behalten, deren Score mindestens dem k-t größten Wert entspricht, und erst nach der Sortierung gekürzt.
+    kth = np.partition(comparable, columns - k, axis=1)[:, columns - k]
+    rowIds, columnIds = np.nonzero(comparable >= kth[:, None])
+    order = np.lexsort((columnIds, -comparable[rowIds, columnIds], rowIds))
+    starts = np.concatenate([[0], np.cumsum(np.bincount(rowIds, minlength=rows))[:-1]])
+    return columnIds[order][starts[:, None] + np.arange(k)]
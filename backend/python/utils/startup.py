@@ -0,0 +1,135 @@
+import importlib
+import os
+import threading
+import time
+
+# Nach dem Laden der Modelle eine Inferenz ausführen, damit die erste echte Anfrage nicht langsamer ist
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+
+# Module mit schweren Abhängigkeiten (torch, sklearn, pandas), die erst nach dem Binden des Servers importiert werden
+HEAVY_MODULES = ["modules.jobModuleMain", "modules.topicModuleMain", "models.bertEncoder"]
+
+
+class StartupState:
+    def __init__(self):
+        """
+        Hält den Fortschritt des Starts (importing, loading, warming, ready oder failed) für Health-Checks fest.
+
+        :return: None
+        """
+        self.phase = "starting"
+        self.error = None
+        self.durations = {}
+        self.startedAt = time.time()
+        self._phaseStart = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.phase == "ready"
+
+    def enter(self, phase: str) -> None:
+        with self._lock:
+            self.phase = phase
+            self._phaseStart = time.perf_counter()
+
+    def leave(self) -> None:
+        with self._lock:
+            self.durations[self.phase] = round(time.perf_counter() - self._phaseStart, 3)
+
+    def fail(self, error: Exception) -> None:
+        with self._lock:
+            self.error = f"{type(error).__name__}: {error}"
+            self.phase = "failed"
+
+    def status(self) -> dict:
+        """
+        :return: Dictionary mit aktueller Phase, Dauer der abgeschlossenen Phasen und ggf. dem Fehler.
+        """
+        with self._lock:
+            return {
+                "status": self.phase,
+                "durations": dict(self.durations),
+                "uptime": round(time.time() - self.startedAt, 3),
+                "error": self.error,
+            }
+
+
+startupState = StartupState()
+
+
+def lazyImport(moduleName: str, attribute: str):
+    """
+    Gibt eine Funktion zurück, die das Modul erst beim ersten Aufruf importiert und dann die eigentliche Funktion
+    aufruft. Da Endpunkte ihre Funktionen über runBlocking ausführen, findet ein solcher Import nie in der Event-Loop statt.
+
+    :param moduleName: Name des Moduls (z.B. 'modules.jobModuleMain').
+    :param attribute: Name der Funktion im Modul.
+    :return: Die verzögert importierte Funktion.
+    """
+    def call(*args, **kwargs):
+        return getattr(importlib.import_module(moduleName), attribute)(*args, **kwargs)
+
+    call.__name__ = attribute
+    return call
+
+
+def warmUp() -> None:
+    """
+    Führt je Modell eine Inferenz aus (ohne Embedding-Cache), damit Gewichte, Thread-Pools und Allokatoren
+    vor der ersten echten Anfrage initialisiert sind.
+
+    :return: None
+    """
+    from models.bertEncoder import embedTexts
+    from models.modelRegistry import registry
+    from utils.textPrepare import ensureNltkResources
+
+    ensureNltkResources()
+    for pooling in ('mean', 'pooler'):
+        embedTexts(["Aufwärmen des Modells für die erste Anfrage"], pooling=pooling, cache=None)
+    registry.getKeyBERT().model.embed(["Aufwärmen"])
+
+
+def runStartup(preload: bool, warmup: bool = WARMUP_ENABLED, state: StartupState = startupState) -> None:
+    """
+    Führt die Startphasen nacheinander aus: schwere Module importieren, Modelle laden und aufwärmen.
+
+    :param preload: Flag, ob die Modelle geladen werden (MODEL_PRELOAD).
+    :param warmup: Flag, ob nach dem Laden eine Aufwärm-Inferenz ausgeführt wird.
+    :param state: Der Zustand, in dem der Fortschritt festgehalten wird.
+    :return: None
+    """
+    from models.modelRegistry import registry
+
+    try:
+        state.enter("importing")
+        for moduleName in HEAVY_MODULES:
+            importlib.import_module(moduleName)
+        state.leave()
+        if preload:
+            state.enter("loading")
+            registry.preload()
+            state.leave()
+            if warmup:
+                state.enter("warming")
+                warmUp()
+                state.leave()
+        state.enter("ready")
+    except Exception as e:
+        print(f"Startup failed: {e}")
+        state.fail(e)
+
+
+def startBackgroundStartup(preload: bool, warmup: bool = WARMUP_ENABLED) -> threading.Thread:
+    """
+    Startet runStartup in einem Hintergrund-Thread, damit der Server sofort Verbindungen annimmt
+    und Health-Checks beantwortet, während die Modelle noch geladen werden.
+
+    :param preload: Flag, ob die Modelle geladen werden (MODEL_PRELOAD).
+    :param warmup: Flag, ob nach dem Laden eine Aufwärm-Inferenz ausgeführt wird.
+    :return: Der gestartete Thread.
+    """
+    thread = threading.Thread(target=runStartup, args=(preload, warmup), name="startup", daemon=True)
+    thread.start()
+    return thread
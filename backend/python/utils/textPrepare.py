@@ -1,13 +1,95 @@
 import re
+from functools import lru_cache
+
 import nltk
 from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
 from nltk.stem import WordNetLemmatizer
-from langdetect import detect
+from langdetect import DetectorFactory, LangDetectException, detect
+
+from utils.metrics import stage
+
+# Vorkompilierte Muster für HTML-Tags und Wörter
+CLEANR = re.compile('<.*?>')
+WORD_PATTERN = re.compile(r'\w+')
+# Anzahl der Zeichen, die für die Spracherkennung ausgewertet werden
+LANGUAGE_DETECTION_CHARS = 1000
+# Maximale Anzahl zwischengespeicherter Lemmata bzw. erkannter Sprachen
+LEMMA_CACHE_SIZE = 100000
+LANGUAGE_CACHE_SIZE = 4096
+
+# Fester Seed, damit langdetect für denselben Text immer dieselbe Sprache liefert
+DetectorFactory.seed = 0
+
+_nltkResourcesChecked = False
+
+
+def ensureNltkResources() -> None:
+    """
+    Lädt die benötigten NLTK-Ressourcen herunter, falls sie nicht vorhanden sind (im Docker-Image sind sie
+    bereits enthalten). Die Prüfung erfolgt nur einmal pro Prozess und nicht schon beim Import.
+
+    :return: None
+    """
+    global _nltkResourcesChecked
+    if _nltkResourcesChecked:
+        return
+    for resource, package in [('corpora/stopwords', 'stopwords'), ('corpora/wordnet', 'wordnet')]:
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            nltk.download(package)
+    _nltkResourcesChecked = True
+
+
+def detectLanguage(text: str) -> str:
+    """
+    Erkennt die Sprache eines Textes anhand seiner ersten LANGUAGE_DETECTION_CHARS Zeichen.
+
+    :param text: Der zu untersuchende Text.
+    :return: Sprachcode (z.B. 'de' oder 'en'), 'de', wenn keine Sprache erkannt werden kann.
+    """
+    # Zwischengespeichert wird nur der ausgewertete Anfang, nicht der gesamte Text
+    return detectLanguagePrefix(text[:LANGUAGE_DETECTION_CHARS])
+
+
+@lru_cache(maxsize=LANGUAGE_CACHE_SIZE)
+def detectLanguagePrefix(prefix: str) -> str:
+    """
+    :param prefix: Die ersten LANGUAGE_DETECTION_CHARS Zeichen eines Textes.
+    :return: Sprachcode (z.B. 'de' oder 'en'), 'de', wenn keine Sprache erkannt werden kann.
+    """
+    with stage("language_detection"):
+        try:
+            return detect(prefix)
+        except LangDetectException:
+            return 'de'
+
+
+_lemmatizer = WordNetLemmatizer()
+
+
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def lemmatize(token: str) -> str:
+    """
+    Lemmatisiert ein Token mit dem WordNetLemmatizer und merkt sich das Ergebnis.
+
+    :param token: Das Token.
+    :return: Das Lemma.
+    """
+    return _lemmatizer.lemmatize(token)
+
+
+@lru_cache(maxsize=None)
+def stopWordSet(language: str) -> frozenset:
+    """
+    Lädt die NLTK-Stoppwörter einer Sprache einmal pro Prozess und ergänzt sie um die Geschlechterkürzel (m/w/d).
+
+    :param language: Name der Sprache in NLTK (z.B. 'german').
+    :return: Die Stoppwörter als unveränderliche Menge.
+    """
+    ensureNltkResources()
+    return frozenset(stopwords.words(language)) | {"m", "w", "d"}
 
-# NLTK Ressourcen herunterladen (nur beim ersten Ausführen nötig)
-nltk.download('punkt')
-nltk.download('stopwords')
 
 class TextPreprocessor:
     def __init__(self):
@@ -16,11 +98,9 @@ class TextPreprocessor:
 
         :return: None
         """
-        self.stop_words_de = set(stopwords.words('german'))
-        self.stop_words_en = set(stopwords.words('english'))
-        self.stop_words_de.update({"m", "w", "d"})
-        self.stop_words_en.update({"m", "w", "d"})
-        self.lemmatizer = WordNetLemmatizer()
+        self.stop_words_de = stopWordSet('german')
+        self.stop_words_en = stopWordSet('english')
+        self.lemmatizer = _lemmatizer
 
     def cleanhtml(self, raw_html):
         """
@@ -29,10 +109,7 @@ class TextPreprocessor:
         :param raw_html: Der HTML-Rohtext, der bereinigt werden soll.
         :return: Der bereinigte Text ohne HTML-Tags.
         """
-        CLEANR = re.compile('<.*?>')
-
-        cleantext = re.sub(CLEANR, '', raw_html)
-        return cleantext
+        return CLEANR.sub('', raw_html)
 
     def preprocessText(self, text, splitResult):
         """
@@ -44,7 +121,7 @@ class TextPreprocessor:
         :return: Eine Liste von Lemmata oder ein String der Lemmata.
         """
         if text.strip():
-            lang = detect(text)
+            lang = detectLanguage(text)
             if lang == 'en':
                 stop_words = self.stop_words_en
             else:
@@ -52,19 +129,40 @@ class TextPreprocessor:
 
             text = self.cleanhtml(text)
 
-            # Normalisierung: Kleinbuchstaben und Entfernen unerwünschter Zeichen
-            text = text.lower()  # Alles in Kleinbuchstaben
-            text = re.sub(r'\W', ' ', text)  # Entferne nicht-alphanumerische Zeichen (außer Leerzeichen)
+            # Normalisierung und Tokenisierung: Kleinbuchstaben, Tokens sind die zusammenhängenden Wortzeichen
+            tokens = WORD_PATTERN.findall(text.lower())
 
-            # Tokenisierung
-            tokens = word_tokenize(text)
-
-            # Stopwortentfernung
-            tokens = [token for token in tokens if token not in stop_words]
-            # Lemmatisierung
-            lemmatized_tokens = [self.lemmatizer.lemmatize(token) for token in tokens]
+            # Stopwortentfernung und Lemmatisierung
+            lemmatized_tokens = [lemmatize(token) for token in tokens if token not in stop_words]
 
             if splitResult:
                 return lemmatized_tokens
             else:
                 return " ".join(lemmatized_tokens)
+
+    def preprocessMany(self, texts, splitResult):
+        """
+        Verarbeitet eine Liste von Texten (siehe preprocessText).
+
+        :param texts: Die zu verarbeitenden Texte.
+        :param splitResult: Boolesches Flag, das angibt, ob die Lemmata gesplittet oder als String zurückgegeben werden sollen.
+        :return: Liste der verarbeiteten Texte in der Reihenfolge der Eingabe.
+        """
+        return [self.preprocessText(text, splitResult) for text in texts]
+
+_defaultPreprocessor = None
+
+
+def preprocessTexts(texts: list[str], splitResult: bool = False) -> list:
+    """
+    Verarbeitet eine Liste von Texten mit einer pro Prozess einmalig angelegten TextPreprocessor-Instanz.
+    Die Funktion ist auf Modulebene definiert, damit sie an einen Prozess-Pool übergeben werden kann.
+
+    :param texts: Die zu verarbeitenden Texte.
+    :param splitResult: Boolesches Flag, das angibt, ob die Lemmata gesplittet oder als String zurückgegeben werden sollen.
+    :return: Liste der verarbeiteten Texte in der Reihenfolge der Eingabe.
+    """
+    global _defaultPreprocessor
+    if _defaultPreprocessor is None:
+        _defaultPreprocessor = TextPreprocessor()
+    return _defaultPreprocessor.preprocessMany(texts, splitResult)
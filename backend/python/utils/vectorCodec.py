@@ -0,0 +1,94 @@
+import base64
+
+import numpy as np
+
+# Medientyp für Vektoren als Base64-Blöcke innerhalb von JSON, z.B. 'application/vnd.baula.vectors+json; dtype=float16'
+VECTOR_MEDIA_TYPE = "application/vnd.baula.vectors+json"
+VECTOR_DTYPES = {"float32": np.dtype('<f4'), "float16": np.dtype('<f2')}
+
+
+def encodeVectors(vectors: np.ndarray, dtype: str = 'float32') -> str:
+    """
+    Kodiert eine Matrix von Vektoren als Base64-String (Little Endian, zeilenweise).
+
+    :param vectors: Matrix der Form (Anzahl Vektoren, Dimension).
+    :param dtype: 'float32' oder 'float16'.
+    :return: Der Base64-String.
+    """
+    if dtype not in VECTOR_DTYPES:
+        raise ValueError(f"Unsupported vector dtype: {dtype}")
+    data = np.ascontiguousarray(vectors, dtype=VECTOR_DTYPES[dtype])
+    return base64.b64encode(data.tobytes()).decode('ascii')
+
+
+def decodeVectors(data: str, dtype: str, dimension: int, count: int = None) -> np.ndarray:
+    """
+    Dekodiert einen mit encodeVectors erzeugten Base64-String.
+
+    :param data: Der Base64-String.
+    :param dtype: 'float32' oder 'float16'.
+    :param dimension: Dimension der Vektoren.
+    :param count: Erwartete Anzahl an Vektoren oder None.
+    :return: float32-Matrix der Form (Anzahl Vektoren, Dimension).
+    :raises ValueError: Wenn Datentyp, Länge oder Anzahl nicht zu den Angaben passen.
+    """
+    if dtype not in VECTOR_DTYPES:
+        raise ValueError(f"Unsupported vector dtype: {dtype}")
+    if dimension <= 0:
+        raise ValueError("dimension must be positive")
+    raw = base64.b64decode(data, validate=True)
+    itemSize = VECTOR_DTYPES[dtype].itemsize
+    if len(raw) % (itemSize * dimension) != 0:
+        raise ValueError(f"Vector data of {len(raw)} bytes does not match dimension {dimension} ({dtype})")
+    vectors = np.frombuffer(raw, dtype=VECTOR_DTYPES[dtype]).reshape(-1, dimension)
+    if count is not None and vectors.shape[0] != count:
+        raise ValueError(f"Expected {count} vectors, got {vectors.shape[0]}")
+    return vectors.astype(np.float32)
+
+
+def _findVectorMediaType(headerValue: str) -> tuple[bool, str]:
+    for mediaRange in (headerValue or "").split(','):
+        mediaType, *parameters = [part.strip() for part in mediaRange.split(';')]
+        if mediaType.lower() != VECTOR_MEDIA_TYPE:
+            continue
+        for parameter in parameters:
+            key, _, value = parameter.partition('=')
+            if key.strip().lower() == 'dtype':
+                return True, value.strip().strip('"').lower()
+        return True, None
+    return False, None
+
+
+def parseVectorMediaType(headerValue: str):
+    """
+    Prüft, ob ein Content-Type- bzw. Accept-Header das Vektorformat anfordert, und liest den gewünschten Datentyp.
+
+    :param headerValue: Wert des Headers (darf mehrere, durch Komma getrennte Medientypen enthalten).
+    :return: Der Datentyp ('float32' oder 'float16') oder None, wenn JSON-Listen verwendet werden sollen.
+    """
+    found, dtype = _findVectorMediaType(headerValue)
+    if not found:
+        return None
+    dtype = dtype or 'float32'
+    if dtype not in VECTOR_DTYPES:
+        raise ValueError(f"Unsupported vector dtype: {dtype}")
+    return dtype
+
+
+def resolveRequestDtype(contentType: str, bodyDtype: str = None) -> str:
+    """
+    Bestimmt den Datentyp einer Anfrage im Vektorformat aus dem Parameter 'dtype' des Content-Type-Headers
+    und dem Feld 'dtype' im Body. Fehlt beides, wird 'float32' verwendet.
+
+    :param contentType: Wert des Content-Type-Headers.
+    :param bodyDtype: Datentyp aus dem Body oder None, wenn er dort nicht angegeben ist.
+    :return: Der Datentyp ('float32' oder 'float16').
+    :raises ValueError: Wenn Header und Body verschiedene Datentypen angeben oder der Datentyp unbekannt ist.
+    """
+    _, headerDtype = _findVectorMediaType(contentType)
+    if headerDtype and bodyDtype and headerDtype != bodyDtype.lower():
+        raise ValueError(f"dtype in Content-Type ({headerDtype}) does not match dtype in body ({bodyDtype})")
+    dtype = (bodyDtype or headerDtype or 'float32').lower()
+    if dtype not in VECTOR_DTYPES:
+        raise ValueError(f"Unsupported vector dtype: {dtype}")
+    return dtype